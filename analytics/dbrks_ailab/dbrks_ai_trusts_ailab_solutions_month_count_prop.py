@@ -57,8 +57,7 @@ CONNECTION_STRING = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CON
 file_path_config = "/config/pipelines/nhsx-au-analytics/"
 file_name_config = "config_ailab_solutions_dbrks.json"
 file_system_config = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
-config_JSON = datalake_download(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
-config_JSON = json.loads(io.BytesIO(config_JSON).read())
+config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
 
 # COMMAND ----------
 
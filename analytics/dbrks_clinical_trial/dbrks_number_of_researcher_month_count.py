@@ -56,8 +56,7 @@ CONNECTION_STRING = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CON
 file_path_config = "/config/pipelines/nhsx-au-analytics/"
 file_name_config = "config_clinical_trial_dbrks.json"
 file_system_config = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
-config_JSON = datalake_download(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
-config_JSON = json.loads(io.BytesIO(config_JSON).read())
+config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
 
 # COMMAND ----------
 
@@ -66,9 +65,10 @@ config_JSON = json.loads(io.BytesIO(config_JSON).read())
 file_system = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
 source_path = config_JSON['pipeline']['project']['source_path']
 source_file = config_JSON['pipeline']['project']['source_file']
-sink_path = config_JSON['pipeline']['project']['databricks'][1]['sink_path']
-sink_file = config_JSON['pipeline']['project']['databricks'][1]['sink_file']
-table_name = config_JSON['pipeline']['staging'][1]['sink_table'] 
+metrics = pipeline_metrics(config_JSON)
+sink_path = metrics['number_of_researcher_month_count']['sink_path']
+sink_file = metrics['number_of_researcher_month_count']['sink_file']
+table_name = metrics['number_of_clinical_trial_researcher_month_count']['sink_table'] 
 
 # COMMAND ----------
 
@@ -56,8 +56,7 @@ CONNECTION_STRING = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CON
 file_path_config = "/config/pipelines/nhsx-au-analytics/"
 file_name_config = "config_clinical_trial_dbrks.json"
 file_system_config = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
-config_JSON = datalake_download(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
-config_JSON = json.loads(io.BytesIO(config_JSON).read())
+config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
 
 # COMMAND ----------
 
@@ -66,9 +65,10 @@ config_JSON = json.loads(io.BytesIO(config_JSON).read())
 file_system = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
 source_path = config_JSON['pipeline']['project']['source_path']
 source_file = config_JSON['pipeline']['project']['source_file']
-sink_path = config_JSON['pipeline']['project']['databricks'][0]['sink_path']
-sink_file = config_JSON['pipeline']['project']['databricks'][0]['sink_file']
-table_name = config_JSON['pipeline']['staging'][0]['sink_table'] 
+metric_config = pipeline_metrics(config_JSON)['clinical_trial_volume_month_count']
+sink_path = metric_config['sink_path']
+sink_file = metric_config['sink_file']
+table_name = metric_config['sink_table'] 
 
 # COMMAND ----------
 
@@ -55,26 +55,27 @@ CONNECTION_STRING = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CON
 
 # COMMAND ----------
 
+# MAGIC %run /Shared/databricks/au-azure-databricks-cicd/functions/dbrks_dscr_functions
+
+# COMMAND ----------
+
 # Load JSON config from Azure datalake
 # -------------------------------------------------------------------------
 file_path_config = "/config/pipelines/nhsx-au-analytics/"
 file_name_config = "config_dscr_dbrks.json"
 file_system_config = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
-config_JSON = datalake_download(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
-config_JSON = json.loads(io.BytesIO(config_JSON).read())
+config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
 
 # Load PIR config file
 # -------------------------------------------------------------------------
 pir_file_path_config = "/config/pipelines/nhsx-au-analytics/"
 pir_file_name_config = "config_digitalrecords_socialcare_dbrks.json"
-pir_config_JSON = datalake_download(CONNECTION_STRING, file_system_config, pir_file_path_config, pir_file_name_config)
-pir_config_JSON = json.loads(io.BytesIO(pir_config_JSON).read())
+pir_config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, pir_file_path_config, pir_file_name_config)
 
 # Load Home Care Service User config file
 # -------------------------------------------------------------------------
 hcsu_file_name_config = "config_home_care_user_service.json"
-hcsu_config_JSON = datalake_download(CONNECTION_STRING, file_system_config, file_path_config, hcsu_file_name_config)
-hcsu_config_JSON = json.loads(io.BytesIO(hcsu_config_JSON).read())
+hcsu_config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, file_path_config, hcsu_file_name_config)
 
 # COMMAND ----------
 
@@ -85,9 +86,10 @@ source_file = config_JSON['pipeline']['project']['source_file']
 reference_path = config_JSON['pipeline']['project']['reference_source_path']
 reference_file = config_JSON['pipeline']['project']['reference_source_file']
 file_system =  dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
-sink_path = config_JSON['pipeline']['project']['databricks'][4]['sink_path']
-sink_file = config_JSON['pipeline']['project']['databricks'][4]['sink_file']
-table_name = config_JSON['pipeline']["staging"][4]['sink_table']
+metrics = pipeline_metrics(config_JSON)
+sink_path = metrics['dbrks_dscr_all_variables_care_home_beds_consolidated']['sink_path']
+sink_file = metrics['dbrks_dscr_all_variables_care_home_beds_consolidated']['sink_file']
+table_name = metrics['dscr_all_variables_care_home_beds_consolidated']['sink_table']
 
 #Get parameters from PIR JSON config
 # -------------------------------------------------------------------------
@@ -103,22 +105,10 @@ hcsu_source_file = hcsu_config_JSON['pipeline']['proc']['sink_file']
 
 # dscr data Processing
 # -------------------------------------------------------------------------
-latestFolder = datalake_latestFolder(CONNECTION_STRING, file_system, source_path)
-file = datalake_download(CONNECTION_STRING, file_system, source_path+latestFolder, source_file)
-df = pd.read_parquet(io.BytesIO(file), engine="pyarrow")
-df_1 = df[['Location ID', 'Dormant (Y/N)','Care home?', 'Care homes beds', 'Location Inspection Directorate','Location Primary Inspection Category','Location Local Authority','Location ONSPD CCG Code','Location ONSPD CCG','Provider ID','Provider Inspection Directorate','Provider Primary Inspection Category','Provider Postal Code','run_date']]
-
-df_2 = df_1.drop_duplicates()
-df_3 = df_2.rename(columns = {'Location ID':'Location_Id','Dormant (Y/N)':'Is_Domant','Care home?':'Is_Care_Home', 'Care homes beds':'Care_Home_Beds', 'Location Inspection Directorate':'Location_Inspection_Directorate','Location Primary Inspection Category':'Location_Primary_Inspection_Category','Location Local Authority':'Location_Local_Authority','Location ONSPD CCG Code':'CCG_ONS_Code','Location ONSPD CCG':'Location_ONSPD_CCG_Name','Provider ID':'Provider_ID','Provider Inspection Directorate':'Provider_Inspection_Directorate','Provider Primary Inspection Category':'Provider_Primary_Inspection_Category','Provider Postal Code':'Provider_Postal_Code','run_date':'monthly_date'})
-
-
-# ref data Processing
-# -------------------------------------------------------------------------
-latestFolder = datalake_latestFolder(CONNECTION_STRING, file_system, reference_path)
-file = datalake_download(CONNECTION_STRING, file_system,reference_path+latestFolder, reference_file)
-df_ref = pd.read_parquet(io.BytesIO(file), engine="pyarrow")
-df_ref_1 = df_ref[['CCG_ONS_Code','CCG_ODS_Code','CCG_Name', 'CCG21CD', 'ICB_ONS_Code','ICB_Code','ICB_Name','Region_Code','Region_Name','Last_Refreshed']]
-df_ref_2 = df_ref_1[~df_ref_1.duplicated(['CCG_ONS_Code', 'CCG_ODS_Code','CCG_Name', 'CCG21CD', 'ICB_ONS_Code','ICB_Code','ICB_Name','Region_Code','Region_Name','Last_Refreshed'])].reset_index(drop = True)
+# CQC locations joined to the CCG/ICB reference data, built once per input version
+# and shared by all DSCR notebooks (see dbrks_dscr_functions)
+df_base = dscr_load_base_join(CONNECTION_STRING, file_system, config_JSON)
+df_join = dscr_select_join(df_base, ['Location ID', 'Dormant (Y/N)','Care home?', 'Care homes beds', 'Location Inspection Directorate','Location Primary Inspection Category','Location Local Authority','Location ONSPD CCG Code','Location ONSPD CCG','Provider ID','Provider Inspection Directorate','Provider Primary Inspection Category','Provider Postal Code','run_date'])
 
 # HCSU Data Processing 
 # -------------------------------------------------------------------------
@@ -136,15 +126,12 @@ df_hcsu.rename(columns={'CqcId': 'Location_Id'}, inplace=True)
 
 # COMMAND ----------
 
-df_3.groupby(["Location_Id","monthly_date"],  as_index=False).agg({"Provider_ID": "count"})
+df_join.groupby(["Location_Id","monthly_date"],  as_index=False).agg({"Provider_ID": "count"})
 
 # COMMAND ----------
 
 # Joint processing
 # -------------------------------------------------------------------------
-df_join = df_3.merge(df_ref_2, how ='outer', left_on = 'CCG_ONS_Code', right_on = 'CCG21CD')
-df_join.index.name = "Unique ID"
-df_join = df_join.round(4)
 df_join["monthly_date"] = pd.to_datetime(df_join["monthly_date"], format='%d/%m/%Y')
 df_join = df_join[df_join["Location_Inspection_Directorate"]=="Adult social care"] # keep only Adult Social Care Primary Inspection Directorate
 #df_processed = df_join.copy()
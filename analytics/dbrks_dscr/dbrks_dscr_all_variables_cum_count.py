@@ -16,7 +16,7 @@ USAGE:          (M323)
 CONTRIBUTORS:   Abdu Nuhu and Martina Fonseca
 CONTACT:        data@nhsx.nhs.uk
 CREATED:        2 May. 2023
-VERSION:        0.0.1
+VERSION:        0.0.2
 """
 
 # COMMAND ----------
@@ -53,20 +53,22 @@ CONNECTION_STRING = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CON
 
 # COMMAND ----------
 
+# MAGIC %run /Shared/databricks/au-azure-databricks-cicd/functions/dbrks_dscr_functions
+
+# COMMAND ----------
+
 # Load JSON config from Azure datalake
 # -------------------------------------------------------------------------
 file_path_config = "/config/pipelines/nhsx-au-analytics/"
 file_name_config = "config_dscr_dbrks.json"
 file_system_config = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
-config_JSON = datalake_download(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
-config_JSON = json.loads(io.BytesIO(config_JSON).read())
+config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
 
 # Load PIR config file
 # -------------------------------------------------------------------------
 pir_file_path_config = "/config/pipelines/nhsx-au-analytics/"
 pir_file_name_config = "config_digitalrecords_socialcare_dbrks.json"
-pir_config_JSON = datalake_download(CONNECTION_STRING, file_system_config, pir_file_path_config, pir_file_name_config)
-pir_config_JSON = json.loads(io.BytesIO(pir_config_JSON).read())
+pir_config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, pir_file_path_config, pir_file_name_config)
 
 
 # COMMAND ----------
@@ -78,9 +80,10 @@ source_file = config_JSON['pipeline']['project']['source_file']
 reference_path = config_JSON['pipeline']['project']['reference_source_path']
 reference_file = config_JSON['pipeline']['project']['reference_source_file']
 file_system =  dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
-sink_path = config_JSON['pipeline']['project']['databricks'][3]['sink_path']
-sink_file = config_JSON['pipeline']['project']['databricks'][3]['sink_file']
-table_name = config_JSON['pipeline']["staging"][3]['sink_table']
+metrics = pipeline_metrics(config_JSON)
+sink_path = metrics['dbrks_dscr_all_variables_cum_count']['sink_path']
+sink_file = metrics['dbrks_dscr_all_variables_cum_count']['sink_file']
+table_name = metrics['dscr_all_variables_cum_count']['sink_table']
 
 #Get parameters from PIR JSON config
 # -------------------------------------------------------------------------
@@ -95,38 +98,24 @@ current_date_path = datetime.now().strftime('%Y-%m-%d') + '/'
 
 # dscr data Processing
 # -------------------------------------------------------------------------
-latestFolder = datalake_latestFolder(CONNECTION_STRING, file_system, source_path)
-file = datalake_download(CONNECTION_STRING, file_system, source_path+latestFolder, source_file)
-df = pd.read_parquet(io.BytesIO(file), engine="pyarrow")
-df_1 = df[['Location ID', 'Dormant (Y/N)','Care home?','Location Inspection Directorate','Location Primary Inspection Category','Location Local Authority','Location ONSPD CCG Code','Location ONSPD CCG','Provider ID','Provider Inspection Directorate','Provider Primary Inspection Category','Provider Postal Code', 'run_date']]
-
-df_2 = df_1.drop_duplicates()
-df_3 = df_2.rename(columns = {'Location ID':'Location_Id','Dormant (Y/N)':'Is_Domant','Care home?':'Is_Care_Home','Location Inspection Directorate':'Location_Inspection_Directorate','Location Primary Inspection Category':'Location_Primary_Inspection_Category','Location Local Authority':'Location_Local_Authority','Location ONSPD CCG Code':'CCG_ONS_Code','Location ONSPD CCG':'Location_ONSPD_CCG_Name','Provider ID':'Provider_ID','Provider Inspection Directorate':'Provider_Inspection_Directorate','Provider Primary Inspection Category':'Provider_Primary_Inspection_Category','Provider Postal Code':'Provider_Postal_Code','run_date':'monthly_date'})
-
-# ref data Processing
-# -------------------------------------------------------------------------
-latestFolder = datalake_latestFolder(CONNECTION_STRING, file_system, reference_path)
-file = datalake_download(CONNECTION_STRING, file_system,reference_path+latestFolder, reference_file)
-df_ref = pd.read_parquet(io.BytesIO(file), engine="pyarrow")
-df_ref_1 = df_ref[['CCG_ONS_Code','CCG_ODS_Code','CCG_Name', 'CCG21CD','ICB_ONS_Code','ICB_Code','ICB_Name','Region_Code','Region_Name','Last_Refreshed']]
-df_ref_2 = df_ref_1[~df_ref_1.duplicated(['CCG_ONS_Code', 'CCG_ODS_Code','CCG_Name', 'CCG21CD','ICB_ONS_Code','ICB_Code','ICB_Name','Region_Code','Region_Name','Last_Refreshed'])].reset_index(drop = True)
+# CQC locations joined to the CCG/ICB reference data, built once per input version
+# and shared by all DSCR notebooks (see dbrks_dscr_functions)
+df_base = dscr_load_base_join(CONNECTION_STRING, file_system, config_JSON)
+df_join = dscr_select_join(df_base, ['Location ID', 'Dormant (Y/N)','Care home?','Location Inspection Directorate','Location Primary Inspection Category','Location Local Authority','Location ONSPD CCG Code','Location ONSPD CCG','Provider ID','Provider Inspection Directorate','Provider Primary Inspection Category','Provider Postal Code', 'run_date'])
 
 
 # COMMAND ----------
 
-df_3
+df_join
 
 # COMMAND ----------
 
-df_3.groupby(["monthly_date"]).count() # sense check
+df_join.groupby(["monthly_date"]).count() # sense check
 
 # COMMAND ----------
 
 # Joint processing
 # -------------------------------------------------------------------------
-df_join = df_3.merge(df_ref_2, how ='outer', left_on = 'CCG_ONS_Code', right_on = 'CCG21CD')
-df_join.index.name = "Unique ID"
-df_join = df_join.round(4)
 df_join["monthly_date"] = pd.to_datetime(df_join["monthly_date"],format="%d/%m/%Y") # MF230608 . added format otherwise it was interpreting the day as month and vice-versa
 df_join = df_join[df_join["Location_Inspection_Directorate"]=="Adult social care"] # MF230608. keep only Adult Social Care Primary Inspection Directorate
 
@@ -146,151 +135,41 @@ df_pir #
 
 # COMMAND ----------
 
-df_pir["months"] = pd.to_datetime(df_pir["PIR submission date"]).dt.month
-df_pir["year"] = pd.to_datetime(df_pir["PIR submission date"]).dt.year
-df_pir["month_year"] = df_pir["months"].astype(str) + "-" + df_pir["year"].astype(str)
-
-# columns needed from PIR (For Tab01)
-df_pir_keep = df_pir[["Location ID","PIR submission date","month_year","PIR type","Use a Digital Social Care Record system?"]] 
-df_pir_keep.rename(columns={"Location ID":"Location_Id"},inplace=True)
+# columns needed from PIR
+df_pir_keep = df_pir[["Location ID","PIR submission date","PIR type","Use a Digital Social Care Record system?"]].rename(columns={"Location ID":"Location_Id"})
 
-# what to keep from enriched reference data (For Tab01) (that is useful for Tableau).
+# what to keep from enriched reference data (that is useful for Tableau).
 df_join_keep = df_join[["Location_Id",
                         "Location_Primary_Inspection_Category",
                         "Location_Local_Authority",
                         "CCG_ONS_Code_y","Location_ONSPD_CCG_Name",
                         "ICB_ONS_Code","ICB_Name",
                         "Region_Code","Region_Name",
-                        "Provider_ID", "monthly_date"]].copy()   
-
-# Left join reference info to PIR (as it's a sampler)
-
-df_tab01_sampler = df_pir_keep.merge(df_join_keep, how ='left', on ="Location_Id") # 52069 rows . 52063 ASC only
-#df_join # 259168 rows . 138232 ASC only
-
-df_tab02_patch = df_join_keep.merge(df_pir_keep, how = 'left', on='Location_Id') # MF230608 . Table02, left join PIR to reference info
-
-# COMMAND ----------
-
-df_tab02_patch = df_tab02_patch.rename(columns = {'CCG_ONS_Code_y':'CCG_ONS_Code'})
-
-# COMMAND ----------
-
-#df_join_keep.groupby(["monthly_date"]).count() 
-
-# COMMAND ----------
-
-#df_tab02_patch.groupby(["monthly_date"]).count() 
-
-# COMMAND ----------
-
-#df_tab02_patch.groupby(["monthly_date"]).nunique() 
-
-# COMMAND ----------
-
-# Create 1, 0 flag for yes and no to be use for calculation
-
-df_tab01_sampler["yes"] = np.where(df_tab01_sampler['Use a Digital Social Care Record system?'] == "Yes", 1, 0)
-df_tab01_sampler["no"] = np.where(df_tab01_sampler['Use a Digital Social Care Record system?'] == "No", 1, 0)
-#df_tab01_sampler
-
-# COMMAND ----------
-
-# Tab02 - Create 1, 0 flag for yes and no to be use for calculation
-df_tab02_patch["yes"] = np.where(df_tab02_patch['Use a Digital Social Care Record system?'] == "Yes", 1, 0)
-df_tab02_patch["no"] = np.where(df_tab02_patch['Use a Digital Social Care Record system?'] == "No", 1, 0)
-
-# COMMAND ----------
-
-# MAGIC %md
-# MAGIC # Similar for Table02_patch
-# MAGIC so that we have a) the position for each CQC month database of locations; b) we know the response rate (i.e. those with neither 'yes' nor 'no')
-
-# COMMAND ----------
-
-import datetime
-from dateutil.relativedelta import relativedelta
-
-# COMMAND ----------
-
-#auxx = df_tab02_patch[df_tab02_patch["monthly_date"]=="2023-05-01"].copy()
-#auxx[auxx['Use a Digital Social Care Record system?']=="Yes"]
-
-# COMMAND ----------
-
-df_tab_cumtrend = df_tab02_patch.copy()
-df_tab_cumtrend["PIR submission date"] = df_tab_cumtrend["PIR submission date"].fillna(value="2030-12-31") # pad with a date far in the future
-df_tab_cumtrend["eo_monthly_date"] = df_tab_cumtrend["monthly_date"]+ pd.offsets.MonthEnd(n=0) # 
-df_tab_cumtrend["yes"] = np.where(((df_tab_cumtrend['Use a Digital Social Care Record system?'] == "Yes") & (df_tab_cumtrend["PIR submission date"]<=df_tab_cumtrend["eo_monthly_date"])), 1, 0)
-df_tab_cumtrend["no"] = np.where(((df_tab_cumtrend['Use a Digital Social Care Record system?'] == "No") & (df_tab_cumtrend["PIR submission date"]<=df_tab_cumtrend["eo_monthly_date"])), 1, 0)
-                                                                                           
-
-# COMMAND ----------
-
-#df_tab_cumtrend.groupby(["eo_monthly_date","monthly_date"]).count()
-#df_tab_cumtrend[df_tab_cumtrend["eo_monthly_date"]=="2023-05-31"][["no","yes"]].sum()
-
-# COMMAND ----------
-
-#aux = df_tab_cumtrend[df_tab_cumtrend["eo_monthly_date"]=="2023-05-31"].copy()
-#aux[aux['Use a Digital Social Care Record system?']=="No"]
-#aux[aux['Use a Digital Social Care Record system?']=="Yes"]
-
-# COMMAND ----------
-
-#df_tab_cumtrend.groupby(["eo_monthly_date","monthly_date"]).nunique()
-
-# COMMAND ----------
-
-df_tab_cumtrend[["Location_Id","Location_Primary_Inspection_Category","Location_Local_Authority","CCG_ONS_Code","Location_ONSPD_CCG_Name","ICB_ONS_Code","ICB_Name","Region_Code","Region_Name"]] = df_tab_cumtrend[["Location_Id","Location_Primary_Inspection_Category","Location_Local_Authority","CCG_ONS_Code","Location_ONSPD_CCG_Name","ICB_ONS_Code","ICB_Name","Region_Code","Region_Name"]].fillna('Unknown')
-df_tab_cumtrend_sum = df_tab_cumtrend.copy()
-
-# COMMAND ----------
-
-#df_tab_cumtrend_sum["cumyes"] = df_tab_cumtrend_sum.groupby(["Location_Id"]).apply(lambda x: x[x['PIR submission date'] <= x['eo_monthly_date']]['yes'].sum())
-df_tab_cumtrend_sum = df_tab_cumtrend_sum.groupby(["Location_Id",
-                        "Location_Primary_Inspection_Category",
-                        "Location_Local_Authority",
-                        "CCG_ONS_Code","Location_ONSPD_CCG_Name",
-                        "ICB_ONS_Code","ICB_Name",
-                        "Region_Code","Region_Name",
-                        "Provider_ID", "eo_monthly_date"]).agg(YEStodate=("yes", lambda x: (x==1).sum()),
-                                                           NOtodate=("no", lambda x: (x==1).sum()))
-df_tab_cumtrend_sum = df_tab_cumtrend_sum.reset_index()
-
-# COMMAND ----------
-
-#df_tab_cumtrend_sum[df_tab_cumtrend_sum["eo_monthly_date"]=="2023-05-31"]["YEStodate"].sum()
-
-# COMMAND ----------
-
-df_tab_cumtrend[["Location_Id",
-                        "Location_Primary_Inspection_Category",
-                        "Location_Local_Authority",
-                        "CCG_ONS_Code","Location_ONSPD_CCG_Name",
-                        "ICB_ONS_Code","ICB_Name",
-                        "Region_Code","Region_Name",
-                        "Provider_ID", "eo_monthly_date"]].isna().sum()
+                        "Provider_ID", "monthly_date"]].copy()
+df_join_keep = df_join_keep.rename(columns = {'CCG_ONS_Code_y':'CCG_ONS_Code'})
 
 # COMMAND ----------
 
-#df_tab_cumtrend_sum.groupby(["eo_monthly_date"]).count()
+location_cols = ["Location_Id",
+                 "Location_Primary_Inspection_Category",
+                 "Location_Local_Authority",
+                 "CCG_ONS_Code","Location_ONSPD_CCG_Name",
+                 "ICB_ONS_Code","ICB_Name",
+                 "Region_Code","Region_Name"]
+df_join_keep = dscr_fillna(df_join_keep, location_cols, 'Unknown')
 
 # COMMAND ----------
 
-#df_tab_cumtrend_sum.groupby(["eo_monthly_date"]).nunique()
+# Cumulative PIR status for each location at the end of each CQC month
+# Yes/No answers submitted up to each month end are found with an as-of join on the
+# sorted PIR submissions (see dbrks_dscr_functions), and PIR_todate is "Yes" if any
+# Yes to date, "No" if only No answers to date and "None" if no answer yet
+# -------------------------------------------------------------------------
+df_tab_cumtrend_sum = dscr_cumulative_pir_status(df_join_keep, df_pir_keep, location_cols + ["Provider_ID"])
 
 # COMMAND ----------
 
-# Create necessary Tableau variable - to compute both % implementation and response rate
-# https://numpy.org/doc/stable/reference/generated/numpy.select.html
-conditions = [ (df_tab_cumtrend_sum["YEStodate"]>=1),
-              (df_tab_cumtrend_sum["YEStodate"]<1)&(df_tab_cumtrend_sum["NOtodate"]>=1),
-              (df_tab_cumtrend_sum["YEStodate"]+df_tab_cumtrend_sum["NOtodate"]==0)
-               ]
-PIRstatus = ["Yes","No","None"]
-df_tab_cumtrend_sum["PIR_todate"] = np.select(conditions,PIRstatus)
-
+df_join_keep[location_cols + ["Provider_ID", "monthly_date"]].isna().sum()
 
 # COMMAND ----------
 
@@ -64,8 +64,7 @@ CONNECTION_STRING = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CON
 file_path_config = "/config/pipelines/nhsx-au-analytics/"
 file_name_config = "config_dscr_ics_qtrly_report.json"
 file_system_config = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
-config_JSON = datalake_download(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
-config_JSON = json.loads(io.BytesIO(config_JSON).read())
+config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
 
 # COMMAND ----------
 
@@ -86,8 +85,7 @@ latestFolder = datalake_latestFolder(CONNECTION_STRING, file_system, source_path
 file_name_list = datalake_listContents(CONNECTION_STRING, file_system, source_path+latestFolder)
 file_name_list = [file for file in file_name_list if '.xlsm' in file]
 for source_file in file_name_list:
-  new_dataset = datalake_download(CONNECTION_STRING, file_system, source_path+latestFolder, source_file)
-  new_dataframe = pd.read_excel(io.BytesIO(new_dataset), sheet_name = "Backsheet for Pipeline", header = 0, engine='openpyxl') 
+  new_dataframe = read_landed_sheet(CONNECTION_STRING, file_system, source_path+latestFolder, source_file, sheet_name = "Backsheet for Pipeline") 
   
 #convert new dataframe to string so it is in the same format as historical
 #new_dataframe = new_dataframe.astype('string')
@@ -58,8 +58,7 @@ CONNECTION_STRING = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CON
 file_path_config = "/config/pipelines/nhsx-au-analytics/"
 file_name_config = "config_dscr_trajectory_dbrks.json"
 file_system_config =  dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
-config_JSON = datalake_download(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
-config_JSON = json.loads(io.BytesIO(config_JSON).read())
+config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
 
 # COMMAND ----------
 
@@ -69,7 +68,8 @@ source_path = config_JSON['pipeline']['project']['source_path']
 source_file = config_JSON['pipeline']['project']['source_file']
 sink_path = config_JSON['pipeline']['project']['sink_path']
 sink_file = config_JSON['pipeline']['project']['sink_file']
-table_name = config_JSON['pipeline']["staging"][0]['sink_table']
+metric_config = pipeline_metrics(config_JSON)['dscr_trajectory']
+table_name = metric_config['sink_table']
 
 
 # COMMAND ----------
@@ -58,8 +58,7 @@ CONNECTION_STRING = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CON
 file_path_config = "/config/pipelines/nhsx-au-analytics/"
 file_name_config = "config_dspt_nhs_dbrks.json"
 file_system_config =  dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
-config_JSON = datalake_download(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
-config_JSON = json.loads(io.BytesIO(config_JSON).read())
+config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
 
 # COMMAND ----------
 
@@ -69,31 +68,17 @@ source_file = config_JSON['pipeline']['project']['source_file']
 reference_path = config_JSON['pipeline']['project']['reference_path2']
 reference_file = config_JSON['pipeline']['project']['reference_file2']
 file_system =  dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
-sink_path = config_JSON['pipeline']['project']['databricks'][2]['sink_path']
-sink_file = config_JSON['pipeline']['project']['databricks'][2]['sink_file']
-table_name = config_JSON['pipeline']["staging"][2]['sink_table']
+metric_config = pipeline_metrics(config_JSON)['dspt_nhs_trusts_standards_compliance_by_ICB']
+sink_path = metric_config['sink_path']
+sink_file = metric_config['sink_file']
+table_name = metric_config['sink_table']
+cache_path = metric_config['cache_path']
 
 # COMMAND ----------
 
 reference_latestFolder = datalake_latestFolder(CONNECTION_STRING, file_system, reference_path)
 reference_file = datalake_download(CONNECTION_STRING, file_system, reference_path+reference_latestFolder, reference_file)
-
-# COMMAND ----------
-
-def datalake_list_folders(CONNECTION_STRING, file_system, source_path):
-  try:
-      service_client = DataLakeServiceClient.from_connection_string(CONNECTION_STRING)
-      file_system_client = service_client.get_file_system_client(file_system=file_system)
-      pathlist = list(file_system_client.get_paths(source_path))
-      folders = []
-      # remove file_path and source_file from list
-      for path in pathlist:
-        folders.append(path.name.replace(source_path.strip("/"), "").lstrip("/").rsplit("/", 1)[0])
-        folders.sort(key=lambda date: datetime.strptime(date, "%Y-%m-%d"))
-      
-      return folders
-  except Exception as e:
-      print(e)
+ODS_code_df = pd.read_parquet(io.BytesIO(reference_file), engine="pyarrow")
 
 # COMMAND ----------
 
@@ -115,7 +100,7 @@ def get_latest_dates(dates):
 
 # COMMAND ----------
 
-all_folders = datalake_list_folders(CONNECTION_STRING, file_system, source_path)
+all_folders = sorted(datalake_list_folders(CONNECTION_STRING, file_system, source_path))
 latest_dates = get_latest_dates(all_folders)
 latest_folders = []
 for i in latest_dates:
@@ -127,12 +112,13 @@ for i in latest_dates:
 
 # Processing 
 # -------------------------------------------------------------------------
-df_processed = pd.DataFrame(columns = ['ICB_Code', 'Latest Status', 'Number of Trusts with standard status', 'Total number of Trusts', 'Snapshot Date'])
-for folder in latest_folders:
-  latestFolder = folder + '/'
-  file = datalake_download(CONNECTION_STRING, file_system, source_path+latestFolder, source_file)
+# Each month's snapshot is processed once against the reference loaded above. Results are
+# cached per snapshot folder, under the reference folder they were joined with (bump
+# CACHE_VERSION when the processing below changes).
+CACHE_VERSION = "1"
+
+def process_dspt_snapshot(file, folder):
   DSPT_df = pd.read_csv(io.BytesIO(file))
-  ODS_code_df = pd.read_parquet(io.BytesIO(reference_file), engine="pyarrow")
 
   # Make all ODS codes in DSPT dataframe capital
   # -------------------------------------------------------------------------
@@ -216,7 +202,13 @@ for folder in latest_folders:
   df_join_1 = df1.rename(columns = {'STP_Code':'ICB_Code'})
   df_join_1.index.name = "Unique ID"
   df_join_1['Snapshot Date'] = folder
-  df_processed = pd.concat([df_processed, df_join_1], ignore_index=True) 
+  return df_join_1
+
+df_processed = process_snapshot_folders(CONNECTION_STRING, file_system, source_path, source_file, latest_folders, process_dspt_snapshot,
+                                        cache_path = cache_path + 'v' + CACHE_VERSION + '/' + reference_latestFolder,
+                                        cache_file = 'dspt_nhs_trusts_standards_compliance_by_ICB.parquet')
+df_processed = df_processed[['ICB_Code', 'Latest Status', 'Number of Trusts with standard status', 'Total number of Trusts', 'Snapshot Date']]
+latestFolder = latest_folders[-1] + '/'
 
 
 # COMMAND ----------
@@ -60,16 +60,14 @@ CONNECTION_STRING = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CON
 file_path_config = "/config/pipelines/nhsx-au-analytics/"
 file_name_config = "config_dspt_socialcare_dbrks.json"
 file_system_config = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
-config_JSON = datalake_download(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
-config_JSON = json.loads(io.BytesIO(config_JSON).read())
+config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
 
 #Load DSCR config from Azure datalake
 # -------------------------------------------------------------------------
 dscr_file_path_config = "/config/pipelines/nhsx-au-analytics/"
 dscr_file_name_config = "config_dscr_dbrks.json"
 dscr_file_system_config = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
-dscr_config_JSON = datalake_download(CONNECTION_STRING, dscr_file_system_config, dscr_file_path_config, dscr_file_name_config)
-dscr_config_JSON = json.loads(io.BytesIO(dscr_config_JSON).read())
+dscr_config_JSON = load_pipeline_config(CONNECTION_STRING, dscr_file_system_config, dscr_file_path_config, dscr_file_name_config)
 
 # COMMAND ----------
 
@@ -78,9 +76,10 @@ dscr_config_JSON = json.loads(io.BytesIO(dscr_config_JSON).read())
 source_path = config_JSON['pipeline']['project']['source_path']
 source_file = config_JSON['pipeline']['project']['source_file']
 file_system = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
-sink_path = config_JSON['pipeline']['project']['databricks'][1]['sink_path']
-sink_file = config_JSON['pipeline']['project']['databricks'][1]['sink_file']
-table_name = config_JSON['pipeline']["staging"][1]['sink_table']
+metric_config = pipeline_metrics(config_JSON)['dspt_socialcare_standards_compliance_by_ICB']
+sink_path = metric_config['sink_path']
+sink_file = metric_config['sink_file']
+table_name = metric_config['sink_table']
 
 #Get parameters from JSON config
 # -------------------------------------------------------------------------
@@ -88,8 +87,9 @@ dscr_source_path = dscr_config_JSON['pipeline']['raw']['snapshot_source_path']
 dscr_source_file = dscr_config_JSON['pipeline']['raw']['appended_file']
 dscr_reference_path = dscr_config_JSON['pipeline']['project']['reference_source_path']
 dscr_reference_file = dscr_config_JSON['pipeline']['project']['reference_source_file']
-dscr_sink_path = dscr_config_JSON['pipeline']['project']['databricks'][1]['sink_path']
-dscr_sink_file = dscr_config_JSON['pipeline']['project']['databricks'][1]['sink_file']
+dscr_metric_config = pipeline_metrics(dscr_config_JSON)['dbrks_dscr_all_variables_care_home_beds']
+dscr_sink_path = dscr_metric_config['sink_path']
+dscr_sink_file = dscr_metric_config['sink_file']
 reference_path = dscr_config_JSON['pipeline']['project']['reference_source_path']
 reference_file = dscr_config_JSON['pipeline']['project']['reference_source_file']
 
@@ -16,7 +16,7 @@ USAGE:
 CONTRIBUTORS:   Everistus Oputa, Muhammad-Faaiz Shanawas
 CONTACT:        nhsx.data@england.nhs.uk
 CREATED:        11 May 2023
-VERSION:        0.0.1
+VERSION:        0.0.2
 """
 
 # COMMAND ----------
@@ -58,8 +58,7 @@ CONNECTION_STRING = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CON
 file_path_config = "/config/pipelines/nhsx-au-analytics/"
 file_name_config = "config_esr_api.json"
 file_system_config = dbutils.secrets.get(scope="AzureDataLake", key="DATALAKE_CONTAINER_NAME")
-config_JSON = datalake_download(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
-config_JSON = json.loads(io.BytesIO(config_JSON).read())
+config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
 
 # COMMAND ----------
 
@@ -70,9 +69,10 @@ source_path = config_JSON['pipeline']['project']['source_path']
 source_file = config_JSON['pipeline']['project']['source_file']
 reference_path = config_JSON['pipeline']['project']['denominator_source_path']
 reference_file = config_JSON['pipeline']['project']['denominator_source_file']
-sink_path = config_JSON['pipeline']['project']['databricks'][1]['sink_path']
-sink_file = config_JSON['pipeline']['project']['databricks'][1]['sink_file']
-table_name = config_JSON['pipeline']['staging'][1]['sink_table'] 
+metric_config = pipeline_metrics(config_JSON)['e_rs_api_month_prop_by_ICB']
+sink_path = metric_config['sink_path']
+sink_file = metric_config['sink_file']
+table_name = metric_config['sink_table'] 
 
 # COMMAND ----------
 
@@ -88,13 +88,7 @@ df = pd.read_csv(io.BytesIO(file))
 df = df.rename(columns = {'ODS\xa0':'ODS'})
 
 #remove all the spaces from the end of the ODS codes
-list_of_ODS = list(df['ODS'])
-for i in list_of_ODS:
-  if '\xa0' in i:
-    list_of_ODS[list_of_ODS.index(i)] = i.replace('\xa0', '')
-
-#replace the ODS codes without spaces in the dataframe
-df['ODS'] = list_of_ODS
+df['ODS'] = df['ODS'].str.replace('\xa0', '', regex=False)
 
 # COMMAND ----------
 
@@ -114,39 +108,37 @@ df_acute  = df_acute[['ODS', 'STP_Code']]
 
 # COMMAND ----------
 
-#get a list of unique dates 
-list_of_dates = list(df['Report_End _Date'].unique())
-#initiate output dataframe
-df_output = pd.DataFrame(columns = ['E_RS Submitted Trusts', 'Acute Trusts', 'STP_Code', 'Report_End _Date'])
-
-#for each upload date in ers data run the following code
-for date in list_of_dates:
-  #filter ers data for current data and append to reference data to get stp code
-  df_ers = df.loc[df['Report_End _Date'] == date]
-  df_ers = df_ers.merge(df_acute, on = 'ODS', how = 'left')
-  df_ers = df_ers[['ODS', 'STP_Code']]
-  #group by stp code and rename the column to merge with output dataframe
-  df_ers = df_ers.groupby(['STP_Code']).count().reset_index()
-  df_ers = df_ers.rename(columns = {'ODS' : 'E_RS Submitted Trusts'})
-
-  #get the denominator dataframe of acute trusts and group by stp code
-  df_process = df_acute.copy()
-  df_process = df_process.rename(columns={'ODS':'Acute Trusts'})
-  df_process = df_process.groupby(['STP_Code']).count().reset_index()
-  #add in the current date as a column for each row (42)
-  df_process['Report_End _Date'] = [date]*42
-
-  #create the temp dataframe with same headers as output dataframe
-  df_temp = pd.DataFrame(columns = ['E_RS Submitted Trusts', 'Acute Trusts', 'STP_Code', 'Report_End _Date'])
-
-  #merge the numerator and denominator dataframes into df_final
-  df_processed = df_temp.append(df_ers)[['E_RS Submitted Trusts', 'STP_Code']]
-  df_final = pd.merge(df_process, df_processed, on = 'STP_Code', how = 'left')
-
-  #add the df_final dataframe to df_output for each upload date
-  df_output = pd.concat([df_output, df_final], ignore_index=True)
-
-df_output = df_output.fillna(0)
+#incremental mode: keep the rows of the latest output and only compute report dates it does not have yet
+#(the acute trust denominator of those rows is not refreshed, run in full mode to recompute everything)
+dbutils.widgets.text("incremental", "false")
+incremental = dbutils.widgets.get("incremental") == "true"
+df_previous = None
+if incremental:
+  previousFolder = datalake_latestFolder(CONNECTION_STRING, file_system, sink_path)
+  file = datalake_download(CONNECTION_STRING, file_system, sink_path+previousFolder, sink_file)
+  df_previous = pd.read_csv(io.BytesIO(file), index_col=0)
+  df = df[~df['Report_End _Date'].isin(df_previous['Report_End _Date'].unique())]
+  print("Report dates to compute: " + str(df['Report_End _Date'].nunique()))
+
+# COMMAND ----------
+
+#numerator: e-RS submissions of every report date mapped to the acute trust STP code, counted in one groupby
+df_ers = df[['Report_End _Date', 'ODS']].merge(df_acute, on = 'ODS', how = 'left')
+df_ers = df_ers.groupby(['Report_End _Date', 'STP_Code'])['ODS'].count().reset_index()
+df_ers = df_ers.rename(columns = {'ODS' : 'E_RS Submitted Trusts'})
+
+#denominator: acute trusts by stp code, repeated for each report date in upload order
+df_process = df_acute.groupby(['STP_Code'])['ODS'].count().reset_index()
+df_process = df_process.rename(columns = {'ODS' : 'Acute Trusts'})
+df_dates = pd.DataFrame({'Report_End _Date': df['Report_End _Date'].unique()})
+df_process = df_dates.merge(df_process, how = 'cross')
+
+#merge the numerator and denominator dataframes, stps without submissions count 0
+df_final = df_process.merge(df_ers, on = ['Report_End _Date', 'STP_Code'], how = 'left')
+df_final['E_RS Submitted Trusts'] = df_final['E_RS Submitted Trusts'].fillna(0).astype(int)
+df_final = df_final[['E_RS Submitted Trusts', 'Acute Trusts', 'STP_Code', 'Report_End _Date']]
+
+df_output = concat_dataframes([df_previous, df_final], ignore_index=True)
 
 
 
@@ -53,12 +53,15 @@ CONNECTION_STRING = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CON
 
 # COMMAND ----------
 
+# MAGIC %run /Shared/databricks/au-azure-databricks-cicd/functions/dbrks_date_functions
+
+# COMMAND ----------
+
 #Download JSON config from Azure datalake
 file_path_config = "/config/pipelines/nhsx-au-analytics/"
 file_name_config = "config_nhs_app_jumpoff_dbrks.json"
 file_system_config = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
-config_JSON = datalake_download(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
-config_JSON = json.loads(io.BytesIO(config_JSON).read())
+config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
 
 # COMMAND ----------
 
@@ -66,9 +69,10 @@ config_JSON = json.loads(io.BytesIO(config_JSON).read())
 file_system = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
 source_path = config_JSON['pipeline']['project']['source_path']
 source_file = config_JSON['pipeline']['project']['source_file']
-sink_path = config_JSON['pipeline']['project']['databricks'][19]['sink_path']
-sink_file = config_JSON['pipeline']['project']['databricks'][19]['sink_file']
-table_name = config_JSON['pipeline']['staging'][19]['sink_table']
+metric_config = pipeline_metrics(config_JSON)['nhs_app_jumpoff_accurx_medical_day_count']
+sink_path = metric_config['sink_path']
+sink_file = metric_config['sink_file']
+table_name = metric_config['sink_table']
 
 # COMMAND ----------
 
@@ -86,7 +90,7 @@ df1 = df[["Date", "OdsCode", "Provider","JumpOff","Clicks"]].copy()
 df1['Clicks'] = df1['Clicks'].astype(int)
 df1 = df1[(df1['JumpOff']=='medical') & (df1['Provider']=='Accurx Limited')]
 df1 = df1.groupby(['Provider','Date','OdsCode'], as_index=False).sum()
-df1['Date'] = pd.to_datetime(df1['Date'], infer_datetime_format=True)
+df1['Date'] = parse_dates(df1['Date'], "%Y-%m-%d")
 df2 = df1[df1['Date'] >= '2021-01-01'].reset_index(drop = True)  #--------- remove rows pre 2021
 df3 = df2[['Provider','Date', 'OdsCode', 'Clicks']]
 df4 = df3.rename(columns = {'OdsCode': 'Practice code', 'Clicks': 'Number of accurx - medical Jump Off Clicks'})
@@ -54,13 +54,20 @@ CONNECTION_STRING = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CON
 
 # COMMAND ----------
 
+# MAGIC %run /Shared/databricks/au-azure-databricks-cicd/functions/dbrks_date_functions
+
+# COMMAND ----------
+
+# MAGIC %run /Shared/databricks/au-azure-databricks-cicd/functions/dbrks_rollup_functions
+
+# COMMAND ----------
+
 #Download JSON config from Azure datalake
 # -------------------------------------------------------------------------------------------------
 file_path_config = "/config/pipelines/nhsx-au-analytics/"
 file_name_config = "config_nhs_app_jumpoff_dbrks.json"
 file_system_config = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
-config_JSON = datalake_download(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
-config_JSON = json.loads(io.BytesIO(config_JSON).read())
+config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
 
 # COMMAND ----------
 
@@ -69,50 +76,45 @@ config_JSON = json.loads(io.BytesIO(config_JSON).read())
 file_system = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
 source_path = config_JSON['pipeline']['project']['source_path']
 source_file = config_JSON['pipeline']['project']['source_file']
-sink_path = config_JSON['pipeline']['project']['databricks'][20]['sink_path']
-sink_file = config_JSON['pipeline']['project']['databricks'][20]['sink_file']
-table_name = config_JSON['pipeline']['staging'][20]['sink_table']
+metric_config = pipeline_metrics(config_JSON)['nhs_app_jumpoff_all_dynamic']
+sink_path = metric_config['sink_path']
+sink_file = metric_config['sink_file']
+table_name = metric_config['sink_table']
 
 # COMMAND ----------
 
 # Ingestion of numerator data (NHS app performance data)
 # ---------------------------------------------------------------------------------------------------
 latestFolder = datalake_latestFolder(CONNECTION_STRING, file_system, source_path)
-file = datalake_download(CONNECTION_STRING, file_system, source_path+latestFolder, source_file)
-df = pd.read_parquet(io.BytesIO(file), engine="pyarrow")
-
-# COMMAND ----------
-
-
+#monthly clicks of the shared jump off rollup (see dbrks_rollup_functions), Period_End is the
+#month end, or the latest date in the data for the current month
+df = load_time_rollup(CONNECTION_STRING, file_system, config_JSON, ['month'])['month']
+df = df[['Period_End', 'OdsCode', 'Provider', 'JumpOff', 'Clicks']].dropna(subset = ['OdsCode', 'Provider', 'JumpOff'])
+df = df.astype({'Provider': 'category', 'JumpOff': 'category'})
 
 # COMMAND ----------
 
 #integrate legacy jumpoffs with 'Cie' in title
 # -------------------------------------------------------------------------------------------------
-df['JumpOff'] = df['JumpOff'].replace('Cie', '', regex=True)
-df['Clicks'] = df['Clicks'].astype('int')
-df = df.groupby(['Date', 'OdsCode','Provider','JumpOff'], as_index=False).sum()
+df['JumpOff'] = replace_categories(df['JumpOff'], 'Cie', '')
 
 # COMMAND ----------
 
 #rename things
 # -------------------------------------------------------------------------------------------------
 #change column name
-df = df.rename(columns = {'JumpOff':'Service'})
+df = df.rename(columns = {'Period_End': 'Date', 'JumpOff':'Service'})
 #convert from camelcaps to proper caps
-df['Service'] = df['Service'].apply(lambda x: re.sub(r"(\w)([A-Z])", r"\1 \2", x).capitalize())
+df['Service'] = camel_case_to_sentence(df['Service'])
 
 # COMMAND ----------
 
 #Processing
 # -------------------------------------------------------------------------------------------------
+#aggregate the merged legacy jump offs
+df = df.groupby(['Date', 'OdsCode', 'Provider', 'Service'], observed=True)['Clicks'].sum().reset_index()
 df['Clicks'] = df['Clicks'].astype(int)
-df['Date'] = pd.to_datetime(df['Date'], infer_datetime_format=True)
-max_date = df['Date'].max()
-#aggregate to monthly values
-df = df.groupby([pd.Grouper(freq='M', key='Date'),'OdsCode', 'Provider', 'Service']).sum().reset_index()
 df = df.rename(columns = {'OdsCode': 'Practice code'})
-df.loc[df['Date']==df['Date'].max(),'Date']= max_date
 df.index.name = "Unique ID"
 df_processed = df.copy()
 
@@ -16,7 +16,7 @@ USAGE:
 CONTRIBUTORS:   Chris Todd, Mattia Ficarelli
 CONTACT:        data@nhsx.nhs.uk
 CREATED:        23 Feb 2022
-VERSION:        0.0.1
+VERSION:        0.0.2
 """
 
 # COMMAND ----------
@@ -53,12 +53,19 @@ CONNECTION_STRING = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CON
 
 # COMMAND ----------
 
+# MAGIC %run /Shared/databricks/au-azure-databricks-cicd/functions/dbrks_date_functions
+
+# COMMAND ----------
+
+# MAGIC %run /Shared/databricks/au-azure-databricks-cicd/functions/dbrks_rollup_functions
+
+# COMMAND ----------
+
 #Download JSON config from Azure datalake
 file_path_config = "/config/pipelines/nhsx-au-analytics/"
 file_name_config = "config_nhs_app_dbrks.json"
 file_system_config = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
-config_JSON = datalake_download(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
-config_JSON = json.loads(io.BytesIO(config_JSON).read())
+config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
 
 # COMMAND ----------
 
@@ -68,17 +75,18 @@ source_path = config_JSON['pipeline']['project']['source_path']
 source_file = config_JSON['pipeline']['project']['source_file']
 reference_source_path = config_JSON['pipeline']['project']['reference_source_path']
 reference_source_file = config_JSON['pipeline']['project']['reference_source_file']
-sink_path = config_JSON['pipeline']['project']['databricks'][0]['sink_path']
-sink_file = config_JSON['pipeline']['project']['databricks'][0]['sink_file']
-table_name = config_JSON['pipeline']['staging'][0]['sink_table']
+metric_config = pipeline_metrics(config_JSON)['nhs_app_registered_population_week_prop']
+sink_path = metric_config['sink_path']
+sink_file = metric_config['sink_file']
+table_name = metric_config['sink_table']
 
 # COMMAND ----------
 
 # Ingestion of numerator data (NHS app performance data)
 # ---------------------------------------------------------------------------------------------------
 latestFolder = datalake_latestFolder(CONNECTION_STRING, file_system, source_path)
-file = datalake_download(CONNECTION_STRING, file_system, source_path+latestFolder, source_file)
-df = pd.read_parquet(io.BytesIO(file), engine="pyarrow")
+#weekly practice totals of the shared NHS App rollup (see dbrks_rollup_functions)
+df = load_time_rollup(CONNECTION_STRING, file_system, config_JSON, ['week'])['week']
 
 # Ingestion of reference deomintator data (ONS: age banded population data)
 # ---------------------------------------------------------------------------------------------------
@@ -93,11 +101,11 @@ df_ref = pd.read_parquet(io.BytesIO(file), engine="pyarrow")
 
 #Numerator
 # ---------------------------------------------------------------------------------------------------
-df['Date'] = pd.to_datetime(df['Date'], infer_datetime_format=True)  
-df.rename(columns = {'AcceptedTermsAndConditions':'users'}, inplace = True)
-df2 = df[['Date','users']].copy()
-df2['users'] = pd.to_numeric(df2['users'],errors='coerce').fillna(0)
-df2 = df2.groupby('Date').sum().resample('W').sum()
+df2 = df.groupby('Period_Start')['AcceptedTermsAndConditions'].sum().to_frame('users')
+#label weeks with their Sunday (as resample('W')), including weeks without data
+df2.index = df2.index + pd.Timedelta(days=6)
+df2 = df2.asfreq('W', fill_value=0)
+df2.index.name = 'Date'
 df2['total_users'] = df2['users'].cumsum() #--------- add cumulative sum column
 
 #Denominator porcessing
@@ -16,7 +16,7 @@ USAGE:
 CONTRIBUTORS:   Mattia Ficarelli
 CONTACT:        data@nhsx.nhs.uk
 CREATED:        12th May 2022
-VERSION:        0.0.1
+VERSION:        0.0.2
 """
 
 # COMMAND ----------
@@ -53,12 +53,23 @@ CONNECTION_STRING = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CON
 
 # COMMAND ----------
 
+# MAGIC %run /Shared/databricks/au-azure-databricks-cicd/functions/dbrks_date_functions
+
+# COMMAND ----------
+
+# MAGIC %run /Shared/databricks/au-azure-databricks-cicd/functions/dbrks_rollup_functions
+
+# COMMAND ----------
+
+# MAGIC %run /Shared/databricks/au-azure-databricks-cicd/functions/dbrks_delta_functions
+
+# COMMAND ----------
+
 #Download JSON config from Azure datalake
 file_path_config = "/config/pipelines/nhsx-au-analytics/"
 file_name_config = "config_nhs_app_dbrks.json"
 file_system_config = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
-config_JSON = datalake_download(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
-config_JSON = json.loads(io.BytesIO(config_JSON).read())
+config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
 
 # COMMAND ----------
 
@@ -66,26 +77,26 @@ config_JSON = json.loads(io.BytesIO(config_JSON).read())
 file_system = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
 source_path = config_JSON['pipeline']['project']['source_path']
 source_file = config_JSON['pipeline']['project']['source_file']
-sink_path = config_JSON['pipeline']['project']['databricks'][2]['sink_path']
-sink_file = config_JSON['pipeline']['project']['databricks'][2]['sink_file']
-table_name = config_JSON['pipeline']['staging'][2]['sink_table']
+metric_config = pipeline_metrics(config_JSON)['nhs_app_uptake_registrations_day_count']
+sink_path = metric_config['sink_path']
+sink_file = metric_config['sink_file']
+delta_config = metric_config.get('delta')
+table_name = metric_config['sink_table']
 
 # COMMAND ----------
 
 # Ingestion of numerator data (NHS app performance data)
 # ---------------------------------------------------------------------------------------------------
 latestFolder = datalake_latestFolder(CONNECTION_STRING, file_system, source_path)
-file = datalake_download(CONNECTION_STRING, file_system, source_path+latestFolder, source_file)
-df = pd.read_parquet(io.BytesIO(file), engine="pyarrow")
+#daily practice totals of the shared NHS App rollup (see dbrks_rollup_functions)
+df = load_time_rollup(CONNECTION_STRING, file_system, config_JSON, ['day'])['day']
 
 # COMMAND ----------
 
 #Processing
 # ---------------------------------------------------------------------------------------------------
-df1 = df[["Date", "OdsCode", "AcceptedTermsAndConditions"]].copy()
-df1['Date'] = pd.to_datetime(df1['Date'], infer_datetime_format=True)
-df1['AcceptedTermsAndConditions'] = pd.to_numeric(df1['AcceptedTermsAndConditions'],errors='coerce').fillna(0)
-df2 = df1.groupby(['Date','OdsCode']).sum().reset_index()
+df2 = df[["Period_Start", "OdsCode", "AcceptedTermsAndConditions"]].dropna(subset = ['OdsCode'])
+df2 = df2.rename(columns = {'Period_Start': 'Date'}).reset_index(drop = True)
 df3 = df2.rename(columns = {'OdsCode': 'Practice code', 'AcceptedTermsAndConditions': 'Number of NHS app registrations'})
 df3.index.name = "Unique ID"
 df_processed = df3.copy()
@@ -99,6 +110,12 @@ datalake_upload(file_contents, CONNECTION_STRING, file_system, sink_path+latestF
 
 # COMMAND ----------
 
+#Merge processed data into the Delta copy of the output, when the config has one (see dbrks_delta_functions)
+if delta_config is not None:
+  write_delta_table(df_processed, CONNECTION_STRING, file_system, delta_config)
+
+# COMMAND ----------
+
 # Write data from databricks to dev SQL database
 # -------------------------------------------------------------------------
 write_to_sql(df_processed, table_name, "overwrite")
@@ -16,7 +16,7 @@ USAGE:
 CONTRIBUTORS:   Craig Shenton, Mattia Ficarelli, Kabir Khan
 CONTACT:        data@nhsx.nhs.uk
 CREATED:        23 Aug 2022
-VERSION:        0.0.2
+VERSION:        0.0.3
 """
 
 # COMMAND ----------
@@ -53,13 +53,16 @@ CONNECTION_STRING = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CON
 
 # COMMAND ----------
 
+# MAGIC %run /Shared/databricks/au-azure-databricks-cicd/functions/dbrks_pomi_functions
+
+# COMMAND ----------
+
 # Load JSON config from Azure datalake
 # -------------------------------------------------------------------------
 file_path_config = "/config/pipelines/nhsx-au-analytics/"
 file_name_config = "config_pomi_dbrks.json"
 file_system_config = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
-config_JSON = datalake_download(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
-config_JSON = json.loads(io.BytesIO(config_JSON).read())
+config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
 
 # COMMAND ----------
 
@@ -68,26 +71,20 @@ config_JSON = json.loads(io.BytesIO(config_JSON).read())
 source_path = config_JSON['pipeline']['project']['source_path']
 source_file = config_JSON['pipeline']['project']['source_file']
 file_system = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
-sink_path = config_JSON['pipeline']['project']['databricks'][1]['sink_path']
-sink_file = config_JSON['pipeline']['project']['databricks'][1]['sink_file']  
-table_name = config_JSON['pipeline']['staging'][1]['sink_table']
+metric_config = pipeline_metrics(config_JSON)['pomi_appointments_month_count']
+sink_path = metric_config['sink_path']
+sink_file = metric_config['sink_file']  
+table_name = metric_config['sink_table']
 
 # COMMAND ----------
 
 # Processing
 # -------------------------------------------------------------------------
 latestFolder = datalake_latestFolder(CONNECTION_STRING, file_system, source_path)
-file = datalake_download(CONNECTION_STRING, file_system, source_path+latestFolder, source_file)
-df = pd.read_parquet(io.BytesIO(file), engine="pyarrow")
-df = df[df["Field"] == "Pat_Appts_Use"]
-df1 = df.groupby(["Report_Period_End", "Field"])
-df2 = df1["Value"].aggregate(np.sum)
-df2 = df2.reset_index()
-df2["Report_Period_End"] = df2["Report_Period_End"].astype("datetime64[ns]")
-df2 = df2.sort_values("Report_Period_End")
-df2 = df2.reset_index(drop=True)
+#national period totals of the shared POMI cube (see dbrks_pomi_functions)
+df_totals = pomi_load_period_totals(CONNECTION_STRING, file_system, config_JSON)
+df2 = pomi_select_totals(df_totals, "Pat_Appts_Use")
 df2["pandas_SMA_3"] = df2["Value"].rolling(window=3).mean()
-df2 = df2.drop(columns="Field")
 df2.rename(columns={
   "Value": "Number of GP appointments managed online",
   "pandas_SMA_3": "3 month rolling average",
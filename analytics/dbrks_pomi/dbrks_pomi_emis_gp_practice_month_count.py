@@ -16,7 +16,7 @@ USAGE:
 CONTRIBUTORS:   Craig Shenton, Mattia Ficarelli, Kabir Khan
 CONTACT:        data@nhsx.nhs.uk
 CREATED:        23 Aug 2022
-VERSION:        0.0.2
+VERSION:        0.0.3
 """
 
 # COMMAND ----------
@@ -52,12 +52,15 @@ CONNECTION_STRING = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CON
 
 # COMMAND ----------
 
+# MAGIC %run /Shared/databricks/au-azure-databricks-cicd/functions/dbrks_pomi_functions
+
+# COMMAND ----------
+
 #Download JSON config from Azure datalake
 file_path_config = "/config/pipelines/nhsx-au-analytics/"
 file_name_config = "config_pomi_dbrks.json"
 file_system_config = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
-config_JSON = datalake_download(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
-config_JSON = json.loads(io.BytesIO(config_JSON).read())
+config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
 
 # COMMAND ----------
 
@@ -65,35 +68,27 @@ config_JSON = json.loads(io.BytesIO(config_JSON).read())
 source_path = config_JSON['pipeline']['project']['source_path']
 source_file = config_JSON['pipeline']['project']['source_file']
 file_system = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
-sink_path = config_JSON['pipeline']['project']['databricks'][8]['sink_path']
-sink_file = config_JSON['pipeline']['project']['databricks'][8]['sink_file']  
-table_name = config_JSON['pipeline']['staging'][8]['sink_table']
+metric_config = pipeline_metrics(config_JSON)['pomi_emis_gp_practice_month_count']
+sink_path = metric_config['sink_path']
+sink_file = metric_config['sink_file']  
+table_name = metric_config['sink_table']
 
 # COMMAND ----------
 
 #Processing
 latestFolder = datalake_latestFolder(CONNECTION_STRING, file_system, source_path)
-file = datalake_download(CONNECTION_STRING, file_system, source_path+latestFolder, source_file)
-df = pd.read_parquet(io.BytesIO(file), engine="pyarrow")
-df1 = df.groupby(["Report_Period_End", "Practice_Code", "System_Supplier"]).count().reset_index()
-df2 = df1[["Report_Period_End","Practice_Code", "System_Supplier"]]
-df2['System_Supplier_bool'] = df2['System_Supplier'].str.contains("EMIS")
-def emis_gp_practice(c):
-  if c['System_Supplier_bool'] == True:
-    return 1
-  else:
-    return 0
-df2['EMIS GP Practices'] = df2.apply(emis_gp_practice, axis=1)
-df3 = df2.sort_values("Report_Period_End")
-df4 = df3.reset_index(drop = True)
-df5 = df4.drop(columns={"System_Supplier", 
-                         "System_Supplier_bool"})
-df5.rename(columns={
+#practice and supplier rows of the shared POMI cube (see dbrks_pomi_functions)
+df_cube = pomi_load_cube(CONNECTION_STRING, file_system, config_JSON)
+df = df_cube[(df_cube["Field_Row"] == 0) & df_cube["Practice_Code"].notna() & df_cube["System_Supplier"].notna()]
+df = df[["Report_Period_End", "Practice_Code", "System_Supplier"]].reset_index(drop = True)
+df['EMIS GP Practices'] = df['System_Supplier'].str.contains("EMIS").astype(int)
+df = df.drop(columns=["System_Supplier"])
+df.rename(columns={
     "Report_Period_End": "Date",
     "Practice_Code": "Practice code"},
      inplace=True)
-df5.index.name = "Unique ID"
-df_processed = df5.copy()
+df.index.name = "Unique ID"
+df_processed = df.copy()
 
 # COMMAND ----------
 
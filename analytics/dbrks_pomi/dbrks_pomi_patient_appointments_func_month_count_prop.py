@@ -16,7 +16,7 @@ USAGE:
 CONTRIBUTORS:   Craig Shenton, Mattia Ficarelli, Kabir Khan
 CONTACT:        data@nhsx.nhs.uk
 CREATED:        23 Aug 2022
-VERSION:        0.0.2
+VERSION:        0.0.3
 """
 
 # COMMAND ----------
@@ -53,12 +53,15 @@ CONNECTION_STRING = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CON
 
 # COMMAND ----------
 
+# MAGIC %run /Shared/databricks/au-azure-databricks-cicd/functions/dbrks_pomi_functions
+
+# COMMAND ----------
+
 #Download JSON config from Azure datalake
 file_path_config = "/config/pipelines/nhsx-au-analytics/"
 file_name_config = "config_pomi_dbrks.json"
 file_system_config = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
-config_JSON = datalake_download(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
-config_JSON = json.loads(io.BytesIO(config_JSON).read())
+config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
 
 # COMMAND ----------
 
@@ -66,22 +69,19 @@ config_JSON = json.loads(io.BytesIO(config_JSON).read())
 source_path = config_JSON['pipeline']['project']['source_path']
 source_file = config_JSON['pipeline']['project']['source_file']
 file_system = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
-sink_path = config_JSON['pipeline']['project']['databricks'][12]['sink_path']
-sink_file = config_JSON['pipeline']['project']['databricks'][12]['sink_file'] 
-table_name = config_JSON['pipeline']['staging'][12]['sink_table']
+metric_config = pipeline_metrics(config_JSON)['pomi_patient_appointments_func_month_count_prop']
+sink_path = metric_config['sink_path']
+sink_file = metric_config['sink_file'] 
+table_name = metric_config['sink_table']
 
 # COMMAND ----------
 
 #Processing
 latestFolder = datalake_latestFolder(CONNECTION_STRING, file_system, source_path)
-file = datalake_download(CONNECTION_STRING, file_system, source_path+latestFolder, source_file)
-df = pd.read_parquet(io.BytesIO(file), engine="pyarrow")
-df1 = df[['Report_Period_End', 'Practice_Code', 'Field', 'Value']]
-df_num = df1[df1["Field"] == "Pat_Appts_Enbld"]
-df_num_1 = df_num.rename(columns = {'Value': 'Number of patients registered for appointment functionality'}).drop(columns = ['Field']).reset_index(drop = True)
-df_denom = df1[df1["Field"] == "patient_list_size"]
-df_denom_1 = df_denom.rename(columns = {'Value': 'Number of registered patients'}).drop(columns = ['Field']).reset_index(drop = True)
-df_join = pd.merge(df_num_1, df_denom_1,  how='left', left_on=['Report_Period_End','Practice_Code'], right_on = ['Report_Period_End','Practice_Code'])
+#practice level Field columns of the shared POMI cube (see dbrks_pomi_functions)
+df_cube = pomi_load_cube(CONNECTION_STRING, file_system, config_JSON)
+df_join = pomi_select_practices(df_cube, ["Pat_Appts_Enbld", "patient_list_size"])
+df_join = df_join.rename(columns = {"Pat_Appts_Enbld": 'Number of patients registered for appointment functionality', "patient_list_size": 'Number of registered patients'})
 df_join["Percent of patients registered for appointment functionality"] = df_join["Number of patients registered for appointment functionality"]/df_join["Number of registered patients"]
 df_join.rename(columns={"Report_Period_End": "Date", "Practice_Code": "Practice code"}, inplace=True)
 df_join_1 = df_join[~(df_join['Percent of patients registered for appointment functionality'] > 1)].reset_index(drop = True)
@@ -16,7 +16,7 @@ USAGE:
 CONTRIBUTORS:   Craig Shenton, Mattia Ficarelli, Kabir Khan
 CONTACT:        data@nhsx.nhs.uk
 CREATED:        23 Aug 2022
-VERSION:        0.0.2
+VERSION:        0.0.3
 """
 
 # COMMAND ----------
@@ -53,12 +53,15 @@ CONNECTION_STRING = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CON
 
 # COMMAND ----------
 
+# MAGIC %run /Shared/databricks/au-azure-databricks-cicd/functions/dbrks_pomi_functions
+
+# COMMAND ----------
+
 #Download JSON config from Azure datalake
 file_path_config = "/config/pipelines/nhsx-au-analytics/"
 file_name_config = "config_pomi_dbrks.json"
 file_system_config = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
-config_JSON = datalake_download(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
-config_JSON = json.loads(io.BytesIO(config_JSON).read())
+config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
 
 # COMMAND ----------
 
@@ -66,32 +69,20 @@ config_JSON = json.loads(io.BytesIO(config_JSON).read())
 source_path = config_JSON['pipeline']['project']['source_path']
 source_file = config_JSON['pipeline']['project']['source_file']
 file_system = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
-sink_path = config_JSON['pipeline']['project']['databricks'][0]['sink_path']
-sink_file = config_JSON['pipeline']['project']['databricks'][0]['sink_file']
-table_name = config_JSON['pipeline']['staging'][0]['sink_table']
+metric_config = pipeline_metrics(config_JSON)['pomi_patient_enabled_month_prop']
+sink_path = metric_config['sink_path']
+sink_file = metric_config['sink_file']
+table_name = metric_config['sink_table']
 
 # COMMAND ----------
 
 #Processing
 latestFolder = datalake_latestFolder(CONNECTION_STRING, file_system, source_path)
-file = datalake_download(CONNECTION_STRING, file_system, source_path+latestFolder, source_file)
-df = pd.read_parquet(io.BytesIO(file), engine="pyarrow")
-df4 = df[df["Field"] == "Pat_Appts_Enbld"]
-df5 = df[df["Field"] == "patient_list_size"]
-df4 = df4.groupby(["Report_Period_End", "Field"])
-df6 = df4["Value"].aggregate(np.sum)
-df6 = df6.reset_index()
-df6["Report_Period_End"] = df6["Report_Period_End"].astype("datetime64[ns]")
-df6 = df6.sort_values("Report_Period_End")
-df6 = df6.reset_index(drop=True)
-df5 = df5.groupby(["Report_Period_End", "Field"])
-df7 = df5["Value"].aggregate(np.sum)
-df7 = df7.reset_index()
-df7["Report_Period_End"] = df7["Report_Period_End"].astype("datetime64[ns]")
-df7 = df7.sort_values("Report_Period_End")
-df7 = df7.reset_index(drop=True)
+#national period totals of the shared POMI cube (see dbrks_pomi_functions)
+df_totals = pomi_load_period_totals(CONNECTION_STRING, file_system, config_JSON)
+df6 = pomi_select_totals(df_totals, "Pat_Appts_Enbld")
+df7 = pomi_select_totals(df_totals, "patient_list_size")
 df8 = pd.merge(df6, df7, on="Report_Period_End", how="outer")
-df8 = df8.drop(columns=["Field_x", "Field_y"])
 df8["Percent of patients enabled to manage appointments online"] = (df8["Value_x"] / df8["Value_y"])
 df8.rename(columns={
           "Report_Period_End": "Date",
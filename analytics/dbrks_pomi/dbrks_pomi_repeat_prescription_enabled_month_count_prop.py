@@ -16,7 +16,7 @@ USAGE:
 CONTRIBUTORS:   Craig Shenton, Mattia Ficarelli, Kabir Khan
 CONTACT:        data@nhsx.nhs.uk
 CREATED:        23 Aug 2022
-VERSION:        0.0.2
+VERSION:        0.0.3
 """
 
 # COMMAND ----------
@@ -52,12 +52,15 @@ CONNECTION_STRING = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CON
 
 # COMMAND ----------
 
+# MAGIC %run /Shared/databricks/au-azure-databricks-cicd/functions/dbrks_pomi_functions
+
+# COMMAND ----------
+
 #Download JSON config from Azure datalake
 file_path_config = "/config/pipelines/nhsx-au-analytics/"
 file_name_config = "config_pomi_dbrks.json"
 file_system_config = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
-config_JSON = datalake_download(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
-config_JSON = json.loads(io.BytesIO(config_JSON).read())
+config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
 
 # COMMAND ----------
 
@@ -65,44 +68,26 @@ config_JSON = json.loads(io.BytesIO(config_JSON).read())
 source_path = config_JSON['pipeline']['project']['source_path']
 source_file = config_JSON['pipeline']['project']['source_file']
 file_system = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
-sink_path = config_JSON['pipeline']['project']['databricks'][3]['sink_path']
-sink_file = config_JSON['pipeline']['project']['databricks'][3]['sink_file']
-table_name = config_JSON['pipeline']['staging'][3]['sink_table']
+metric_config = pipeline_metrics(config_JSON)['pomi_repeat_prescription_enabled_month_count_prop']
+sink_path = metric_config['sink_path']
+sink_file = metric_config['sink_file']
+table_name = metric_config['sink_table']
 
 # COMMAND ----------
 
 #Processing
 latestFolder = datalake_latestFolder(CONNECTION_STRING, file_system, source_path)
-file = datalake_download(CONNECTION_STRING, file_system, source_path+latestFolder, source_file)
-df = pd.read_parquet(io.BytesIO(file), engine="pyarrow")
-df = df[df["Field"] == "Sys_Presc_Enbld"]
-df['Value'] = df['Value'].fillna(0).astype(int)
-def prescription_enabled(c):
-  if c['Value'] == 2:
-    return 1
-  else:
-    return 0
-df['GP practice repeat prescription functionality enabled'] = df.apply(prescription_enabled, axis=1)
-df["Report_Period_End"] = df["Report_Period_End"].astype("datetime64[ns]")
-df1 = df.sort_values("Report_Period_End")
-df2 = df1.reset_index(drop = True)
-df2 = df2.drop(columns={"Field", 
-                        "Region_Code", 
-                        "Value",
-                        "CCG_Code", 
-                         "Subregion_Code", 
-                         "System_Supplier", 
-                         "Effective_Snapshot_Date", 
-                         "DataSourceFileForThisSnapshot_Version", 
-                         "Report_Period_Length", 
-                         "Unique_ID", 
-                         "AuditKey"})
-df2.rename(columns={
+#practice level Field columns of the shared POMI cube (see dbrks_pomi_functions)
+df_cube = pomi_load_cube(CONNECTION_STRING, file_system, config_JSON)
+df = pomi_select_practices(df_cube, ["Sys_Presc_Enbld"])
+df['GP practice repeat prescription functionality enabled'] = (df["Sys_Presc_Enbld"].fillna(0).astype(int) == 2).astype(int)
+df = df.drop(columns=["Sys_Presc_Enbld"])
+df.rename(columns={
     "Report_Period_End": "Date",
     "Practice_Code": "Practice code"},
      inplace=True)
-df2.index.name = "Unique ID"
-df_processed = df2.copy()
+df.index.name = "Unique ID"
+df_processed = df.copy()
 
 # COMMAND ----------
 
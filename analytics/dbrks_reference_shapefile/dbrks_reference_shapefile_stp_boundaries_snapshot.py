@@ -68,18 +68,18 @@ CONNECTION_STRING = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CON
 file_path_config = "/config/pipelines/reference_tables/"
 file_name_config = "config_shapefiles.json"
 file_system_config = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
-config_JSON = datalake_download(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
-config_JSON = json.loads(io.BytesIO(config_JSON).read())
+config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
 
 # COMMAND ----------
 
 # Read parameters from JSON config
 # -------------------------------------------------------------------------
 file_system = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
-shapefile_source_path = config_JSON['pipeline']['project'][1]['shapefile_source_path']
-shapefile_source_file = config_JSON['pipeline']['project'][1]['shapefile_source_file']
-shapefile_sink_path = config_JSON['pipeline']['project'][1]['shapefile_sink_path']
-shapefile_sink_file = config_JSON['pipeline']['project'][1]['shapefile_sink_file']
+metric_config = pipeline_metrics(config_JSON)['shapefile_stp_boundaries_snapshot']
+shapefile_source_path = metric_config['shapefile_source_path']
+shapefile_source_file = metric_config['shapefile_source_file']
+shapefile_sink_path = metric_config['shapefile_sink_path']
+shapefile_sink_file = metric_config['shapefile_sink_file']
 
 # COMMAND ----------
 
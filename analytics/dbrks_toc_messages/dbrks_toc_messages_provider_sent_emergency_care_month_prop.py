@@ -15,7 +15,7 @@ DESCRIPTION:    Databricks notebook with processing code for the NHSX Analytics
 CONTRIBUTORS:   Mattia Ficarelli
 CONTACT:        data@nhsx.nhs.uk
 CREATED:        23 Aug. 2022
-VERSION:        0.0.3
+VERSION:        0.0.4
 """
 
 # COMMAND ----------
@@ -52,13 +52,20 @@ CONNECTION_STRING = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CON
 
 # COMMAND ----------
 
+# MAGIC %run /Shared/databricks/au-azure-databricks-cicd/functions/dbrks_date_functions
+
+# COMMAND ----------
+
+# MAGIC %run /Shared/databricks/au-azure-databricks-cicd/functions/dbrks_rollup_functions
+
+# COMMAND ----------
+
 # Load JSON config from Azure datalake
 # -------------------------------------------------------------------------
 file_path_config = "/config/pipelines/nhsx-au-analytics/"
 file_name_config = "config_toc_messages_dbrks.json"
 file_system_config = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
-config_JSON = datalake_download(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
-config_JSON = json.loads(io.BytesIO(config_JSON).read())
+config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
 
 # COMMAND ----------
 
@@ -68,9 +75,10 @@ source_path = config_JSON['pipeline']['project']['source_path']
 source_file = config_JSON['pipeline']['project']['source_file']
 denominator_source_path = config_JSON['pipeline']['project']['M30C_denominator_source_path']
 denominator_source_file = config_JSON['pipeline']['project']['M30C_denominator_source_file']
-sink_path = config_JSON['pipeline']['project']['databricks'][4]['sink_path']
-sink_file = config_JSON['pipeline']['project']['databricks'][4]['sink_file']
-table_name = config_JSON['pipeline']["staging"][4]['sink_table']
+metric_config = pipeline_metrics(config_JSON)['toc_messages_provider_sent_emergency_care_month_prop']
+sink_path = metric_config['sink_path']
+sink_file = metric_config['sink_file']
+table_name = metric_config['sink_table']
 
 # COMMAND ----------
 
@@ -78,13 +86,12 @@ table_name = config_JSON['pipeline']["staging"][4]['sink_table']
 #------------------------------------------
 #Numerator data ingestion and processing
 latestFolder = datalake_latestFolder(CONNECTION_STRING, file_system, source_path)
-file = datalake_download(CONNECTION_STRING, file_system, source_path+latestFolder, source_file)
-df = pd.read_parquet(io.BytesIO(file), engine="pyarrow")
-df1 = df[['_time', 'workflow','recipientOdsCode']]
+#daily message counts of the shared ToC rollup (see dbrks_rollup_functions)
+df = load_time_rollup(CONNECTION_STRING, file_system, config_JSON, ['day'])['day']
+df1 = df[['Period_Start', 'workflow','recipientOdsCode', 'Count']].copy()
 df1 = df1[df1['workflow'].str.contains('TOC_FHIR_EC_DISCH_ACK')].reset_index(drop = True)
-df1['Count'] = 1
-df1['_time'] = pd.to_datetime(df1['_time']).dt.strftime("%Y-%m-%d")
-df2 = df1.groupby(['_time', 'workflow', 'recipientOdsCode']).sum().reset_index()
+df1['_time'] = df1['Period_Start'].dt.strftime("%Y-%m-%d")
+df2 = df1.groupby(['_time', 'workflow', 'recipientOdsCode'])['Count'].sum().reset_index()
 df2['Count'] = df2['Count'].div(2).apply(np.floor)
 df3 = df2.set_index(['_time','recipientOdsCode','workflow']).unstack()['Count'].reset_index().fillna(0)
 df4 = df3.rename(columns = {"TOC_FHIR_EC_DISCH_ACK": "Number of successful FHIR ToC emergency care discharge messages" })
@@ -0,0 +1,106 @@
+# Databricks notebook source
+#!/usr/bin python3
+
+# -------------------------------------------------------------------------
+# Copyright (c) 2021 NHS England and NHS Improvement. All rights reserved.
+# Licensed under the MIT License. See license.txt in the project root for
+# license information.
+# -------------------------------------------------------------------------
+
+"""
+FILE:           dbrks_benchmark_dataframe_accumulation.py
+DESCRIPTION:
+                Debug notebook comparing the old grow-by-append pattern used in the ingestion
+                loops (one full copy of the accumulated frame per chunk) with the
+                DataFrameAccumulator helper (collect chunks, concatenate once)
+USAGE:
+                Run interactively on a cluster, no datalake access is required
+CONTRIBUTORS:   Data Engineering Team
+CONTACT:        data@nhsx.nhs.uk
+CREATED:        19 Oct. 2026
+VERSION:        0.0.1
+"""
+
+# COMMAND ----------
+
+# Install libs
+# -------------------------------------------------------------------------
+%pip install pandas numpy pyarrow==5.0.*
+
+# COMMAND ----------
+
+# Imports
+# -------------------------------------------------------------------------
+# Python:
+import time
+
+# 3rd party:
+import pandas as pd
+import numpy as np
+
+# COMMAND ----------
+
+# MAGIC %run /Shared/databricks/au-azure-databricks-cicd/functions/dbrks_helper_functions
+
+# COMMAND ----------
+
+# Benchmark parameters
+# -------------------------------------------------------------------------
+# ShCR receives one workbook per ICB (42) with six organisation sheets, the open repos
+# ingestion pages through ~1,000 repositories per org, so chunk counts up to a few
+# thousand cover the realistic range.
+chunk_counts = [42, 252, 1000, 4000]
+rows_per_chunk = 200
+repeats = 3
+
+def make_chunk(seed):
+  rng = np.random.default_rng(seed)
+  return pd.DataFrame({
+    'For Month': pd.Timestamp('2023-01-01'),
+    'ODS Code': rng.integers(0, 10000, rows_per_chunk).astype(str),
+    'Name': 'Organisation ' + pd.Series(rng.integers(0, 500, rows_per_chunk)).astype(str),
+    'Connected': rng.integers(0, 2, rows_per_chunk),
+    'Views': rng.random(rows_per_chunk) * 1000,
+  })
+
+def grow_by_append(chunks):
+  # equivalent of the removed DataFrame.append, which concatenated a copy on every call
+  df = pd.DataFrame()
+  for chunk in chunks:
+    df = pd.concat([df, chunk], ignore_index=True)
+  return df
+
+def collect_once(chunks):
+  accumulator = DataFrameAccumulator()
+  for chunk in chunks:
+    accumulator.add(chunk)
+  return accumulator.collect(ignore_index=True)
+
+def best_time(func, chunks):
+  timings = []
+  for _ in range(repeats):
+    start = time.perf_counter()
+    func(chunks)
+    timings.append(time.perf_counter() - start)
+  return min(timings)
+
+# COMMAND ----------
+
+# Run benchmark
+# -------------------------------------------------------------------------
+results = []
+for n_chunks in chunk_counts:
+  chunks = [make_chunk(seed) for seed in range(n_chunks)]
+  assert grow_by_append(chunks).equals(collect_once(chunks))
+  append_seconds = best_time(grow_by_append, chunks)
+  collect_seconds = best_time(collect_once, chunks)
+  results.append({
+    'chunks': n_chunks,
+    'rows': n_chunks * rows_per_chunk,
+    'append_seconds': round(append_seconds, 4),
+    'collect_seconds': round(collect_seconds, 4),
+    'speed_up': round(append_seconds / collect_seconds, 1),
+  })
+
+df_results = pd.DataFrame(results)
+display(df_results)
@@ -0,0 +1,120 @@
+# Databricks notebook source
+#!/usr/bin python3
+
+# -------------------------------------------------------------------------
+# Copyright (c) 2021 NHS England and NHS Improvement. All rights reserved.
+# Licensed under the MIT License. See license.txt in the project root for
+# license information.
+# -------------------------------------------------------------------------
+
+"""
+FILE:           dbrks_datalake_transfer_benchmark.py
+DESCRIPTION:
+                Times the Data Lake round trip of the largest historical parquet files: the
+                single request download read through io.BytesIO and the getvalue upload the
+                helpers used before, against datalake_read_parquet (parallel range requests
+                to a memory mapped local file) and the chunked in place datalake_upload.
+                Reports seconds and the peak Python memory (tracemalloc) of each
+USAGE:
+                Run interactively on a cluster, the uploads are written under scratch_path
+CONTRIBUTORS:   Data Engineering Team
+CONTACT:        data@nhsx.nhs.uk
+CREATED:        19 Oct. 2026
+VERSION:        0.0.1
+"""
+
+# COMMAND ----------
+
+# Install libs
+# -------------------------------------------------------------------------
+%pip install geojson==2.5.* tabulate requests pandas pathlib azure-storage-file-datalake beautifulsoup4 numpy urllib3 lxml regex pyarrow==5.0.*
+
+# COMMAND ----------
+
+# Imports
+# -------------------------------------------------------------------------
+# Python:
+import io
+import time
+import tracemalloc
+
+# 3rd party:
+import pandas as pd
+
+# Connect to Azure datalake
+# -------------------------------------------------------------------------
+# !env from databricks secrets
+CONNECTION_STRING = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONNECTION_STRING")
+
+# COMMAND ----------
+
+# MAGIC %run /Shared/databricks/au-azure-databricks-cicd/functions/dbrks_helper_functions
+
+# COMMAND ----------
+
+# Parameters
+# -------------------------------------------------------------------------
+# the project source files of these configs are the largest historical parquet files
+file_path_config = "/config/pipelines/nhsx-au-analytics/"
+file_names_config = ["config_nhs_app_dbrks.json", "config_nhs_app_jumpoff_dbrks.json", "config_pomi_dbrks.json", "config_dscr_dbrks.json"]
+file_system = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
+scratch_path = "proc/benchmark/datalake_transfer/"
+repeats = 3
+
+# COMMAND ----------
+
+# Transfers before and after
+# -------------------------------------------------------------------------
+def file_client(source_path, source_file):
+  file_system_client = datalake_service_client(CONNECTION_STRING).get_file_system_client(file_system=file_system)
+  return file_system_client.get_directory_client(source_path).get_file_client(source_file)
+
+def download_before(source_path, source_file):
+  file = file_client(source_path, source_file).download_file().readall()
+  return pd.read_parquet(io.BytesIO(file), engine="pyarrow")
+
+def upload_before(df, sink_file):
+  file_contents = io.BytesIO()
+  df.to_parquet(file_contents, engine="pyarrow")
+  directory_client = datalake_service_client(CONNECTION_STRING).get_file_system_client(file_system=file_system).get_directory_client(scratch_path)
+  directory_client.create_file(sink_file).upload_data(file_contents.getvalue(), length=file_contents.tell(), overwrite=True)
+
+def download_after(source_path, source_file):
+  return datalake_read_parquet(CONNECTION_STRING, file_system, source_path, source_file)
+
+def upload_after(df, sink_file):
+  file_contents = io.BytesIO()
+  df.to_parquet(file_contents, engine="pyarrow")
+  datalake_upload(file_contents, CONNECTION_STRING, file_system, scratch_path, sink_file)
+
+def measure(func, *args):
+  tracemalloc.start()
+  start = time.perf_counter()
+  result = func(*args)
+  seconds = time.perf_counter() - start
+  peak = tracemalloc.get_traced_memory()[1]
+  tracemalloc.stop()
+  return result, seconds, peak
+
+methods = {'before': (download_before, upload_before), 'after': (download_after, upload_after)}
+results = []
+for file_name_config in file_names_config:
+  config_JSON = load_pipeline_config(CONNECTION_STRING, file_system, file_path_config, file_name_config)
+  source_path = config_JSON['pipeline']['project']['source_path']
+  source_file = config_JSON['pipeline']['project']['source_file']
+  latestFolder = datalake_latestFolder(CONNECTION_STRING, file_system, source_path)
+  if latestFolder is None:
+    print("No source file for " + file_name_config)
+    continue
+  size = file_client(source_path + latestFolder, source_file).get_file_properties().size
+  for repeat in range(repeats):
+    for method, (download, upload) in methods.items():
+      df, download_seconds, download_peak = measure(download, source_path + latestFolder, source_file)
+      _, upload_seconds, upload_peak = measure(upload, df, method + "_" + source_file)
+      results.append({'file': source_file, 'size_mb': size / 2**20, 'method': method,
+                      'download_seconds': download_seconds, 'download_peak_mb': download_peak / 2**20,
+                      'upload_seconds': upload_seconds, 'upload_peak_mb': upload_peak / 2**20})
+      del df
+
+df_results = pd.DataFrame(results).groupby(['file', 'size_mb', 'method'], sort=False).median().reset_index()
+display(df_results)
@@ -0,0 +1,94 @@
+# Databricks notebook source
+#!/usr/bin python3
+
+# -------------------------------------------------------------------------
+# Copyright (c) 2021 NHS England and NHS Improvement. All rights reserved.
+# Licensed under the MIT License. See license.txt in the project root for
+# license information.
+# -------------------------------------------------------------------------
+
+"""
+FILE:           dbrks_migrate_typed_historical_parquet.py
+DESCRIPTION:
+                One-off notebook rewriting the latest historical parquet files that were
+                stored with astype(str) using the typed schema in their pipeline config
+                ('raw' -> 'appended_schema'). The ingestion notebooks write typed files from
+                their next run onwards, this notebook migrates them all at once.
+USAGE:
+                Run interactively on a cluster, set dry_run to False to upload
+CONTRIBUTORS:   Data Engineering Team
+CONTACT:        data@nhsx.nhs.uk
+CREATED:        19 Oct. 2026
+VERSION:        0.0.1
+"""
+
+# COMMAND ----------
+
+# Install libs
+# ------------------------------------------------------------------------------------
+%pip install pandas pathlib azure-storage-file-datalake numpy pyarrow==5.0.*
+
+# COMMAND ----------
+
+# Imports
+# -------------------------------------------------------------------------
+# Python:
+import io
+from datetime import datetime
+import json
+
+# 3rd party:
+import pandas as pd
+import numpy as np
+from azure.storage.filedatalake import DataLakeServiceClient
+
+# Connect to Azure datalake
+# -------------------------------------------------------------------------
+# !env from databricks secrets
+CONNECTION_STRING = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONNECTION_STRING")
+
+# COMMAND ----------
+
+# MAGIC %run /Shared/databricks/au-azure-databricks-cicd/functions/dbrks_helper_functions
+
+# COMMAND ----------
+
+# Pipelines to migrate
+# -------------------------------------------------------------------------
+file_path_config = "/config/pipelines/nhsx-au-analytics/"
+file_name_configs = ["config_nhs_app_dbrks.json",
+                     "config_nhs_app_jumpoff_dbrks.json",
+                     "config_nhs_app_device_dbrks.json",
+                     "config_nhs_app_monthly_device_dbrks.json",
+                     "config_dspt_gp_practices_historical_dbrks.json"]
+file_system = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
+dry_run = True
+
+# COMMAND ----------
+
+# Rewrite the latest historical file of each pipeline
+# -------------------------------------------------------------------------
+current_date_path = datetime.now().strftime('%Y-%m-%d') + '/'
+results = []
+for file_name_config in file_name_configs:
+  config_JSON = load_pipeline_config(CONNECTION_STRING, file_system, file_path_config, file_name_config)
+  historical_source_path = config_JSON['pipeline']['raw']['appended_path']
+  historical_source_file = config_JSON['pipeline']['raw']['appended_file']
+  historical_schema = config_JSON['pipeline']['raw']['appended_schema']
+
+  latestFolder = datalake_latestFolder(CONNECTION_STRING, file_system, historical_source_path)
+  historical_dataset = datalake_download(CONNECTION_STRING, file_system, historical_source_path+latestFolder, historical_source_file)
+  historical_dataframe = pd.read_parquet(io.BytesIO(historical_dataset), engine="pyarrow")
+  typed_dataframe = enforce_schema(historical_dataframe, historical_schema)
+
+  file_contents = io.BytesIO()
+  typed_dataframe.to_parquet(file_contents, engine="pyarrow")
+  results.append({'config': file_name_config,
+                  'rows': len(typed_dataframe),
+                  'rows_unchanged': len(typed_dataframe) == len(historical_dataframe),
+                  'bytes_before': len(historical_dataset),
+                  'bytes_after': file_contents.getbuffer().nbytes})
+  if not dry_run:
+    datalake_upload(file_contents, CONNECTION_STRING, file_system, historical_source_path+current_date_path, historical_source_file)
+
+display(pd.DataFrame(results))
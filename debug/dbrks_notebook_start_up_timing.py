@@ -0,0 +1,108 @@
+# Databricks notebook source
+#!/usr/bin python3
+
+# -------------------------------------------------------------------------
+# Copyright (c) 2021 NHS England and NHS Improvement. All rights reserved.
+# Licensed under the MIT License. See license.txt in the project root for
+# license information.
+# -------------------------------------------------------------------------
+
+"""
+FILE:           dbrks_notebook_start_up_timing.py
+DESCRIPTION:
+                Measures the environment set up of the metric notebooks: the import time of
+                the notebook imports plus the helper functions as they were loaded before
+                (every library imported up front) against importing the helper module alone,
+                each in a fresh Python process, and optionally the wall time of the child
+                notebooks of an orchestrator config
+USAGE:
+                Run interactively on a cluster, set functions_path to a folder holding
+                dbrks_helper_functions.py as a file (e.g. a Repos checkout)
+CONTRIBUTORS:   Data Engineering Team
+CONTACT:        data@nhsx.nhs.uk
+CREATED:        19 Oct. 2026
+VERSION:        0.0.1
+"""
+
+# COMMAND ----------
+
+# Install libs
+# -------------------------------------------------------------------------
+%pip install geojson==2.5.* tabulate requests pandas pathlib azure-storage-file-datalake beautifulsoup4 numpy urllib3 lxml regex pyarrow==5.0.*
+
+# COMMAND ----------
+
+# Imports
+# -------------------------------------------------------------------------
+# Python:
+import sys
+import time
+import subprocess
+
+# 3rd party:
+import pandas as pd
+
+# Connect to Azure datalake
+# -------------------------------------------------------------------------
+# !env from databricks secrets
+CONNECTION_STRING = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONNECTION_STRING")
+
+# COMMAND ----------
+
+# MAGIC %run /Shared/databricks/au-azure-databricks-cicd/functions/dbrks_helper_functions
+
+# COMMAND ----------
+
+# Parameters
+# -------------------------------------------------------------------------
+functions_path = "/Workspace/Repos/au-azure-databricks-cicd/functions"
+repeats = 5
+# child notebooks of this orchestrator config are run and timed when run_notebooks is True
+file_path_config = "/config/pipelines/nhsx-au-analytics/"
+file_name_config = "config_national_digital_channels_dbrks.json"
+file_system = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
+run_notebooks = False
+
+# COMMAND ----------
+
+# Import time in a fresh Python process
+# -------------------------------------------------------------------------
+# before: the imports every notebook ran followed by the helper functions with all of their
+# libraries loaded up front; after: the helper module, which imports the rest on first use
+notebook_imports = """
+import os, io, tempfile, json
+from datetime import datetime
+import pandas as pd
+import numpy as np
+from pathlib import Path
+from azure.storage.filedatalake import DataLakeServiceClient
+"""
+set_ups = {
+  'before': notebook_imports + "import requests, bs4, lxml, geojson, tabulate, pyarrow\nimport dbrks_helper_functions\n",
+  'after': "import dbrks_helper_functions\n",
+}
+
+def time_set_up(code):
+  script = "import sys, time\nsys.path.insert(0, " + repr(functions_path) + ")\nstart = time.perf_counter()\n" + code + "print(time.perf_counter() - start)\n"
+  output = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+  return float(output.stdout.strip().splitlines()[-1])
+
+results = []
+for set_up, code in set_ups.items():
+  seconds = [time_set_up(code) for _ in range(repeats)]
+  results.append({'set_up': set_up, 'median_seconds': pd.Series(seconds).median(), 'max_seconds': max(seconds)})
+display(pd.DataFrame(results))
+
+# COMMAND ----------
+
+# Wall time of the child notebooks
+# -------------------------------------------------------------------------
+if run_notebooks:
+  path_start = dbutils.secrets.get(scope='DatabricksNotebookPath', key="DATABRICKS_PATH")
+  config_JSON = load_pipeline_config(CONNECTION_STRING, file_system, file_path_config, file_name_config)
+  timings = []
+  for item in config_JSON['pipeline']['project']['databricks']:
+    start = time.perf_counter()
+    dbutils.notebook.run(path_start+item['databricks_notebook'], 3000)
+    timings.append({'notebook': item['databricks_notebook'], 'seconds': time.perf_counter() - start})
+  display(pd.DataFrame(timings))
@@ -0,0 +1,496 @@
+#!/usr/bin python3
+
+# -------------------------------------------------------------------------
+# Copyright (c) 2021 NHS England and NHS Improvement. All rights reserved.
+# Licensed under the MIT License. See license.txt in the project root for
+# license information.
+# -------------------------------------------------------------------------
+
+"""
+FILE:           offline_harness.py
+DESCRIPTION:
+                Runs the ingestion, analytics and validation notebooks on a laptop, against
+                fixture data in a local folder, and reports their wall time, peak memory and
+                Data Lake bytes read and written. Provides
+                  - a folder backed stand-in for azure.storage.filedatalake.DataLakeServiceClient
+                  - a dbutils stand-in (secrets, widgets, notebook.run and notebook.exit)
+                  - a spark stand-in backed by pandas and sqlite: createDataFrame, temp views,
+                    spark.sql, %sql cells and the SQL Server connector reads and writes
+                The notebook cells run in order in one namespace, %run cells run the functions
+                notebooks from this repo and %pip cells are skipped (install the packages first).
+USAGE:
+                python debug/offline_harness.py --root <fixture folder> <notebook.py> [<notebook.py> ...]
+                Fixture folder layout:
+                  <root>/datalake/<file system>/<path>   Data Lake files
+                  <root>/sql/<table>.parquet             SQL tables (read and written by the connector)
+                The Data Lake connection string secret is the fixture folder and the container
+                name secret is "datalake", other secrets default to "<scope>/<key>" unless
+                given with --secret scope/key=value.
+CONTRIBUTORS:   Data Engineering Team
+CONTACT:        data@nhsx.nhs.uk
+CREATED:        19 Oct. 2026
+VERSION:        0.0.1
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import types
+import hashlib
+import sqlite3
+import argparse
+import tracemalloc
+from datetime import datetime, timezone
+
+import pandas as pd
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# notebook paths in %run cells and configs are workspace paths below this folder
+workspace_folder = "au-azure-databricks-cicd/"
+
+# -------------------------------------------------------------------------
+# Data Lake stand-in
+# -------------------------------------------------------------------------
+datalake_stats = {'bytes_read': 0, 'bytes_written': 0, 'requests': 0}
+
+class PathProperties:
+  def __init__(self, name, is_directory):
+    self.name = name
+    self.is_directory = is_directory
+
+class FileProperties:
+  def __init__(self, path):
+    stat = os.stat(path)
+    self.size = stat.st_size
+    self.last_modified = datetime.fromtimestamp(stat.st_mtime, timezone.utc)
+    self.etag = '"' + hashlib.sha1((str(stat.st_mtime_ns) + "|" + str(stat.st_size)).encode("utf-8")).hexdigest()[:16] + '"'
+
+class StorageStreamDownloader:
+  def __init__(self, path):
+    with open(path, "rb") as f:
+      self.data = f.read()
+    self.properties = FileProperties(path)
+    datalake_stats['bytes_read'] += len(self.data)
+
+  def readall(self):
+    return self.data
+
+  def readinto(self, stream):
+    stream.write(self.data)
+    return len(self.data)
+
+class DataLakeFileClient:
+  def __init__(self, path):
+    self.path = path
+
+  def exists(self):
+    datalake_stats['requests'] += 1
+    return os.path.isfile(self.path)
+
+  def get_file_properties(self):
+    datalake_stats['requests'] += 1
+    if not os.path.isfile(self.path):
+      raise FileNotFoundError(self.path)
+    return FileProperties(self.path)
+
+  def download_file(self, offset=None, length=None, **kwargs):
+    datalake_stats['requests'] += 1
+    if not os.path.isfile(self.path):
+      raise FileNotFoundError(self.path)
+    return StorageStreamDownloader(self.path)
+
+  def create_file(self):
+    os.makedirs(os.path.dirname(self.path), exist_ok=True)
+    open(self.path, "wb").close()
+    return self
+
+  def upload_data(self, data, length=None, overwrite=False, **kwargs):
+    datalake_stats['requests'] += 1
+    if not overwrite and os.path.isfile(self.path) and os.path.getsize(self.path) > 0:
+      raise FileExistsError(self.path)
+    if hasattr(data, "read"):
+      data = data.read()
+    data = data[:length] if length is not None else data
+    data = data.encode("utf-8") if isinstance(data, str) else bytes(data)
+    os.makedirs(os.path.dirname(self.path), exist_ok=True)
+    with open(self.path, "wb") as f:
+      f.write(data)
+    datalake_stats['bytes_written'] += len(data)
+    return {'etag': FileProperties(self.path).etag}
+
+  def append_data(self, data, offset, length=None, **kwargs):
+    datalake_stats['requests'] += 1
+    data = bytes(data[:length] if length is not None else data)
+    with open(self.path, "r+b" if os.path.isfile(self.path) else "wb") as f:
+      f.seek(offset)
+      f.write(data)
+    datalake_stats['bytes_written'] += len(data)
+
+  def flush_data(self, offset, **kwargs):
+    with open(self.path, "r+b") as f:
+      f.truncate(offset)
+
+  def delete_file(self):
+    os.remove(self.path)
+
+class DataLakeDirectoryClient:
+  def __init__(self, path):
+    self.path = path
+
+  def exists(self):
+    return os.path.isdir(self.path)
+
+  def create_directory(self):
+    os.makedirs(self.path, exist_ok=True)
+    return self
+
+  def delete_directory(self):
+    for folder, _, files in os.walk(self.path, topdown=False):
+      for file in files:
+        os.remove(os.path.join(folder, file))
+      os.rmdir(folder)
+
+  def get_file_client(self, file):
+    return DataLakeFileClient(os.path.join(self.path, file))
+
+  def create_file(self, file):
+    return self.get_file_client(file).create_file()
+
+  def get_sub_directory_client(self, sub_directory):
+    return DataLakeDirectoryClient(os.path.join(self.path, sub_directory))
+
+class FileSystemClient:
+  def __init__(self, path):
+    self.path = path
+
+  def local_path(self, path):
+    return os.path.join(self.path, (path or "").strip("/"))
+
+  def get_directory_client(self, directory):
+    return DataLakeDirectoryClient(self.local_path(directory))
+
+  def get_file_client(self, file_path):
+    return DataLakeFileClient(self.local_path(file_path))
+
+  def get_paths(self, path=None, recursive=True, **kwargs):
+    # like the Data Lake, names are relative to the file system and folders are listed too
+    datalake_stats['requests'] += 1
+    folder = self.local_path(path)
+    if not os.path.isdir(folder):
+      raise FileNotFoundError(folder)
+    paths = []
+    for current, folders, files in os.walk(folder):
+      relative = os.path.relpath(current, self.path).replace(os.sep, "/")
+      paths += [PathProperties(relative + "/" + name, True) for name in folders]
+      paths += [PathProperties(relative + "/" + name, False) for name in files]
+      if not recursive:
+        break
+    return iter(sorted(paths, key=lambda path: path.name))
+
+class DataLakeServiceClient:
+  # the connection string is the fixture folder, files are under <folder>/datalake/<file system>/
+  def __init__(self, root):
+    self.root = root
+
+  @classmethod
+  def from_connection_string(cls, conn_str, **kwargs):
+    return cls(conn_str)
+
+  def get_file_system_client(self, file_system):
+    return FileSystemClient(os.path.join(self.root, "datalake", file_system))
+
+# -------------------------------------------------------------------------
+# dbutils stand-in
+# -------------------------------------------------------------------------
+class NotebookExit(Exception):
+  def __init__(self, value):
+    super().__init__(value)
+    self.value = value
+
+class Secrets:
+  def __init__(self, secrets):
+    self.secrets = secrets
+
+  def get(self, scope, key):
+    return self.secrets.get((scope, key), scope + "/" + key)
+
+class Widgets:
+  def __init__(self, values):
+    self.values = dict(values)
+
+  def text(self, name, defaultValue, label=None):
+    self.values.setdefault(name, defaultValue)
+
+  def dropdown(self, name, defaultValue, choices, label=None):
+    self.values.setdefault(name, defaultValue)
+
+  def get(self, name):
+    if name not in self.values:
+      raise KeyError("No widget named " + name)
+    return self.values[name]
+
+  def removeAll(self):
+    self.values = {}
+
+class NotebookUtils:
+  def __init__(self, harness):
+    self.harness = harness
+
+  def run(self, path, timeout_seconds=0, arguments=None):
+    result = self.harness.run_notebook(path, arguments or {})
+    if result['status'] != 'succeeded':
+      raise RuntimeError("Notebook " + path + " failed: " + result['error'])
+    return result['exit_value']
+
+  def exit(self, value):
+    raise NotebookExit(value)
+
+class DBUtils:
+  def __init__(self, harness, widgets):
+    self.secrets = Secrets(harness.secrets)
+    self.widgets = Widgets(widgets)
+    self.notebook = NotebookUtils(harness)
+
+# -------------------------------------------------------------------------
+# spark stand-in
+# -------------------------------------------------------------------------
+# Spark dataframes are pandas dataframes, temp views and SQL tables are sqlite tables.
+# SQL Server connector tables are parquet files under <root>/sql/, schema names are dropped
+# in sqlite ("dbo.table" is "table"). Notebooks using the pyspark DataFrame API beyond
+# toPandas, count, columns, temp views and write need a real pyspark.
+def sqlite_name(table_name):
+  return table_name.split(".")[-1].strip("[]")
+
+class LocalDataFrame:
+  def __init__(self, spark, df):
+    self.spark = spark
+    self.df = df.reset_index(drop=True)
+
+  @property
+  def columns(self):
+    return list(self.df.columns)
+
+  @property
+  def write(self):
+    return LocalWriter(self.spark, self.df)
+
+  def toPandas(self):
+    return self.df.copy()
+
+  def count(self):
+    return len(self.df)
+
+  def createOrReplaceTempView(self, name):
+    self.spark.register(name, self.df)
+
+  def withColumnRenamed(self, existing, new):
+    return LocalDataFrame(self.spark, self.df.rename(columns={existing: new}))
+
+  def show(self, n=20, truncate=True):
+    print(self.df.head(n))
+
+class LocalWriter:
+  def __init__(self, spark, df):
+    self.spark = spark
+    self.df = df
+    self.options = {}
+    self.write_mode = "error"
+
+  def format(self, source):
+    return self
+
+  def mode(self, write_mode):
+    self.write_mode = write_mode
+    return self
+
+  def option(self, key, value):
+    self.options[key] = value
+    return self
+
+  def save(self):
+    self.spark.write_table(self.options['dbtable'], self.df, self.write_mode)
+
+class LocalReader:
+  def __init__(self, spark):
+    self.spark = spark
+    self.options = {}
+
+  def format(self, source):
+    return self
+
+  def option(self, key, value):
+    self.options[key] = value
+    return self
+
+  def load(self):
+    if 'query' in self.options:
+      return self.spark.sql(self.options['query'])
+    return LocalDataFrame(self.spark, self.spark.read_table(self.options['dbtable']))
+
+class LocalSpark:
+  def __init__(self, root):
+    self.sql_path = os.path.join(root, "sql")
+    self.connection = sqlite3.connect(":memory:")
+    self.stats = {'sql_rows_written': 0}
+
+  @property
+  def read(self):
+    return LocalReader(self)
+
+  def createDataFrame(self, df, schema=None):
+    return LocalDataFrame(self, pd.DataFrame(df))
+
+  def register(self, name, df):
+    df.to_sql(sqlite_name(name), self.connection, if_exists="replace", index=False)
+
+  def table_file(self, table_name):
+    return os.path.join(self.sql_path, table_name + ".parquet")
+
+  def read_table(self, table_name):
+    return pd.read_parquet(self.table_file(table_name))
+
+  def write_table(self, table_name, df, write_mode):
+    file = self.table_file(table_name)
+    if write_mode == "append" and os.path.isfile(file):
+      df = pd.concat([pd.read_parquet(file), df], ignore_index=True)
+    os.makedirs(self.sql_path, exist_ok=True)
+    df.to_parquet(file)
+    self.stats['sql_rows_written'] += len(df)
+
+  def sql(self, query):
+    query = re.sub(r"(\bdbo|\[dbo\])\.", "", query, flags=re.IGNORECASE)
+    # SQL Server tables are loaded into sqlite on first use
+    for file in os.listdir(self.sql_path) if os.path.isdir(self.sql_path) else []:
+      table_name = file[:-len(".parquet")]
+      if re.search(r"\b" + re.escape(sqlite_name(table_name)) + r"\b", query, re.IGNORECASE):
+        query = re.sub(re.escape(table_name) + r"\b", sqlite_name(table_name), query, flags=re.IGNORECASE)
+        exists = self.connection.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (sqlite_name(table_name),)).fetchone()
+        if not exists:
+          self.register(table_name, self.read_table(table_name))
+    cursor = self.connection.execute(query)
+    if cursor.description is None:
+      self.connection.commit()
+      return LocalDataFrame(self, pd.DataFrame())
+    return LocalDataFrame(self, pd.DataFrame(cursor.fetchall(), columns=[column[0] for column in cursor.description]))
+
+# -------------------------------------------------------------------------
+# Notebook runner
+# -------------------------------------------------------------------------
+def notebook_file(path):
+  # workspace path (/Shared/databricks/au-azure-databricks-cicd/..., config databricks_notebook)
+  # or a file path
+  if workspace_folder in path:
+    path = os.path.join(repo_root, path.split(workspace_folder, 1)[1])
+  if not path.endswith(".py"):
+    path += ".py"
+  return path
+
+def notebook_cells(file):
+  with open(file) as f:
+    source = f.read()
+  cells = []
+  for cell in re.split(r"^# COMMAND ----------\s*$", source, flags=re.MULTILINE):
+    lines = cell.strip("\n").splitlines()
+    magic = [line[len("# MAGIC "):] if line.startswith("# MAGIC ") else line[len("# MAGIC"):] for line in lines if line.startswith("# MAGIC")]
+    if magic and magic[0].startswith("%run"):
+      cells.append(('run', magic[0].split(None, 1)[1].strip()))
+    elif magic and magic[0].startswith("%sql"):
+      cells.append(('sql', "\n".join(magic[1:])))
+    elif magic:
+      continue
+    else:
+      # notebook-scoped installs are left to the local environment
+      cells.append(('python', "\n".join("pass  # " + line if line.startswith("%") else line for line in lines)))
+  return cells
+
+def display(df, *args, **kwargs):
+  if isinstance(df, LocalDataFrame):
+    df = df.toPandas()
+  print(df.head(20) if hasattr(df, "head") else df)
+
+class Harness:
+  def __init__(self, root, secrets=None):
+    self.root = os.path.abspath(root)
+    self.secrets = {('AzureDataLake', 'DATALAKE_CONNECTION_STRING'): self.root,
+                    ('AzureDataLake', 'DATALAKE_CONTAINER_NAME'): "datalake",
+                    ('DatabricksNotebookPath', 'DATABRICKS_PATH'): ""}
+    self.secrets.update(secrets or {})
+    self.spark = LocalSpark(self.root)
+    self.results = []
+    self.depth = 0
+    self.install_datalake_module()
+
+  def install_datalake_module(self):
+    # notebooks import DataLakeServiceClient from the azure package, the stand-in replaces it
+    module = types.ModuleType("azure.storage.filedatalake")
+    module.DataLakeServiceClient = DataLakeServiceClient
+    for name in ["azure", "azure.storage"]:
+      sys.modules.setdefault(name, types.ModuleType(name))
+    sys.modules["azure.storage.filedatalake"] = module
+
+  def exec_notebook(self, file, namespace):
+    for kind, source in notebook_cells(file):
+      if kind == 'run':
+        self.exec_notebook(notebook_file(source), namespace)
+      elif kind == 'sql':
+        for statement in source.split(";"):
+          if statement.strip():
+            self.spark.sql(statement)
+      else:
+        exec(compile(source, file, "exec"), namespace)
+
+  def run_notebook(self, path, widgets=None):
+    file = notebook_file(path)
+    namespace = {'__name__': "__main__", 'spark': self.spark, 'dbutils': DBUtils(self, widgets or {}), 'display': display}
+    stats_before = dict(datalake_stats)
+    result = {'notebook': os.path.relpath(file, repo_root), 'depth': self.depth, 'status': 'succeeded', 'error': "", 'exit_value': None}
+    self.depth += 1
+    tracing = not tracemalloc.is_tracing()
+    if tracing:
+      tracemalloc.start()
+    start = time.perf_counter()
+    try:
+      self.exec_notebook(file, namespace)
+    except NotebookExit as exit:
+      result['exit_value'] = exit.value
+    except Exception as error:
+      result['status'] = 'failed'
+      result['error'] = type(error).__name__ + ": " + str(error)
+    result['seconds'] = round(time.perf_counter() - start, 3)
+    # child notebooks run inside their parent, so the peak is the parent's
+    result['peak_memory_mb'] = round(tracemalloc.get_traced_memory()[1] / 2**20, 1)
+    if tracing:
+      tracemalloc.stop()
+    self.depth -= 1
+    for stat in datalake_stats:
+      result[stat] = datalake_stats[stat] - stats_before[stat]
+    self.results.append(result)
+    return result
+
+def parse_pairs(values, separator="="):
+  return dict(value.split(separator, 1) for value in values or [])
+
+def main(argv=None):
+  parser = argparse.ArgumentParser(description="Run Databricks notebooks against local fixture data")
+  parser.add_argument("notebooks", nargs="+", help="notebook files or workspace paths")
+  parser.add_argument("--root", default="offline", help="fixture folder")
+  parser.add_argument("--secret", action="append", help="scope/key=value")
+  parser.add_argument("--widget", action="append", help="name=value")
+  parser.add_argument("--output", help="write the results to this json file")
+  args = parser.parse_args(argv)
+
+  secrets = {tuple(name.split("/", 1)): value for name, value in parse_pairs(args.secret).items()}
+  harness = Harness(args.root, secrets)
+  for notebook in args.notebooks:
+    harness.run_notebook(notebook, parse_pairs(args.widget))
+  df_results = pd.DataFrame(harness.results)
+  print(df_results.drop(columns=['exit_value']).to_string(index=False))
+  if args.output:
+    with open(args.output, "w") as f:
+      json.dump(harness.results, f, indent=2, default=str)
+  return 0 if (df_results['status'] == 'succeeded').all() else 1
+
+if __name__ == "__main__":
+  sys.exit(main())
@@ -0,0 +1,588 @@
+#!/usr/bin python3
+
+# -------------------------------------------------------------------------
+# Copyright (c) 2021 NHS England and NHS Improvement. All rights reserved.
+# Licensed under the MIT License. See license.txt in the project root for
+# license information.
+# -------------------------------------------------------------------------
+
+"""
+FILE:           synthetic_data.py
+DESCRIPTION:
+                Generates synthetic input files shaped like production, in the column layouts
+                and Data Lake folders the ingestion and analytics notebooks read, for the
+                offline harness (debug/offline_harness.py) and benchmarks:
+                  nhs_app          NHS App daily metrics per practice: weekly snapshot csv and
+                                   nhs_app_historical.parquet
+                  nhs_app_jumpoff  jump-off clicks per practice, provider and jump-off: weekly
+                                   WeeklyIntegratedPartners csv and nhs_app_jumpoff_historical.parquet
+                  cqc_hsca         CQC HSCA active locations csv, monthly dscr_data_historical.parquet
+                                   and the CCG/ICB/region reference table
+                  ndc              national digital channels workbook and its historical parquet files
+                  pomi             POMI practice table (pomi_table_full.parquet)
+                  shcr             shared care record submission workbooks, one per ICB
+                Each dataset also writes the reference tables its config names (ONS population,
+                GP practice population, CCG/ICB mapping, POMI), in their reference table layouts.
+                Sizes are production sizes (6,500 practices, 260k CQC locations, 42 ICBs) times
+                the scale factor, over the days or months between start and end.
+USAGE:
+                python debug/synthetic_data.py --root <fixture folder> [--scale 0.1] [--start 2023-01-01]
+                  [--end 2023-12-31] [--datasets nhs_app cqc_hsca ...] [--seed 0]
+                The pipeline configs are copied to the fixture Data Lake as well. The builders
+                (nhs_app_dataframe, cqc_hsca_dataframe, ...) return dataframes for benchmarks
+                that do not need files.
+CONTRIBUTORS:   Data Engineering Team
+CONTACT:        data@nhsx.nhs.uk
+CREATED:        19 Oct. 2026
+VERSION:        0.0.1
+"""
+
+import os
+import sys
+import json
+import shutil
+import argparse
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+config_path = os.path.join(repo_root, "config", "pipelines", "nhsx-au-analytics")
+
+practice_count = 6500
+cqc_location_count = 260000
+icb_count = 42
+ccg_count = 106
+region_names = ['North East and Yorkshire', 'North West', 'Midlands', 'East of England', 'London', 'South East', 'South West']
+
+# -------------------------------------------------------------------------
+# Shared functions
+# -------------------------------------------------------------------------
+def load_config(file_name):
+  with open(os.path.join(config_path, file_name)) as f:
+    return json.load(f)
+
+def scaled(count, scale):
+  return max(1, int(round(count * scale)))
+
+def folder_name(date):
+  return pd.Timestamp(date).strftime('%Y-%m-%d') + '/'
+
+def datalake_file(root, path, file, file_system="datalake"):
+  file = os.path.join(root, "datalake", file_system, path.strip("/"), file)
+  os.makedirs(os.path.dirname(file), exist_ok=True)
+  return file
+
+def write_parquet(df, file, date_cols=()):
+  # date columns are stored as dates, as enforce_schema writes them
+  table = pa.Table.from_pandas(df, preserve_index=False)
+  for col in date_cols:
+    index = table.schema.get_field_index(col)
+    table = table.set_column(index, col, table.column(col).cast(pa.timestamp('ns')).cast(pa.date32()))
+  pq.write_table(table, file)
+  return file
+
+def write_excel(sheets, file):
+  with pd.ExcelWriter(file, engine="openpyxl") as writer:
+    for sheet_name, df in sheets.items():
+      df.to_excel(writer, sheet_name=sheet_name, index=False)
+  return file
+
+def ods_codes(count, letters="ABCDEFGHJKLMNPY", start=81001):
+  # practice style codes: a letter and five digits
+  index = np.arange(count)
+  return [letters[i % len(letters)] + str(start + i // len(letters)).zfill(5) for i in index]
+
+def practice_list_sizes(count, rng):
+  # registered patients per practice, mean around 9,000
+  return np.clip(rng.lognormal(mean=9.0, sigma=0.5, size=count), 1000, 60000)
+
+def growth_curve(periods, low=0.7, high=1.3):
+  return np.linspace(low, high, periods) if periods > 1 else np.ones(1)
+
+def weekly_split(dates):
+  # the last 7 days are the new weekly snapshot, the days before are the historical file
+  dates = pd.DatetimeIndex(dates)
+  return dates[:-7], dates[-7:]
+
+# -------------------------------------------------------------------------
+# Reference tables
+# -------------------------------------------------------------------------
+# The reference tables the project configs name (reference_source_path*/_file*), in the
+# layouts of config/pipelines/reference_tables (ONS, GP practice population, CCG/ICB mapping)
+# and config_pomi_dbrks.json (POMI). Practice tables use the same ODS codes and list sizes
+# as the practice level datasets, population sizes are scaled like the datasets.
+pomi_enabled_fields = ['Sys_Appts_Enbld', 'Sys_Presc_Enbld', 'Sys_DetCodeRec_Enbld']
+# Field: share of the practice list (patients enabled) or monthly uses per registered patient
+pomi_patient_fields = {
+  'Pat_Appts_Enbld': 0.35, 'Pat_Presc_Enbld': 0.4, 'Pat_DetCodeRec_Enbld': 0.3, 'Total_Pat_Enbld': 0.45,
+  'Pat_Appts_Use': 0.02, 'Pat_Presc_Use': 0.06, 'Pat_DetCodeRec_Use': 0.03,
+}
+pomi_suppliers = ['EMIS', 'TPP', 'VISION', 'MICROTEST']
+
+def ccg_reference_dataframe(last_refreshed):
+  ccgs = np.arange(ccg_count)
+  icbs = ccgs * icb_count // ccg_count
+  regions = icbs * len(region_names) // icb_count
+  return pd.DataFrame({
+    'CCG_ONS_Code': ["E38000" + str(100 + i) for i in ccgs],
+    'CCG_ODS_Code': [str(i).zfill(2) + "X" for i in ccgs],
+    'CCG_Name': ["NHS CCG " + str(i) for i in ccgs],
+    'CCG21CD': ["E38000" + str(100 + i) for i in ccgs],
+    'ICB_ONS_Code': ["E54000" + str(10 + i).zfill(3) for i in icbs],
+    'ICB_Code': ["Q" + str(10 + i) for i in icbs],
+    'ICB_Name': ["NHS Integrated Care Board " + str(i) for i in icbs],
+    'Region_Code': ["E40000" + str(i).zfill(3) for i in regions],
+    'Region_Name': [region_names[i] for i in regions],
+    'Import_Date': pd.Timestamp(last_refreshed).strftime('%Y-%m-%d'),
+    'Last_Refreshed': pd.Timestamp(last_refreshed).strftime('%Y-%m-%d'),
+  })
+
+def ons_population_dataframe(start, end, scale, rng):
+  # mid-year estimates per CCG, sex and single year of age (Age as text, 90+ for the oldest)
+  years = range(pd.Timestamp(start).year - 1, pd.Timestamp(end).year)
+  ages = [str(age) for age in range(90)] + ["90+"]
+  ccgs = ["E38000" + str(100 + i) for i in range(ccg_count)]
+  index = pd.MultiIndex.from_product([[pd.Timestamp(str(year) + "-06-30") for year in years], ccgs, ['1', '2'], ages],
+                                     names=['Effective_Snapshot_Date', 'Area_Code', 'Sex', 'Age'])
+  df = index.to_frame(index=False)
+  # England is about 56.5 million people, fewer at the oldest ages
+  age_weight = np.where(df['Age'] == "90+", 0.5, np.clip(1.2 - df['Age'].str.rstrip('+').astype(int) / 100, 0.2, 1.2))
+  df['Size'] = rng.poisson(56500000 * scale / (ccg_count * 2 * 91) * age_weight)
+  df['DataSourceFileForThisSnapshot_Version'] = 1
+  df['Report_Period_Length'] = "Year"
+  df['Unique_ID'] = np.arange(len(df))
+  df['AuditKey'] = 1
+  return df[['Area_Code', 'Sex', 'Age', 'Size', 'Effective_Snapshot_Date', 'DataSourceFileForThisSnapshot_Version',
+             'Report_Period_Length', 'Unique_ID', 'AuditKey']]
+
+def gp_practice_population_single_age_dataframe(practices, list_sizes, snapshot_date, rng):
+  # registered patients per practice and single year of age (AGE as text, 95+ for the oldest)
+  ages = [str(age) for age in range(95)] + ["95+"]
+  age_share = np.clip(1.2 - np.arange(len(ages)) / 80, 0.05, 1.2)
+  age_share = age_share / age_share.sum()
+  return pd.DataFrame({
+    'GP_Practice_Code': np.repeat(np.array(practices, dtype=object), len(ages)),
+    'AGE': np.tile(np.array(ages, dtype=object), len(practices)),
+    'Size': rng.poisson(list_sizes[:, None] * age_share[None, :]).ravel(),
+    'Effective_Snapshot_Date': pd.Timestamp(snapshot_date),
+  })
+
+def gp_practice_population_dataframe(practices, list_sizes, snapshot_date):
+  return pd.DataFrame({
+    'GP_Practice_Code': practices,
+    'Registered_patient': np.round(list_sizes).astype(int),
+    'Effective_Snapshot_Date': pd.Timestamp(snapshot_date),
+  })
+
+def pomi_dataframe(practices, list_sizes, start, end, rng):
+  # POMI underlying data, long format: one row per month end, practice and Field (all text
+  # columns but Value, as the proc file is read)
+  months = pd.date_range(start, end, freq='MS') + pd.offsets.MonthEnd(0)
+  fields = pomi_enabled_fields + list(pomi_patient_fields) + ['patient_list_size']
+  practice_index = np.arange(len(practices))
+  ccgs = practice_index * ccg_count // max(len(practices), 1)
+  index = pd.MultiIndex.from_product([months, practice_index, fields], names=['Report_Period_End', 'practice', 'Field'])
+  df = index.to_frame(index=False)
+  practice = df['practice'].to_numpy()
+  growth = growth_curve(len(months))[months.get_indexer(df['Report_Period_End'])]
+  value = np.asarray(list_sizes)[practice].astype(float)
+  for field, rate in pomi_patient_fields.items():
+    is_field = (df['Field'] == field).to_numpy()
+    value[is_field] = rng.poisson(value[is_field] * rate * growth[is_field])
+  is_enabled = df['Field'].isin(pomi_enabled_fields).to_numpy()
+  value[is_enabled] = np.where(rng.random(is_enabled.sum()) < 0.95, 2, 1)
+  df['Value'] = value
+  df['Report_Period_End'] = df['Report_Period_End'].dt.strftime('%Y-%m-%d')
+  df['Region_Code'] = ["Y" + str(56 + i * len(region_names) // ccg_count) for i in ccgs[practice]]
+  df['Subregion_Code'] = ["Q" + str(10 + i * icb_count // ccg_count) for i in ccgs[practice]]
+  df['CCG_Code'] = [str(i).zfill(2) + "X" for i in ccgs[practice]]
+  df['Practice_Code'] = np.array(practices, dtype=object)[practice]
+  df['System_Supplier'] = np.array(pomi_suppliers, dtype=object)[practice % len(pomi_suppliers)]
+  df['Effective_Snapshot_Date'] = pd.Timestamp(end).strftime('%Y-%m-%d')
+  df['DataSourceFileForThisSnapshot_Version'] = "1"
+  df['Report_Period_Length'] = "Month"
+  df['Unique_ID'] = np.arange(len(df)).astype(str)
+  df['AuditKey'] = "1"
+  return df[['Report_Period_End', 'Region_Code', 'Subregion_Code', 'CCG_Code', 'Practice_Code', 'System_Supplier', 'Field', 'Value',
+             'Effective_Snapshot_Date', 'DataSourceFileForThisSnapshot_Version', 'Report_Period_Length', 'Unique_ID', 'AuditKey']]
+
+def reference_dataframe(file, practices, list_sizes, scale, start, end, rng):
+  if file == 'table_ons_population_demography_historical.parquet':
+    return ons_population_dataframe(start, end, scale, rng)
+  if file == 'table_gp_practice_population_single_age_snapshot.parquet':
+    return gp_practice_population_single_age_dataframe(practices, list_sizes, end, rng)
+  if file == 'table_gp_practice_population_snapshot.parquet':
+    return gp_practice_population_dataframe(practices, list_sizes, end)
+  if file == 'table_ccg_icb_region_mapping_snapshot.parquet':
+    return ccg_reference_dataframe(end)
+  if file == 'pomi_table_full.parquet':
+    return pomi_dataframe(practices, list_sizes, start, end, rng)
+  raise ValueError("No synthetic reference table for " + file)
+
+def write_references(root, config_JSON, practices, list_sizes, scale, start, end, rng):
+  # every reference_source_path[_x] / reference_source_file[_x] pair of the project config
+  project = config_JSON['pipeline']['project']
+  folder = folder_name(end)
+  files = []
+  for key in sorted(project):
+    if not key.startswith('reference_source_path'):
+      continue
+    path, file = project[key], project[key.replace('_path', '_file')]
+    df = reference_dataframe(file, practices, list_sizes, scale, start, end, rng)
+    files.append(write_parquet(df, datalake_file(root, path + folder, file)))
+  return files
+
+# -------------------------------------------------------------------------
+# NHS App
+# -------------------------------------------------------------------------
+# daily events per registered patient
+nhs_app_rates = {
+  'Logins': 0.01,
+  'Prescriptions': 0.004,
+  'AppointmentsBooked': 0.0005,
+  'AppointmentsCancelled': 0.0002,
+  'ODLookups': 0.0003,
+  'ODRegistrations': 0.0001,
+  'ODUpdates': 0.00005,
+  'ODWithdrawals': 0.00003,
+  'RecordViews': 0.002,
+  'RecordViewsSCR': 0.0008,
+  'RecordViewsDCR': 0.001,
+  'AcceptedTermsAndConditions': 0.0006,
+  'P9VerifiedNHSAppUsers': 0.0004,
+}
+
+def nhs_app_dataframe(practices, list_sizes, dates, rng):
+  # one row per day and practice, sorted by Date as the historical file is
+  dates = pd.DatetimeIndex(dates)
+  expected = growth_curve(len(dates))[:, None] * list_sizes[None, :]
+  df = pd.DataFrame({'Date': np.repeat(dates.values, len(practices)),
+                     'OdsCode': np.tile(np.array(practices, dtype=object), len(dates))})
+  for metric, rate in nhs_app_rates.items():
+    df[metric] = rng.poisson(expected * rate).ravel()
+  return df
+
+def write_nhs_app(root, scale, start, end, rng):
+  config_JSON = load_config("config_nhs_app_dbrks.json")
+  practices = ods_codes(scaled(practice_count, scale))
+  list_sizes = practice_list_sizes(len(practices), rng)
+  historical_dates, snapshot_dates = weekly_split(pd.date_range(start, end))
+  folder = folder_name(end)
+
+  df_snapshot = nhs_app_dataframe(practices, list_sizes, snapshot_dates, rng)
+  df_snapshot['Date'] = df_snapshot['Date'].dt.strftime('%Y-%m-%d')
+  snapshot_file = datalake_file(root, config_JSON['pipeline']['raw']['snapshot_source_path'] + folder, "nhs_app_table_snapshot_" + folder.strip('/') + ".csv")
+  df_snapshot.to_csv(snapshot_file, index=False)
+
+  df_historical = nhs_app_dataframe(practices, list_sizes, historical_dates, rng)
+  files = [snapshot_file]
+  for stage in ['raw', 'proc']:
+    path = config_JSON['pipeline'][stage]['appended_path' if stage == 'raw' else 'sink_path']
+    file = config_JSON['pipeline'][stage]['appended_file' if stage == 'raw' else 'sink_file']
+    files.append(write_parquet(df_historical, datalake_file(root, path + folder, file), ['Date']))
+  files += write_references(root, config_JSON, practices, list_sizes, scale, start, end, rng)
+  return files
+
+# -------------------------------------------------------------------------
+# NHS App jump-offs
+# -------------------------------------------------------------------------
+jumpoff_providers = {
+  'PKB': ['appointments', 'carePlans', 'healthTrackers', 'medicines', 'messages', 'recordSharing', 'sharedLinks', 'testResults'],
+  'Substrakt': ['accountAdmin', 'messages', 'patientParticipationGroups'],
+  'Engage': ['admin', 'medical', 'messages'],
+  'accuRx': ['medical', 'messages'],
+  'PATCHS': ['admin', 'medical'],
+  'eConsult': ['consultation'],
+  'ers': ['manageYourReferral'],
+}
+
+def nhs_app_jumpoff_dataframe(practices, list_sizes, dates, rng, providers_per_practice=2):
+  # each practice uses a few providers, with a row per day and jump-off that was clicked
+  dates = pd.DatetimeIndex(dates)
+  providers = list(jumpoff_providers)
+  rows = []
+  for practice, list_size in zip(practices, list_sizes):
+    for provider in rng.choice(providers, size=min(providers_per_practice, len(providers)), replace=False):
+      for jumpoff in jumpoff_providers[provider]:
+        rows.append((practice, provider, jumpoff, list_size))
+  df_combinations = pd.DataFrame(rows, columns=['OdsCode', 'Provider', 'JumpOff', 'list_size'])
+  expected = growth_curve(len(dates))[:, None] * df_combinations['list_size'].values[None, :] * 0.0005
+  clicks = rng.poisson(expected)
+  day_index, combination_index = np.nonzero(clicks)
+  df = df_combinations.iloc[combination_index][['OdsCode', 'Provider', 'JumpOff']].reset_index(drop=True)
+  df.insert(0, 'Date', dates.values[day_index])
+  df['Clicks'] = clicks[day_index, combination_index]
+  return df
+
+def write_nhs_app_jumpoff(root, scale, start, end, rng):
+  config_JSON = load_config("config_nhs_app_jumpoff_dbrks.json")
+  practices = ods_codes(scaled(practice_count, scale))
+  list_sizes = practice_list_sizes(len(practices), rng)
+  historical_dates, snapshot_dates = weekly_split(pd.date_range(start, end))
+  folder = folder_name(end)
+
+  df_snapshot = nhs_app_jumpoff_dataframe(practices, list_sizes, snapshot_dates, rng)
+  df_snapshot['Date'] = df_snapshot['Date'].dt.strftime('%Y-%m-%d')
+  snapshot_file = datalake_file(root, config_JSON['pipeline']['raw']['snapshot_source_path'] + folder, "WeeklyIntegratedPartners_" + folder.strip('/') + ".csv")
+  df_snapshot.to_csv(snapshot_file, index=False)
+
+  df_historical = nhs_app_jumpoff_dataframe(practices, list_sizes, historical_dates, rng)
+  files = [snapshot_file]
+  for stage in ['raw', 'proc']:
+    path = config_JSON['pipeline'][stage]['appended_path' if stage == 'raw' else 'sink_path']
+    file = config_JSON['pipeline'][stage]['appended_file' if stage == 'raw' else 'sink_file']
+    files.append(write_parquet(df_historical, datalake_file(root, path + folder, file), ['Date']))
+  files += write_references(root, config_JSON, practices, list_sizes, scale, start, end, rng)
+  return files
+
+# -------------------------------------------------------------------------
+# CQC HSCA active locations (DSCR)
+# -------------------------------------------------------------------------
+def cqc_hsca_dataframe(location_count, run_date, rng):
+  locations = np.arange(location_count)
+  providers = locations // 3
+  is_care_home = rng.random(location_count) < 0.4
+  ccgs = rng.integers(0, ccg_count, location_count)
+  local_authorities = np.array(["Local Authority " + str(i) for i in range(150)], dtype=object)
+  directorates = np.array(['Adult social care', 'Hospitals', 'Primary medical services'], dtype=object)
+  categories = np.array(['Residential social care', 'Community based adult social care services', 'GP Practices', 'Dentists'], dtype=object)
+  postcodes = np.array(["LS" + str(i % 30 + 1) + " " + str(i % 9 + 1) + "AB" for i in range(500)], dtype=object)
+  location_la = rng.integers(0, len(local_authorities), location_count)
+  location_category = rng.integers(0, len(categories), location_count)
+  return pd.DataFrame({
+    'Location ID': ["1-" + str(1000000000 + i) for i in locations],
+    'Location Name': ["Location " + str(i) for i in locations],
+    'Dormant (Y/N)': np.where(rng.random(location_count) < 0.05, 'Y', 'N'),
+    'Care home?': np.where(is_care_home, 'Y', 'N'),
+    'Care homes beds': np.where(is_care_home, rng.integers(5, 120, location_count), 0),
+    'Location Inspection Directorate': directorates[location_category % len(directorates)],
+    'Location Primary Inspection Category': categories[location_category],
+    'Location Local Authority': local_authorities[location_la],
+    'Location ONSPD CCG Code': ["E38000" + str(100 + i) for i in ccgs],
+    'Location ONSPD CCG': ["NHS CCG " + str(i) for i in ccgs],
+    'Provider ID': ["1-" + str(100000000 + i) for i in providers],
+    'Provider Name': ["Provider " + str(i) for i in providers],
+    'Provider Local Authority': local_authorities[location_la],
+    'Provider NHS Region': [region_names[i] for i in ccgs * len(region_names) // ccg_count],
+    'Provider Inspection Directorate': directorates[location_category % len(directorates)],
+    'Provider Primary Inspection Category': categories[location_category],
+    'Provider Postal Code': postcodes[providers % len(postcodes)],
+    'Location Postal Code': postcodes[locations % len(postcodes)],
+    'Location HSCA start date': (pd.Timestamp("2010-10-01") + pd.to_timedelta(rng.integers(0, 4000, location_count), unit="D")).strftime('%d/%m/%Y'),
+    'Provider Charity Number': np.where(rng.random(location_count) < 0.1, rng.integers(200000, 1200000, location_count).astype(str), ""),
+    'run_date': pd.Timestamp(run_date).strftime('%Y-%m-%d'),
+  })
+
+def write_cqc_hsca(root, scale, start, end, rng):
+  config_JSON = load_config("config_dscr_dbrks.json")
+  location_count = scaled(cqc_location_count, scale)
+  run_dates = pd.date_range(start, end, freq='MS')
+  folder = folder_name(end)
+
+  # the active locations grow over the months, the latest month is the new file
+  monthly = [cqc_hsca_dataframe(int(location_count * (0.9 + 0.1 * (i + 1) / len(run_dates))), run_date, np.random.default_rng(rng.integers(2**32)))
+             for i, run_date in enumerate(run_dates)]
+  snapshot_file = datalake_file(root, config_JSON['pipeline']['raw']['snapshot_source_path'] + folder, "HSCA_Active_Locations.csv")
+  monthly[-1].to_csv(snapshot_file, index=False, encoding="ISO-8859-1")
+
+  # the ingestion notebook stores every column as text
+  df_historical = pd.concat(monthly[:-1] or monthly[-1:], ignore_index=True).astype(str)
+  files = [snapshot_file]
+  files.append(write_parquet(df_historical, datalake_file(root, config_JSON['pipeline']['raw']['appended_path'] + folder, config_JSON['pipeline']['raw']['appended_file'])))
+  files.append(write_parquet(df_historical, datalake_file(root, config_JSON['pipeline']['proc']['sink_path'] + folder, config_JSON['pipeline']['proc']['sink_file'])))
+  practices = ods_codes(scaled(practice_count, scale))
+  files += write_references(root, config_JSON, practices, practice_list_sizes(len(practices), rng), scale, start, end, rng)
+  return files
+
+# -------------------------------------------------------------------------
+# National digital channels workbook
+# -------------------------------------------------------------------------
+# columns read by the analytics notebooks, by workbook sheet, with a national daily or monthly scale
+ndc_daily_sheets = {
+  'NHS App data file': {'Logins': 1500000, 'Prescriptions': 110000, 'RecordViews': 90000, 'RecordViewsDCR': 40000,
+                        'UsersAppointmentsBooked': 12000, 'UsersAppointmentsCancelled': 5000, 'UsersODRegistrations': 3000},
+  'vaccinations': {'total_dose_1': 20000, 'total_dose_2': 18000, 'dose_3': 15000, 'booster': 30000, 'covid_winter': 25000, 'flu_winter': 20000},
+  'EPS': {'eps_repeat_prescriptions': 1200000},
+}
+ndc_monthly_sheets = {
+  'jumpoffs': {'PKB_appointments': 20000, 'PKB_carePlans': 5000, 'PKB_healthTrackers': 4000, 'PKB_medicines': 6000, 'PKB_messages': 30000,
+               'PKB_recordSharing': 3000, 'PKB_sharedLinks': 2000, 'PKB_testResults': 25000, 'Substrakt_accountAdmin': 8000,
+               'Substrakt_messages': 9000, 'Substrakt_patientParticipationGroups': 500, 'Engage_admin': 40000, 'Engage_medical': 60000,
+               'Engage_messages': 20000, 'accuRx_medical': 50000, 'accuRx_messages': 70000, 'PATCHS - admin': 15000, 'PATCHS - medical': 25000,
+               'eConsult Consultation': 90000, 'manageYourReferral': 30000, 'wayfinder': 120000, 'Number of Wayfinder Clicks': 150000,
+               'nbs': 200000, 'bporResearch': 10000, 'OLCs on the NHS App': 250000},
+  'NHS App Dash': {'all_time_nhs_app_registered_users': 30000000, 'unique_logins_nhs_app': 12000000, '3m_logins': 20000000,
+                   'Covid_Pass': 500000, 'Covid_Pass_P5': 200000, 'Covid_Vaccine_Record_View': 300000, 'covid_pass_transactions': 400000,
+                   'register_gp': 20000},
+  'NHS UK Site Sections': {'book-a-coronavirus-vaccination_nhsuk': 400000, 'conditions_nhsuk': 15000000, 'live-well_nhsuk': 3000000,
+                           'medicines_nhsuk': 4000000, 'mental-health_nhsuk': 2000000, 'nhs-app_nhsuk': 800000, 'nhs-services_nhsuk': 2500000,
+                           'pregnancy_nhsuk': 1500000, 'service-search_nhsuk': 3500000, 'services_nhsuk': 2800000},
+  'Appts in Primary Care': {'primary_care_appointments': 28000000},
+  'NHS Login report': {'confirmed_accounts_nhs_login': 35000000},
+  'NHS.UK report': {'estimated_visits_nhs_uk': 60000000, 'Book_a_Covid_19_vaccination': 400000, 'Conditions': 15000000, 'Live_well': 3000000,
+                    'Medicines': 4000000, 'NHS_App_online': 800000, 'Other': 9000000, 'Service_finding': 3500000, 'services': 2800000},
+}
+ndc_forecast_columns = {'Forecast NHS App registered users': 32000000, 'Forecast unique logins': 13000000, 'Forecast repeat prescriptions': 3500000}
+ndc_message_suppliers = ['NHS England', 'Wayfinder', 'PKB', 'Substrakt', 'accuRx']
+ndc_push_notifications = ['Completed', 'NoTargetFound', 'Failed']
+
+def ndc_sheet_dataframe(date_col, dates, columns, rng):
+  growth = growth_curve(len(dates))
+  df = pd.DataFrame({date_col: pd.DatetimeIndex(dates)})
+  for col, size in columns.items():
+    df[col] = rng.poisson(size * growth)
+  return df
+
+def ndc_messages_dataframe(dates, rng):
+  index = pd.MultiIndex.from_product([pd.DatetimeIndex(dates), ndc_message_suppliers, ndc_push_notifications], names=['Date', 'Supplier', 'Push Notification'])
+  df = index.to_frame(index=False)
+  df['Count'] = rng.poisson(50000, len(df))
+  df['Read By'] = rng.binomial(df['Count'], 0.6)
+  return df
+
+def ndc_workbook(start, end, rng):
+  # sheet name -> dataframe, in the layout of the monthly national digital channels workbook
+  days = pd.date_range(start, end)
+  months = pd.date_range(start, end, freq='MS')
+  sheets = {sheet: ndc_sheet_dataframe('Daily', days, columns, rng) for sheet, columns in ndc_daily_sheets.items()}
+  sheets.update({sheet: ndc_sheet_dataframe('Monthly', months, columns, rng) for sheet, columns in ndc_monthly_sheets.items()})
+  sheets['Forecasts'] = ndc_sheet_dataframe('Monthly', pd.date_range(start, pd.Timestamp(end) + pd.DateOffset(months=12), freq='MS'), ndc_forecast_columns, rng)
+  sheets['Messaging & Notifications'] = ndc_messages_dataframe(days, rng)
+  return sheets
+
+def merge_sheets(sheets, on):
+  df = None
+  for df_sheet in sheets:
+    df = df_sheet if df is None else df.merge(df_sheet, how='outer', on=on)
+  return df
+
+def write_ndc(root, scale, start, end, rng):
+  # national figures, the scale factor does not apply
+  config_JSON = load_config("config_national_digital_channels_dbrks.json")
+  folder = folder_name(end)
+  sheets = ndc_workbook(start, end, rng)
+  files = [write_excel(sheets, datalake_file(root, config_JSON['pipeline']['raw']['source_path'] + folder, "national_digital_channels_" + folder.strip('/') + ".xlsx"))]
+
+  # the historical files the ingestion notebook writes from the workbook
+  raw = config_JSON['pipeline']['raw']
+  historical = {
+    raw['appended_file_daily']: merge_sheets([sheets[sheet] for sheet in ndc_daily_sheets], 'Daily'),
+    raw['appended_file_monthly']: merge_sheets([sheets[sheet] for sheet in ndc_monthly_sheets], 'Monthly'),
+    raw['appended_file_forecasts']: sheets['Forecasts'],
+    raw['appended_file_messages']: sheets['Messaging & Notifications'],
+  }
+  for file, df in historical.items():
+    files.append(write_parquet(df, datalake_file(root, raw['appended_path'] + folder, file)))
+    files.append(write_parquet(df, datalake_file(root, config_JSON['pipeline']['project']['source_path'] + folder, file)))
+  # the practice level reference tables (POMI) are scaled like the practice datasets
+  practices = ods_codes(scaled(practice_count, scale))
+  files += write_references(root, config_JSON, practices, practice_list_sizes(len(practices), rng), scale, start, end, rng)
+  return files
+
+# -------------------------------------------------------------------------
+# POMI
+# -------------------------------------------------------------------------
+def write_pomi(root, scale, start, end, rng):
+  # the POMI table is read from SQL, its raw and proc files are the same table
+  config_JSON = load_config("config_pomi_dbrks.json")
+  practices = ods_codes(scaled(practice_count, scale))
+  df = pomi_dataframe(practices, practice_list_sizes(len(practices), rng), start, end, rng)
+  folder = folder_name(end)
+  return [write_parquet(df, datalake_file(root, config_JSON['pipeline'][stage]['sink_path'] + folder, config_JSON['pipeline'][stage]['sink_file']))
+          for stage in ['raw', 'proc']]
+
+# -------------------------------------------------------------------------
+# Shared care record submissions
+# -------------------------------------------------------------------------
+# partner organisations per ICB submission, by sheet
+shcr_partner_sheets = {'Trust': 6, 'PCN': 30, 'LA': 3, 'Other Community': 10, 'Other partners': 20}
+
+def shcr_workbook(icb_index, month, rng, scale=1):
+  icb_code = "Q" + str(10 + icb_index)
+  icb_name = "NHS Integrated Care Board " + str(icb_index)
+  sheets = {'ICB': pd.DataFrame([{
+    "For Month\nsee guidance Ref 2": month,
+    "ICB ODS code": icb_code,
+    "ICB Name (if applicable)": icb_name,
+    "ShCR Programme Name": "ShCR programme " + str(icb_index),
+    "Name of ShCR System": ['Graphnet', 'Orion', 'Cerner', 'Black Pear'][icb_index % 4],
+    "Care Providers": int(rng.integers(50, 500)),
+    "Access to Advanced (EoL) Care Plans": ['Yes', 'No'][icb_index % 2],
+    "Number of ShCR views in the past month": int(rng.poisson(40000)),
+    "Number of unique user ShCR views in the past month": int(rng.poisson(6000)),
+    "Completed by (email)": "shcr." + icb_code.lower() + "@nhs.net",
+    "Date completed": month,
+  }])}
+  for sheet, count in shcr_partner_sheets.items():
+    count = scaled(count, scale)
+    df = pd.DataFrame({
+      "For Month": month,
+      "ODS Code": [icb_code + sheet[0] + str(i).zfill(3) for i in range(count)],
+      "Name": [sheet + " partner " + str(i) for i in range(count)],
+      "Partner Organisation connected to ShCR?": rng.choice(["Connected", "Not Connected", "Please select"], count, p=[0.7, 0.25, 0.05]),
+      "Comments": "",
+      "Partner Organisation plans to be connected by March 2023?": rng.choice(["Yes", "No"], count),
+    })
+    if sheet == 'Other partners':
+      df["Partner Type"] = rng.choice(["Hospice", "Ambulance", "Care home", "Other"], count)
+    sheets[sheet] = df
+  return sheets
+
+def write_shcr(root, scale, start, end, rng):
+  config_JSON = load_config("config_shared_care_record_dbrks.json")
+  folder = folder_name(end)
+  month = (pd.Timestamp(end) - pd.DateOffset(months=1)).strftime('%Y-%m-01')
+  files = []
+  for icb_index in range(icb_count):
+    file = "ShCR_submission_Q" + str(10 + icb_index) + ".xlsx"
+    files.append(write_excel(shcr_workbook(icb_index, month, rng, scale), datalake_file(root, config_JSON['pipeline']['raw']['source_path'] + folder, file)))
+  return files
+
+# -------------------------------------------------------------------------
+# Fixture folder
+# -------------------------------------------------------------------------
+dataset_writers = {
+  'nhs_app': write_nhs_app,
+  'nhs_app_jumpoff': write_nhs_app_jumpoff,
+  'cqc_hsca': write_cqc_hsca,
+  'ndc': write_ndc,
+  'pomi': write_pomi,
+  'shcr': write_shcr,
+}
+
+def write_configs(root, file_system="datalake"):
+  # the notebooks download their configs from /config/pipelines/ on the Data Lake
+  sink = os.path.join(root, "datalake", file_system, "config")
+  shutil.copytree(os.path.join(repo_root, "config"), sink, dirs_exist_ok=True)
+  return sink
+
+def write_fixtures(root, datasets=None, scale=1.0, start=None, end=None, seed=0):
+  end = pd.Timestamp(end) if end is not None else pd.Timestamp.today().normalize()
+  start = pd.Timestamp(start) if start is not None else end - pd.Timedelta(days=364)
+  rng = np.random.default_rng(seed)
+  files = {'config': [write_configs(root)]}
+  for dataset in datasets or dataset_writers:
+    files[dataset] = dataset_writers[dataset](root, scale, start, end, rng)
+  return files
+
+def main(argv=None):
+  parser = argparse.ArgumentParser(description="Write synthetic input files for the offline harness")
+  parser.add_argument("--root", default="offline", help="fixture folder")
+  parser.add_argument("--datasets", nargs="+", choices=list(dataset_writers), help="default: all")
+  parser.add_argument("--scale", type=float, default=1.0, help="fraction of the production size")
+  parser.add_argument("--start", help="first date, default one year before end")
+  parser.add_argument("--end", help="last date and snapshot folder, default today")
+  parser.add_argument("--seed", type=int, default=0)
+  args = parser.parse_args(argv)
+
+  files = write_fixtures(args.root, args.datasets, args.scale, args.start, args.end, args.seed)
+  for dataset, dataset_files in files.items():
+    size = sum(os.path.getsize(file) for file in dataset_files if os.path.isfile(file))
+    print(dataset + ": " + str(len(dataset_files)) + " files, " + str(round(size / 2**20, 1)) + " MB")
+  return 0
+
+if __name__ == "__main__":
+  sys.exit(main())
@@ -64,8 +64,7 @@ CONNECTION_STRING = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CON
 file_path_config = "/config/pipelines/direct-load/"
 file_name_config = "config_dscr_finance_tracker.json"
 file_system_config = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
-config_JSON = datalake_download(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
-config_JSON = json.loads(io.BytesIO(config_JSON).read())
+config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
 
 # COMMAND ----------
 
@@ -75,7 +74,8 @@ file_system = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER
 new_source_path = config_JSON['pipeline']['raw']['snapshot_source_path']
 sink_path = config_JSON['pipeline']['proc']['sink_path']
 sink_file = config_JSON['pipeline']['proc']['sink_file']
-table_name = config_JSON['pipeline']["staging"][0]['sink_table']
+metric_config = pipeline_metrics(config_JSON)['finance_tracker']
+table_name = metric_config['sink_table']
 
 print(new_source_path)
 print(sink_path)
@@ -91,8 +91,7 @@ latestFolder = datalake_latestFolder(CONNECTION_STRING, file_system, new_source_
 file_name_list = datalake_listContents(CONNECTION_STRING, file_system, new_source_path+latestFolder)
 file_name_list = [file for file in file_name_list if '.xlsx' in file]
 for new_source_file in file_name_list:
-  new_dataset = datalake_download(CONNECTION_STRING, file_system, new_source_path+latestFolder, new_source_file)
-  new_dataframe = pd.read_excel(io.BytesIO(new_dataset), sheet_name = "Sheet1", header = 0, engine='openpyxl') 
+  new_dataframe = read_landed_sheet(CONNECTION_STRING, file_system, new_source_path+latestFolder, new_source_file, sheet_name = "Sheet1") 
 
 # COMMAND ----------
 
@@ -0,0 +1,92 @@
+# Databricks notebook source
+#!/usr/bin python3
+
+# -------------------------------------------------------------------------
+# Copyright (c) 2021 NHS England and NHS Improvement. All rights reserved.
+# Licensed under the MIT License. See license.txt in the project root for
+# license information.
+# -------------------------------------------------------------------------
+
+"""
+FILE:           dbrks_date_functions.py
+DESCRIPTION:
+                Vectorised date functions (parsing, formatting, financial year and quarter,
+                month end, week commencing, period keys) shared by the ingestion and analytics
+                notebooks
+USAGE:
+                %run after dbrks_helper_functions
+CONTRIBUTORS:   Data Engineering Team
+CONTACT:        data@nhsx.nhs.uk
+CREATED:        19 Oct. 2026
+VERSION:        0.0.1
+"""
+
+# COMMAND ----------
+
+# Parsing and formatting functions
+# -------------------------------------------------------------------------
+# Date columns repeat a handful of values (one per day, week or month) over many rows, so
+# values are parsed or formatted once per unique value and mapped back onto the rows.
+def map_unique_values(values, func):
+  values = pd.Series(values)
+  codes, uniques = pd.factorize(values)
+  mapped = pd.Series(func(pd.Series(uniques)))
+  # code -1 (missing value) picks the appended missing value
+  mapped = pd.concat([mapped.reset_index(drop=True), pd.Series([pd.NA], dtype=mapped.dtype if mapped.dtype != bool else object)], ignore_index=True)
+  return pd.Series(mapped.to_numpy()[codes], index=values.index, name=values.name)
+
+pandas_infers_single_format = int(pd.__version__.split('.')[0]) >= 2
+
+def parse_dates(values, format=None, dayfirst=False):
+  # explicit format for strings, falling back to inference if a value does not match it.
+  # pandas 2+ infers one format from the first value and raises on values written another
+  # way, so the fallback asks it to infer each value's format (format='mixed'). pandas 1.x
+  # infers per value already and has no 'mixed'
+  def parse(uniques):
+    if format is not None and uniques.map(lambda value: isinstance(value, str)).all():
+      try:
+        return pd.to_datetime(uniques, format=format)
+      except ValueError:
+        pass
+    if pandas_infers_single_format:
+      return pd.to_datetime(uniques, format='mixed', dayfirst=dayfirst)
+    return pd.to_datetime(uniques, dayfirst=dayfirst)
+  return pd.to_datetime(map_unique_values(values, parse))
+
+def format_dates(values, format="%Y-%m-%d"):
+  return map_unique_values(parse_dates(values), lambda uniques: uniques.dt.strftime(format))
+
+def normalise_date_strings(values, format="%Y-%m-%d", input_format=None):
+  # replaces pd.to_datetime(col).dt.strftime(format) round trips
+  return map_unique_values(values, lambda uniques: parse_dates(uniques, input_format).dt.strftime(format))
+
+# COMMAND ----------
+
+# Derived period functions
+# -------------------------------------------------------------------------
+# All take a datetime series (see parse_dates) and return a series of the same length.
+# Financial years run from April to March and are labelled "2022/2023".
+def financial_year_start(dates):
+  dates = pd.to_datetime(dates)
+  return dates.dt.year - (dates.dt.month <= 3).astype(int)
+
+def financial_year(dates):
+  start = financial_year_start(dates)
+  return map_unique_values(start, lambda uniques: uniques.astype(int).astype(str) + "/" + (uniques.astype(int) + 1).astype(str))
+
+def financial_quarter(dates):
+  # April-June is quarter 1
+  dates = pd.to_datetime(dates)
+  return (dates.dt.month - 4) % 12 // 3 + 1
+
+def month_end(dates):
+  return pd.to_datetime(dates).dt.normalize() + pd.offsets.MonthEnd(n=0)
+
+def week_commencing(dates, week_start=0):
+  # week_start 0 is Monday
+  dates = pd.to_datetime(dates).dt.normalize()
+  return dates - pd.to_timedelta((dates.dt.weekday - week_start) % 7, unit="D")
+
+def period_key(dates, freq="M"):
+  # "2023-04" for months, "2023Q2" for calendar quarters, "2023" for years
+  return map_unique_values(pd.to_datetime(dates).dt.to_period(freq), lambda uniques: uniques.astype(str))
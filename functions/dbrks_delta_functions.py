@@ -0,0 +1,110 @@
+# Databricks notebook source
+#!/usr/bin python3
+
+# -------------------------------------------------------------------------
+# Copyright (c) 2021 NHS England and NHS Improvement. All rights reserved.
+# Licensed under the MIT License. See license.txt in the project root for
+# license information.
+# -------------------------------------------------------------------------
+
+"""
+FILE:           dbrks_delta_functions.py
+DESCRIPTION:
+                Delta Lake copies of metric proc outputs, typed and partitioned by month, merged
+                incrementally and Z-ordered, read back by the table builders column by column
+USAGE:
+                %run after dbrks_helper_functions and dbrks_date_functions
+CONTRIBUTORS:   Data Engineering Team
+CONTACT:        data@nhsx.nhs.uk
+CREATED:        19 Oct. 2026
+VERSION:        0.0.1
+"""
+
+# COMMAND ----------
+
+# Imports
+# -------------------------------------------------------------------------
+import re
+
+# COMMAND ----------
+
+# Delta table functions
+# -------------------------------------------------------------------------
+# A metric notebook writes a Delta copy of its csv output when its config entry in 'project'
+# -> 'databricks' has a 'delta' section:
+#   "delta": {"sink_path": ..., "schema": {column: 'date' | 'int' | 'float'},
+#             "key_cols": [...], "period_col": "Date", "zorder_cols": ["Practice code"],
+#             "index_col": "Unique ID"}
+# Columns are typed with enforce_schema (other columns are strings) and renamed to Delta
+# column names ("Practice code" is Practice_code). Rows are partitioned by the month of
+# period_col (Period=2023-04) and merged on key_cols: only rows whose values changed are
+# rewritten, and rows no longer in the output are deleted from the months it covers.
+# The partitions written are then Z-ordered on zorder_cols.
+# The dataframe's index is a row number that shifts whenever a practice is added, so it is
+# dropped unless a table builder uses it (index_col). It is then kept as that column but
+# left out of the change test, so a shifted row number alone does not rewrite a row.
+DELTA_PERIOD_COL = "Period"
+
+def delta_column_name(col):
+  return re.sub(r'[^0-9A-Za-z_]', '_', str(col))
+
+def datalake_spark_path(CONNECTION_STRING, file_system, path):
+  # abfss location of a Data Lake path, with the account key of the connection string set for Spark
+  settings = dict(part.split('=', 1) for part in CONNECTION_STRING.strip().strip(';').split(';'))
+  account = settings['AccountName']
+  endpoint = account + ".dfs." + settings.get('EndpointSuffix', "core.windows.net")
+  get_spark().conf.set("fs.azure.account.key." + endpoint, settings['AccountKey'])
+  return "abfss://" + file_system + "@" + endpoint + "/" + path.strip('/')
+
+def delta_frame(df, delta_config):
+  if 'index_col' in delta_config:
+    df = df.rename_axis(delta_config['index_col']).reset_index()
+  else:
+    df = df.reset_index(drop=True)
+  df = enforce_schema(df, delta_config.get('schema', {}))
+  df[DELTA_PERIOD_COL] = period_key(df[delta_config['period_col']])
+  return df.rename(columns=delta_column_name)
+
+def delta_condition(cols, template, separator):
+  return separator.join(template.format(col) for col in cols)
+
+def write_delta_table(df, CONNECTION_STRING, file_system, delta_config):
+  from delta.tables import DeltaTable
+  spark = get_spark()
+  path = datalake_spark_path(CONNECTION_STRING, file_system, delta_config['sink_path'])
+  df_delta = delta_frame(df, delta_config)
+  sparkDF = spark.createDataFrame(df_delta)
+  periods = ", ".join("'" + period + "'" for period in sorted(df_delta[DELTA_PERIOD_COL].unique()))
+
+  with telemetry_section('write_delta_table', delta_config['sink_path']) as record:
+    record['rows'] = len(df_delta)
+    if not DeltaTable.isDeltaTable(spark, path):
+      sparkDF.write.format("delta").partitionBy(DELTA_PERIOD_COL).save(path)
+      changed = True
+    else:
+      key_cols = [DELTA_PERIOD_COL] + [delta_column_name(col) for col in delta_config['key_cols']]
+      unchanged_cols = key_cols + [delta_column_name(delta_config['index_col'])] if 'index_col' in delta_config else key_cols
+      value_cols = [col for col in df_delta.columns if col not in unchanged_cols]
+      delta_table = DeltaTable.forPath(spark, path)
+      (delta_table.alias("t")
+        .merge(sparkDF.alias("s"), delta_condition(key_cols, "t.`{0}` <=> s.`{0}`", " AND "))
+        .whenMatchedUpdateAll(condition=delta_condition(value_cols, "NOT (t.`{0}` <=> s.`{0}`)", " OR ") or None)
+        .whenNotMatchedInsertAll()
+        .whenNotMatchedBySourceDelete(condition="t.`" + DELTA_PERIOD_COL + "` IN (" + periods + ")")
+        .execute())
+      metrics = delta_table.history(1).collect()[0]['operationMetrics']
+      changed = any(int(metrics.get(metric, 0)) > 0 for metric in ['numTargetRowsInserted', 'numTargetRowsUpdated', 'numTargetRowsDeleted'])
+
+    zorder_cols = [delta_column_name(col) for col in delta_config.get('zorder_cols', [])]
+    if changed and zorder_cols:
+      spark.sql("OPTIMIZE delta.`" + path + "` WHERE `" + DELTA_PERIOD_COL + "` IN (" + periods + ") ZORDER BY (" + delta_condition(zorder_cols, "`{0}`", ", ") + ")")
+  return '200 OK'
+
+def read_delta_table(CONNECTION_STRING, file_system, delta_config, columns=None, periods=None):
+  # Spark dataframe of a Delta copy, reading only the given columns (csv names) and Period partitions
+  sparkDF = get_spark().read.format("delta").load(datalake_spark_path(CONNECTION_STRING, file_system, delta_config['sink_path']))
+  if periods is not None:
+    sparkDF = sparkDF.where(sparkDF[DELTA_PERIOD_COL].isin(list(periods)))
+  if columns is not None:
+    sparkDF = sparkDF.select(*[delta_column_name(col) for col in columns])
+  return sparkDF
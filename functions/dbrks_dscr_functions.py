@@ -0,0 +1,181 @@
+# Databricks notebook source
+#!/usr/bin python3
+
+# -------------------------------------------------------------------------
+# Copyright (c) 2021 NHS England and NHS Improvement. All rights reserved.
+# Licensed under the MIT License. See license.txt in the project root for
+# license information.
+# -------------------------------------------------------------------------
+
+"""
+FILE:           dbrks_dscr_functions.py
+DESCRIPTION:
+                Functions shared by the CQC Digital Social Care Record (DSCR) analytics notebooks
+USAGE:
+                %run after dbrks_helper_functions
+CONTRIBUTORS:   Abdu Nuhu, Martina Fonseca
+CONTACT:        data@nhsx.nhs.uk
+CREATED:        19 Oct. 2026
+VERSION:        0.0.1
+"""
+
+# COMMAND ----------
+
+# Imports
+# -------------------------------------------------------------------------
+import io
+import hashlib
+
+# COMMAND ----------
+
+# Cumulative PIR status functions
+# -------------------------------------------------------------------------
+# For every location-month, count the Yes/No DSCR answers a location has submitted in
+# its PIRs up to the end of that month. Submissions are sorted once per location and
+# turned into running totals, and each month end picks up the latest running total
+# with an as-of join, so no location-month x submission cross product is built.
+def dscr_pir_running_totals(df_pir, response_col="Use a Digital Social Care Record system?"):
+  df_subs = df_pir[["Location_Id", "PIR submission date", response_col]].copy()
+  df_subs["PIR submission date"] = pd.to_datetime(df_subs["PIR submission date"])
+  df_subs = df_subs.dropna(subset=["Location_Id", "PIR submission date"])
+  df_subs["yes"] = (df_subs[response_col] == "Yes").astype(int)
+  df_subs["no"] = (df_subs[response_col] == "No").astype(int)
+  df_subs = df_subs.sort_values(["Location_Id", "PIR submission date"], kind="mergesort")
+  df_subs["YEStodate"] = df_subs.groupby("Location_Id")["yes"].cumsum()
+  df_subs["NOtodate"] = df_subs.groupby("Location_Id")["no"].cumsum()
+  # several submissions on the same day: the last running total includes them all
+  df_subs = df_subs.drop_duplicates(["Location_Id", "PIR submission date"], keep="last")
+  return df_subs[["Location_Id", "PIR submission date", "YEStodate", "NOtodate"]]
+
+def dscr_pir_status(df):
+  conditions = [(df["YEStodate"] >= 1),
+                (df["YEStodate"] < 1) & (df["NOtodate"] >= 1),
+                (df["YEStodate"] + df["NOtodate"] == 0)]
+  PIRstatus = ["Yes", "No", "None"]
+  return np.select(conditions, PIRstatus, default="None")
+
+def dscr_cumulative_pir_status(df_locations, df_pir, group_cols, month_col="monthly_date"):
+  df_months = df_locations.dropna(subset=[month_col]).copy()
+  df_months["eo_monthly_date"] = df_months[month_col] + pd.offsets.MonthEnd(n=0)
+  df_months["Location_Id"] = df_months["Location_Id"].astype(str)
+  df_subs = dscr_pir_running_totals(df_pir)
+  df_subs["Location_Id"] = df_subs["Location_Id"].astype(str)
+  df_status = pd.merge_asof(df_months.sort_values("eo_monthly_date"),
+                            df_subs.sort_values("PIR submission date"),
+                            left_on="eo_monthly_date",
+                            right_on="PIR submission date",
+                            by="Location_Id",
+                            direction="backward")
+  df_status[["YEStodate", "NOtodate"]] = df_status[["YEStodate", "NOtodate"]].fillna(0).astype(int)
+  df_status_sum = df_status.groupby(group_cols + ["eo_monthly_date"], observed=True)[["YEStodate", "NOtodate"]].sum().reset_index()
+  df_status_sum["PIR_todate"] = dscr_pir_status(df_status_sum)
+  return df_status_sum
+
+# COMMAND ----------
+
+# Shared DSCR base join
+# -------------------------------------------------------------------------
+# Every DSCR notebook joins the CQC HSCA locations to the CCG/ICB/region reference table.
+# The join is materialised once per pair of input file versions under
+# <base_sink_path>/<version key>/ and read back by the notebooks, so it is only rebuilt
+# when the CQC or the reference file changes (or DSCR_BASE_VERSION is bumped).
+DSCR_BASE_VERSION = "2"
+
+dscr_cqc_columns = {
+  'Location ID': 'Location_Id',
+  'Location Name': 'Location_Name',
+  'Dormant (Y/N)': 'Is_Domant',
+  'Care home?': 'Is_Care_Home',
+  'Care homes beds': 'Care_Home_Beds',
+  'Location Inspection Directorate': 'Location_Inspection_Directorate',
+  'Location Primary Inspection Category': 'Location_Primary_Inspection_Category',
+  'Location Local Authority': 'Location_Local_Authority',
+  'Location ONSPD CCG Code': 'CCG_ONS_Code',
+  'Location ONSPD CCG': 'Location_ONSPD_CCG_Name',
+  'Provider ID': 'Provider_ID',
+  'Provider Name': 'Provider_Name',
+  'Provider Local Authority': 'Provider_Local_Authority',
+  'Provider NHS Region': 'Provider_NHS_Region',
+  'Provider Inspection Directorate': 'Provider_Inspection_Directorate',
+  'Provider Primary Inspection Category': 'Provider_Primary_Inspection_Category',
+  'Provider Postal Code': 'Provider_Postal_Code',
+  'Location Postal Code': 'Location_Postal_Code',
+  'Location HSCA start date': 'Location_HSCA_Start_Date',
+  'run_date': 'monthly_date'
+}
+
+dscr_ref_columns = ['CCG_ONS_Code', 'CCG_ODS_Code', 'CCG_Name', 'CCG21CD', 'ICB_ONS_Code', 'ICB_Code', 'ICB_Name', 'Region_Code', 'Region_Name', 'Last_Refreshed']
+
+# Low-cardinality location attributes repeated on every location-month row are held as
+# categoricals (dictionary encoded in the parquet file, so they are read back as categoricals).
+# Group by them with observed=True, otherwise pandas returns every combination of categories.
+dscr_categorical_columns = ['Is_Domant', 'Is_Care_Home', 'Location_Inspection_Directorate', 'Location_Primary_Inspection_Category',
+                            'Location_Local_Authority', 'Location_ONSPD_CCG_Name', 'Provider_Local_Authority', 'Provider_NHS_Region',
+                            'Provider_Inspection_Directorate', 'Provider_Primary_Inspection_Category',
+                            'CCG_Name', 'ICB_ONS_Code', 'ICB_Code', 'ICB_Name', 'Region_Code', 'Region_Name']
+
+def dscr_join_column_name(col, side):
+  # CCG_ONS_Code is on both sides of the join and is suffixed by the merge
+  if col == 'CCG_ONS_Code':
+    return col + ('_x' if side == 'cqc' else '_y')
+  return col
+
+def dscr_build_base_join(df, df_ref):
+  df_cqc = df[list(dscr_cqc_columns)].drop_duplicates().rename(columns=dscr_cqc_columns)
+  df_ref = df_ref[dscr_ref_columns].drop_duplicates().reset_index(drop=True)
+  df_join = df_cqc.merge(df_ref, how='outer', left_on='CCG_ONS_Code', right_on='CCG21CD')
+  df_join = df_join.round(4)
+  df_join = df_join.astype({col: 'category' for col in dscr_categorical_columns})
+  return df_join.reset_index(drop=True)
+
+def dscr_base_version_key(CONNECTION_STRING, file_system, source_path, source_file, reference_path, reference_file):
+  latestFolder = datalake_latestFolder(CONNECTION_STRING, file_system, source_path)
+  ref_latestFolder = datalake_latestFolder(CONNECTION_STRING, file_system, reference_path)
+  versions = [DSCR_BASE_VERSION,
+              source_path + latestFolder + source_file,
+              datalake_file_etag(CONNECTION_STRING, file_system, source_path + latestFolder, source_file),
+              reference_path + ref_latestFolder + reference_file,
+              datalake_file_etag(CONNECTION_STRING, file_system, reference_path + ref_latestFolder, reference_file)]
+  version_key = hashlib.sha1("|".join(versions).encode("utf-8")).hexdigest()[:16]
+  return version_key, latestFolder, ref_latestFolder
+
+def dscr_load_base_join(CONNECTION_STRING, file_system, config_JSON, force_rebuild=False):
+  source_path = config_JSON['pipeline']['project']['source_path']
+  source_file = config_JSON['pipeline']['project']['source_file']
+  reference_path = config_JSON['pipeline']['project']['reference_source_path']
+  reference_file = config_JSON['pipeline']['project']['reference_source_file']
+  base_path = config_JSON['pipeline']['project']['base_sink_path']
+  base_file = config_JSON['pipeline']['project']['base_sink_file']
+
+  version_key, latestFolder, ref_latestFolder = dscr_base_version_key(CONNECTION_STRING, file_system, source_path, source_file, reference_path, reference_file)
+  base_version_path = base_path + version_key + '/'
+  if not force_rebuild and datalake_file_exists(CONNECTION_STRING, file_system, base_version_path, base_file):
+    print("Reading DSCR base join " + base_version_path + base_file)
+    return datalake_read_parquet(CONNECTION_STRING, file_system, base_version_path, base_file)
+
+  print("Building DSCR base join " + base_version_path + base_file)
+  df = datalake_read_parquet(CONNECTION_STRING, file_system, source_path + latestFolder, source_file)
+  df_ref = datalake_read_parquet(CONNECTION_STRING, file_system, reference_path + ref_latestFolder, reference_file)
+  df_base = dscr_build_base_join(df, df_ref)
+
+  file_contents = io.BytesIO()
+  df_base.to_parquet(file_contents, engine="pyarrow")
+  datalake_upload(file_contents, CONNECTION_STRING, file_system, base_version_path, base_file)
+  return df_base
+
+def dscr_select_join(df_base, cqc_columns):
+  # project the base join onto the CQC columns a notebook uses, giving the same frame as
+  # de-duplicating those columns and merging them with the reference table
+  cols = [dscr_join_column_name(dscr_cqc_columns[col], 'cqc') for col in cqc_columns]
+  cols += [dscr_join_column_name(col, 'ref') for col in dscr_ref_columns]
+  df_join = df_base[cols].drop_duplicates().reset_index(drop=True)
+  df_join.index.name = "Unique ID"
+  return df_join
+
+def dscr_fillna(df, cols, value):
+  # a categorical column can only be filled with one of its categories
+  for col in cols:
+    if isinstance(df[col].dtype, pd.CategoricalDtype) and value not in df[col].cat.categories:
+      df[col] = df[col].cat.add_categories([value])
+  df[cols] = df[cols].fillna(value)
+  return df
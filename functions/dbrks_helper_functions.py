@@ -12,40 +12,261 @@ FILE:           dbrks_helper_functions.py
 DESCRIPTION:
                 Helper functons needed for the databricks processing step of ETL pipelines
 USAGE:
-                ...
+                %run from a notebook, or import with the functions folder on sys.path:
+                  import dbrks_helper_functions as helpers
+                  helpers.set_databricks_handles(spark, dbutils)
 CONTRIBUTORS:   Craig Shenton, Mattia Ficarelli, Kabir Khan, Faaiz Shanawas, Abdu Nuhu
 CONTACT:        data@nhsx.nhs.uk
 CREATED:        20 Jan 2023
-VERSION:        0.0.3
+VERSION:        0.0.4
 """
 
 # COMMAND ----------
 
+# Imports
+# -------------------------------------------------------------------------
+# Only the modules every pipeline needs are imported here. The Data Lake client, requests
+# and BeautifulSoup are imported by the functions that use them, so importing or running
+# this module does not pay for them.
+import io
+import os
+import re
+import json
+import hashlib
+import time
+import uuid
+import tempfile
+from datetime import datetime
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import numpy as np
+
+# COMMAND ----------
+
+# Runtime handles
+# -------------------------------------------------------------------------
+# spark, dbutils and DataLakeServiceClient are looked up in the module globals: after %run
+# these are the notebook's own, an importing script passes them to set_databricks_handles.
+# Without either, the Databricks runtime handles are created on first use.
+def set_databricks_handles(spark=None, dbutils=None, DataLakeServiceClient=None):
+  handles = {'spark': spark, 'dbutils': dbutils, 'DataLakeServiceClient': DataLakeServiceClient}
+  globals().update({name: handle for name, handle in handles.items() if handle is not None})
+
+def get_spark():
+  if 'spark' not in globals():
+    from pyspark.sql import SparkSession
+    globals()['spark'] = SparkSession.builder.getOrCreate()
+  return globals()['spark']
+
+def get_dbutils():
+  if 'dbutils' not in globals():
+    from pyspark.dbutils import DBUtils
+    globals()['dbutils'] = DBUtils(get_spark())
+  return globals()['dbutils']
+
+# one client per connection string, reused by every Data Lake call of the notebook
+datalake_service_clients = {}
+
+def datalake_service_client(CONNECTION_STRING):
+  if 'DataLakeServiceClient' not in globals():
+    from azure.storage.filedatalake import DataLakeServiceClient
+    globals()['DataLakeServiceClient'] = DataLakeServiceClient
+  client_class = globals()['DataLakeServiceClient']
+  if (client_class, CONNECTION_STRING) not in datalake_service_clients:
+    datalake_service_clients[(client_class, CONNECTION_STRING)] = client_class.from_connection_string(CONNECTION_STRING)
+  return datalake_service_clients[(client_class, CONNECTION_STRING)]
+
+# COMMAND ----------
+
+# Telemetry functions
+# -------------------------------------------------------------------------
+# The Data Lake and SQL helpers record their duration, bytes, rows and calling notebook, and
+# telemetry_section records any other part of a notebook:
+#   with telemetry_section('processing'):
+#     ...
+# Records are kept in telemetry_records and appended to a spool file on the driver's local
+# disk, in a folder of their run. Child notebooks run by an orchestrator are separate Python
+# processes on the same driver: run_stage passes them the orchestrator's run id as the
+# telemetry_run_id argument, so they spool into its folder, and flush_telemetry in the
+# orchestrator's finally block collects the records of that run alone into
+# <telemetry_sink_path><date>/<run id>.parquet. Folders left by runs that never flushed
+# (interactive runs of a metric notebook) are removed after telemetry_spool_max_age_days.
+telemetry_spool_dir = os.path.join(tempfile.gettempdir(), "dbrks_telemetry")
+telemetry_spool_max_age_days = 2
+telemetry_sink_path = "proc/telemetry/dbrks_io/"
+telemetry_records = []
+telemetry_context = {}
+
+def telemetry_run_id():
+  if 'run_id' not in telemetry_context:
+    run_id = None
+    if 'dbutils' in globals():
+      try:
+        run_id = get_dbutils().widgets.get("telemetry_run_id") or None
+      except Exception:
+        run_id = None
+    telemetry_context['run_id'] = run_id or datetime.now().strftime('%Y%m%d%H%M%S') + '_' + uuid.uuid4().hex[:8]
+  return telemetry_context['run_id']
+
+def telemetry_run_spool_dir(run_id=None):
+  return os.path.join(telemetry_spool_dir, run_id or telemetry_run_id())
+
+def telemetry_notebook():
+  if 'notebook' not in telemetry_context:
+    try:
+      telemetry_context['notebook'] = get_dbutils().notebook.entry_point.getDbutils().notebook().getContext().notebookPath().get()
+    except Exception:
+      telemetry_context['notebook'] = None
+  return telemetry_context['notebook']
+
+@contextmanager
+def telemetry_section(operation, target=None):
+  record = {'run_id': telemetry_run_id(), 'notebook': telemetry_notebook(), 'operation': operation, 'target': target,
+            'started_at': datetime.now().isoformat(), 'seconds': None, 'bytes': None, 'rows': None, 'status': 'succeeded'}
+  start = time.perf_counter()
+  try:
+    yield record
+  except Exception:
+    record['status'] = 'failed'
+    raise
+  finally:
+    record['seconds'] = round(time.perf_counter() - start, 4)
+    telemetry_records.append(record)
+    try:
+      os.makedirs(telemetry_run_spool_dir(), exist_ok=True)
+      with open(os.path.join(telemetry_run_spool_dir(), str(os.getpid()) + ".jsonl"), "a") as f:
+        f.write(json.dumps(record, default=str) + "\n")
+    except OSError:
+      pass
+
+def telemetry_summary(df_telemetry):
+  # time, bytes and rows per notebook and operation, slowest first
+  df_summary = df_telemetry.groupby(['notebook', 'operation'], dropna=False).agg(
+    calls=('seconds', 'size'), seconds=('seconds', 'sum'), bytes=('bytes', 'sum'), rows=('rows', 'sum'), failed=('status', lambda status: (status == 'failed').sum()))
+  return df_summary.sort_values('seconds', ascending=False).reset_index()
+
+def prune_telemetry_spool():
+  # remove the spool folders of other runs that were never flushed
+  if not os.path.isdir(telemetry_spool_dir):
+    return
+  cutoff = time.time() - telemetry_spool_max_age_days * 86400
+  for run_id in os.listdir(telemetry_spool_dir):
+    run_dir = os.path.join(telemetry_spool_dir, run_id)
+    if run_id != telemetry_run_id() and os.path.isdir(run_dir) and os.path.getmtime(run_dir) < cutoff:
+      for file in os.listdir(run_dir):
+        os.remove(os.path.join(run_dir, file))
+      os.rmdir(run_dir)
+
+def flush_telemetry(CONNECTION_STRING, file_system, sink_path=telemetry_sink_path, table_name=None):
+  # spool files are renamed before they are read, a record written after that starts a new file
+  run_dir = telemetry_run_spool_dir()
+  spool_files = []
+  if os.path.isdir(run_dir):
+    for file in os.listdir(run_dir):
+      if file.endswith(".jsonl"):
+        spool_files.append(os.path.join(run_dir, file + "." + uuid.uuid4().hex[:8] + ".flushing"))
+        os.replace(os.path.join(run_dir, file), spool_files[-1])
+  records = []
+  for spool_file in spool_files:
+    with open(spool_file) as f:
+      records += [json.loads(line) for line in f if line.strip()]
+  if not records:
+    # the spool could not be written, flush this notebook's own records
+    records = list(telemetry_records)
+  if records:
+    df_telemetry = pd.DataFrame(records)
+    df_telemetry['flushed_by'] = telemetry_run_id()
+    print(telemetry_summary(df_telemetry).head(20).to_string(index=False))
+
+    file_contents = io.BytesIO()
+    df_telemetry.astype({'bytes': 'float64', 'rows': 'float64'}).to_parquet(file_contents, engine="pyarrow")
+    datalake_upload(file_contents, CONNECTION_STRING, file_system, sink_path + datetime.now().strftime('%Y-%m-%d') + '/', telemetry_run_id() + '.parquet')
+    if table_name is not None:
+      write_to_sql(df_telemetry, table_name, "append")
+  else:
+    df_telemetry = None
+  for spool_file in spool_files:
+    os.remove(spool_file)
+  # the records of the flush itself
+  own_spool_file = os.path.join(run_dir, str(os.getpid()) + ".jsonl")
+  if os.path.exists(own_spool_file):
+    os.remove(own_spool_file)
+  if os.path.isdir(run_dir) and not os.listdir(run_dir):
+    os.rmdir(run_dir)
+  telemetry_records.clear()
+  prune_telemetry_spool()
+  return df_telemetry
+
+# COMMAND ----------
+
 # Helper functions
 # -------------------------------------------------------------------------
+# Transfers are split into datalake_chunk_size range requests, datalake_max_concurrency at
+# a time. Uploads read a BytesIO in place rather than copying it with getvalue, and
+# datalake_read_parquet streams a file to the driver's local disk and memory maps it, so a
+# large historical parquet is not held in memory as bytes next to its dataframe.
+datalake_max_concurrency = 8
+datalake_chunk_size = 8 * 2**20
+
 def datalake_download(CONNECTION_STRING, file_system, source_path, source_file):
-    service_client = DataLakeServiceClient.from_connection_string(CONNECTION_STRING)
+  with telemetry_section('datalake_download', source_path + source_file) as record:
+    service_client = datalake_service_client(CONNECTION_STRING)
     file_system_client = service_client.get_file_system_client(file_system=file_system)
     directory_client = file_system_client.get_directory_client(source_path)
     file_client = directory_client.get_file_client(source_file)
-    download = file_client.download_file()
+    download = file_client.download_file(max_concurrency=datalake_max_concurrency)
     downloaded_bytes = download.readall()
+    record['bytes'] = len(downloaded_bytes)
     return downloaded_bytes
-  
+
+@contextmanager
+def datalake_local_file(CONNECTION_STRING, file_system, source_path, source_file):
+  # path of a temporary local copy of a Data Lake file, removed on exit
+  local_file = tempfile.NamedTemporaryFile(suffix="_" + os.path.basename(source_file), delete=False)
+  try:
+    with telemetry_section('datalake_download', source_path + source_file) as record:
+      service_client = datalake_service_client(CONNECTION_STRING)
+      file_system_client = service_client.get_file_system_client(file_system=file_system)
+      file_client = file_system_client.get_directory_client(source_path).get_file_client(source_file)
+      with local_file:
+        record['bytes'] = file_client.download_file(max_concurrency=datalake_max_concurrency).readinto(local_file)
+    yield local_file.name
+  finally:
+    os.remove(local_file.name)
+
+def datalake_read_parquet(CONNECTION_STRING, file_system, source_path, source_file, columns=None):
+  with datalake_local_file(CONNECTION_STRING, file_system, source_path, source_file) as local_path:
+    return pd.read_parquet(local_path, columns=columns, engine="pyarrow", memory_map=True)
+
 def datalake_upload(file, CONNECTION_STRING, file_system, sink_path, sink_file):
-    service_client = DataLakeServiceClient.from_connection_string(CONNECTION_STRING)
+  with telemetry_section('datalake_upload', sink_path + sink_file) as record:
+    service_client = datalake_service_client(CONNECTION_STRING)
     file_system_client = service_client.get_file_system_client(file_system=file_system)
     directory_client = file_system_client.get_directory_client(sink_path)
     file_client = directory_client.create_file(sink_file)
-    file_length = file_contents.tell()
-    file_client.upload_data(file_contents.getvalue(), length=file_length, overwrite=True)
+    file_length = file.tell()
+    if isinstance(file, io.StringIO):
+      # text is encoded once, the length is then in bytes rather than characters
+      data = file.getvalue()[:file_length].encode("utf-8")
+      file_length = len(data)
+    else:
+      file.seek(0)
+      data = file
+    file_client.upload_data(data, length=file_length, overwrite=True, max_concurrency=datalake_max_concurrency, chunk_size=datalake_chunk_size)
+    if data is file:
+      file.seek(file_length)
+    record['bytes'] = file_length
     return '200 OK'
-  
+
 def datalake_latestFolder(CONNECTION_STRING, file_system, source_path):
   try:
-      service_client = DataLakeServiceClient.from_connection_string(CONNECTION_STRING)
+    with telemetry_section('datalake_latestFolder', source_path) as record:
+      service_client = datalake_service_client(CONNECTION_STRING)
       file_system_client = service_client.get_file_system_client(file_system=file_system)
       pathlist = list(file_system_client.get_paths(source_path))
+      record['rows'] = len(pathlist)
       folders = []
       # remove file_path and source_file from list
       for path in pathlist:
@@ -58,9 +279,11 @@ def datalake_latestFolder(CONNECTION_STRING, file_system, source_path):
 
 def datalake_list_folders(CONNECTION_STRING, file_system, source_path):
   try:
-      service_client = DataLakeServiceClient.from_connection_string(CONNECTION_STRING)
+    with telemetry_section('datalake_list_folders', source_path) as record:
+      service_client = datalake_service_client(CONNECTION_STRING)
       file_system_client = service_client.get_file_system_client(file_system=file_system)
       pathlist = list(file_system_client.get_paths(source_path))
+      record['rows'] = len(pathlist)
       folders = []
       # remove file_path and source_file from list
       for path in pathlist:
@@ -71,70 +294,539 @@ def datalake_list_folders(CONNECTION_STRING, file_system, source_path):
   except Exception as e:
       print(e)
 
+def datalake_file_exists(CONNECTION_STRING, file_system, source_path, source_file):
+  with telemetry_section('datalake_file_exists', source_path + source_file):
+    service_client = datalake_service_client(CONNECTION_STRING)
+    file_system_client = service_client.get_file_system_client(file_system=file_system)
+    file_client = file_system_client.get_directory_client(source_path).get_file_client(source_file)
+    return file_client.exists()
+
+def datalake_file_etag(CONNECTION_STRING, file_system, source_path, source_file):
+  with telemetry_section('datalake_file_etag', source_path + source_file):
+    service_client = datalake_service_client(CONNECTION_STRING)
+    file_system_client = service_client.get_file_system_client(file_system=file_system)
+    file_client = file_system_client.get_directory_client(source_path).get_file_client(source_file)
+    return file_client.get_file_properties().etag
+
 def write_to_sql(df_processed, table_name, write_mode = str):
-  sparkDF=spark.createDataFrame(df_processed)
-  server_name = dbutils.secrets.get(scope="sqldatabase", key="SERVER_NAME")
-  database_name = dbutils.secrets.get(scope="sqldatabase", key="DATABASE_NAME")
-  url = server_name + ";" + "databaseName=" + database_name + ";"
-  username = dbutils.secrets.get(scope="sqldatabase", key="USER_NAME")
-  password = dbutils.secrets.get(scope="sqldatabase", key="PASSWORD")
-  try:
-    sparkDF.write \
-    .format("com.microsoft.sqlserver.jdbc.spark") \
-    .mode(write_mode) \
-    .option("url", url) \
-    .option("dbtable", table_name) \
-    .option("user", username) \
-    .option("password", password) \
-    .save()
-    return print("Connector write succeed")
-  except ValueError as error:
-    return print("Connector write failed", error)
+  with telemetry_section('write_to_sql', table_name) as record:
+    record['rows'] = len(df_processed)
+    # write categorical columns as their plain values
+    categorical_cols = df_processed.select_dtypes(include='category').columns
+    if len(categorical_cols) > 0:
+      df_processed = df_processed.astype({col: 'object' for col in categorical_cols})
+    sparkDF=get_spark().createDataFrame(df_processed)
+    server_name = get_dbutils().secrets.get(scope="sqldatabase", key="SERVER_NAME")
+    database_name = get_dbutils().secrets.get(scope="sqldatabase", key="DATABASE_NAME")
+    url = server_name + ";" + "databaseName=" + database_name + ";"
+    username = get_dbutils().secrets.get(scope="sqldatabase", key="USER_NAME")
+    password = get_dbutils().secrets.get(scope="sqldatabase", key="PASSWORD")
+    try:
+      sparkDF.write \
+      .format("com.microsoft.sqlserver.jdbc.spark") \
+      .mode(write_mode) \
+      .option("url", url) \
+      .option("dbtable", table_name) \
+      .option("user", username) \
+      .option("password", password) \
+      .save()
+      return print("Connector write succeed")
+    except ValueError as error:
+      record['status'] = 'failed'
+      return print("Connector write failed", error)
 
 def write_spark_df_to_sql(sparkDF, table_name, write_mode = str):
-  server_name = dbutils.secrets.get(scope="sqldatabase", key="SERVER_NAME")
-  database_name = dbutils.secrets.get(scope="sqldatabase", key="DATABASE_NAME")
-  url = server_name + ";" + "databaseName=" + database_name + ";"
-  username = dbutils.secrets.get(scope="sqldatabase", key="USER_NAME")
-  password = dbutils.secrets.get(scope="sqldatabase", key="PASSWORD")
-  try:
-    sparkDF.write \
-    .format("com.microsoft.sqlserver.jdbc.spark") \
-    .mode(write_mode) \
-    .option("url", url) \
-    .option("dbtable", table_name) \
-    .option("user", username) \
-    .option("password", password) \
-    .save()
-    return print("Connector write succeed")
-  except ValueError as error:
-    return print("Connector write failed", error)
+  # rows are not counted, counting a Spark dataframe runs it a second time
+  with telemetry_section('write_spark_df_to_sql', table_name) as record:
+    server_name = get_dbutils().secrets.get(scope="sqldatabase", key="SERVER_NAME")
+    database_name = get_dbutils().secrets.get(scope="sqldatabase", key="DATABASE_NAME")
+    url = server_name + ";" + "databaseName=" + database_name + ";"
+    username = get_dbutils().secrets.get(scope="sqldatabase", key="USER_NAME")
+    password = get_dbutils().secrets.get(scope="sqldatabase", key="PASSWORD")
+    try:
+      sparkDF.write \
+      .format("com.microsoft.sqlserver.jdbc.spark") \
+      .mode(write_mode) \
+      .option("url", url) \
+      .option("dbtable", table_name) \
+      .option("user", username) \
+      .option("password", password) \
+      .save()
+      return print("Connector write succeed")
+    except ValueError as error:
+      record['status'] = 'failed'
+      return print("Connector write failed", error)
 
 # Read SQL Table ------------------
+# Spark reads are lazy, the time recorded is the time to set up the read, the rows are read
+# (and timed) by the section that collects them, e.g. toPandas()
 def read_sql_server_table(table_name):
-  server_name = dbutils.secrets.get(scope="sqldatabase", key="SERVER_NAME")
-  database_name = dbutils.secrets.get(scope="sqldatabase", key="DATABASE_NAME")
-  url = server_name + ";" + "databaseName=" + database_name + ";"
-  username = dbutils.secrets.get(scope="sqldatabase", key="USER_NAME")
-  password = dbutils.secrets.get(scope="sqldatabase", key="PASSWORD")
-  try:
-    sparkDF = spark.read \
-    .format("com.microsoft.sqlserver.jdbc.spark") \
-    .option("url", url) \
-    .option("dbtable", table_name) \
-    .option("user", username) \
-    .option("password", password) \
-    .load()
-    print("Connector write succeed")
-    return sparkDF
-  except ValueError as error:
-    return print("Connector write failed", error)
+  with telemetry_section('read_sql_server_table', table_name) as record:
+    server_name = get_dbutils().secrets.get(scope="sqldatabase", key="SERVER_NAME")
+    database_name = get_dbutils().secrets.get(scope="sqldatabase", key="DATABASE_NAME")
+    url = server_name + ";" + "databaseName=" + database_name + ";"
+    username = get_dbutils().secrets.get(scope="sqldatabase", key="USER_NAME")
+    password = get_dbutils().secrets.get(scope="sqldatabase", key="PASSWORD")
+    try:
+      sparkDF = get_spark().read \
+      .format("com.microsoft.sqlserver.jdbc.spark") \
+      .option("url", url) \
+      .option("dbtable", table_name) \
+      .option("user", username) \
+      .option("password", password) \
+      .load()
+      print("Connector write succeed")
+      return sparkDF
+    except ValueError as error:
+      record['status'] = 'failed'
+      return print("Connector write failed", error)
+
+# Read SQL query ------------------
+def read_sql_server_query(query):
+  with telemetry_section('read_sql_server_query', query[:200]) as record:
+    server_name = get_dbutils().secrets.get(scope="sqldatabase", key="SERVER_NAME")
+    database_name = get_dbutils().secrets.get(scope="sqldatabase", key="DATABASE_NAME")
+    url = server_name + ";" + "databaseName=" + database_name + ";"
+    username = get_dbutils().secrets.get(scope="sqldatabase", key="USER_NAME")
+    password = get_dbutils().secrets.get(scope="sqldatabase", key="PASSWORD")
+    try:
+      sparkDF = get_spark().read \
+      .format("com.microsoft.sqlserver.jdbc.spark") \
+      .option("url", url) \
+      .option("query", query) \
+      .option("user", username) \
+      .option("password", password) \
+      .load()
+      return sparkDF
+    except ValueError as error:
+      record['status'] = 'failed'
+      return print("Connector read failed", error)
+
+# Row counts of SQL tables from partition metadata ------------------
+# One query against sys.partitions (heap or clustered index rows) instead of reading and
+# counting each table. Returns {table name as given: row count}, tables not found are left out.
+def sql_server_row_counts(table_names):
+  names = {}
+  for table_name in table_names:
+    schema_name, _, name = table_name.rpartition('.')
+    names[((schema_name or 'dbo').lower(), name.lower())] = table_name
+  if not names:
+    return {}
+  in_list = ", ".join("'" + (schema_name + '.' + name).replace("'", "''") + "'" for schema_name, name in names)
+  query = """SELECT s.name AS schema_name, t.name AS table_name, SUM(p.rows) AS row_count
+FROM sys.tables t
+JOIN sys.schemas s ON s.schema_id = t.schema_id
+JOIN sys.partitions p ON p.object_id = t.object_id AND p.index_id IN (0, 1)
+WHERE s.name + '.' + t.name IN (""" + in_list + """)
+GROUP BY s.name, t.name"""
+  df_counts = read_sql_server_query(query).toPandas()
+  # SQL Server names are matched case-insensitively
+  return {names[(row.schema_name.lower(), row.table_name.lower())]: int(row.row_count) for row in df_counts.itertuples()}
+
+# COMMAND ----------
+
+# Pipeline config functions
+# -------------------------------------------------------------------------
+# Every metric notebook of a pipeline reads the same JSON config. load_pipeline_config keeps
+# the parsed config with its ETag in memory and on the driver's local disk, so the notebooks
+# of a run share one download and later calls only check the ETag. The config is validated
+# before it is returned, raising ValueError with the entries that are missing keys.
+# pipeline_metrics indexes it by metric short_name (and metadata id) so notebooks look up
+# their own sink_path, sink_file and sink_table by name instead of by list position.
+pipeline_config_cache_dir = os.path.join(tempfile.gettempdir(), "pipeline_config_cache")
+pipeline_config_cache = {}
+
+def pipeline_config_errors(config_JSON):
+  errors = []
+  pipeline = config_JSON.get('pipeline') if isinstance(config_JSON, dict) else None
+  if not isinstance(pipeline, dict):
+    return ["'pipeline' is missing"]
+  projects = pipeline.get('project', [])
+  for project in projects if isinstance(projects, list) else [projects]:
+    for index, item in enumerate(project.get('databricks') or []):
+      if 'databricks_notebook' not in item:
+        errors.append("'project' -> 'databricks' [" + str(index) + "] has no 'databricks_notebook'")
+      if 'metric' in item and not ('sink_path' in item and 'sink_file' in item):
+        errors.append("'project' -> 'databricks' [" + str(index) + "] (" + item['metric'] + ") has no 'sink_path' or 'sink_file'")
+      if not isinstance(item.get('memo', True), bool):
+        errors.append("'project' -> 'databricks' [" + str(index) + "] 'memo' is not true or false")
+      if 'delta' in item and not all(key in item['delta'] for key in ['sink_path', 'key_cols', 'period_col']):
+        errors.append("'project' -> 'databricks' [" + str(index) + "] 'delta' has no 'sink_path', 'key_cols' or 'period_col'")
+  staging = pipeline.get('staging') or []
+  for index, item in enumerate(staging if isinstance(staging, list) else [staging]):
+    if 'sink_table' not in item:
+      errors.append("'staging' [" + str(index) + "] has no 'sink_table'")
+  for product in config_JSON.get('metadata', {}).get('products', []):
+    for item in product.get('metrics', []):
+      if 'id' not in item or 'short_name' not in item:
+        errors.append("'metadata' metric " + json.dumps(item) + " has no 'id' or 'short_name'")
+  return errors
+
+def validate_pipeline_config(config_JSON, name="config"):
+  errors = pipeline_config_errors(config_JSON)
+  if errors:
+    raise ValueError("Invalid pipeline " + name + ":\n  " + "\n  ".join(errors))
+  return config_JSON
+
+def load_pipeline_config(CONNECTION_STRING, file_system, file_path_config, file_name_config):
+  cache_key = hashlib.sha1((file_system + "|" + file_path_config + file_name_config).encode("utf-8")).hexdigest()
+  cache_file = os.path.join(pipeline_config_cache_dir, cache_key + ".json")
+  etag = datalake_file_etag(CONNECTION_STRING, file_system, file_path_config, file_name_config)
+  cached = pipeline_config_cache.get(cache_key)
+  if cached is None and os.path.exists(cache_file):
+    with open(cache_file) as f:
+      cached = json.load(f)
+  if cached is not None and cached['etag'] == etag:
+    pipeline_config_cache[cache_key] = cached
+    return cached['config']
+
+  config_JSON = datalake_download(CONNECTION_STRING, file_system, file_path_config, file_name_config)
+  config_JSON = json.loads(io.BytesIO(config_JSON).read())
+  validate_pipeline_config(config_JSON, file_name_config)
+  cached = {'etag': etag, 'config': config_JSON}
+  pipeline_config_cache[cache_key] = cached
+  # write then rename, so notebooks running in parallel never read a partial file
+  os.makedirs(pipeline_config_cache_dir, exist_ok=True)
+  with open(cache_file + "." + str(os.getpid()), "w") as f:
+    json.dump(cached, f)
+  os.replace(cache_file + "." + str(os.getpid()), cache_file)
+  return config_JSON
+
+class PipelineMetrics(dict):
+  # a lookup of a metric the config does not list names it, instead of a bare KeyError
+  def __missing__(self, metric):
+    raise KeyError("metric " + repr(metric) + " is not in the pipeline config, add its '" + self.stage + "' and 'staging' entries")
+
+def pipeline_metrics(config_JSON, stage='project'):
+  # {short_name or id: {'metric', 'id', 'full_name', 'sink_path', 'sink_file', 'databricks_notebook', 'sink_table'}}
+  # with the keys the config has for that metric. Ids shared by several metrics are left out.
+  # stage names the entries merged with the staging ones ('project', 'raw' or 'proc', either a
+  # list of entries or a 'databricks' list); where both have a key the stage's value is kept.
+  metrics = PipelineMetrics()
+  metrics.stage = stage
+  ids = {}
+  for product in config_JSON.get('metadata', {}).get('products', []):
+    for item in product.get('metrics', []):
+      metrics.setdefault(item['short_name'], {'metric': item['short_name']}).update(id=item['id'], full_name=item.get('full_name'))
+      ids.setdefault(item['id'], set()).add(item['short_name'])
+  pipeline = config_JSON['pipeline']
+  entries = pipeline.get(stage) or []
+  staging = pipeline.get('staging') or []
+  items = list(staging) if isinstance(staging, list) else [staging]
+  items += [item for entry in (entries if isinstance(entries, list) else [entries]) for item in entry.get('databricks') or [entry]]
+  for item in items:
+    if 'metric' in item:
+      metrics.setdefault(item['metric'], {'metric': item['metric']}).update((key, value) for key, value in item.items() if key != 'metric')
+  for metric_id, short_names in ids.items():
+    if len(short_names) == 1 and metric_id not in metrics:
+      metrics[metric_id] = metrics[next(iter(short_names))]
+  return metrics
+
+# COMMAND ----------
+
+# Stage memo functions
+# -------------------------------------------------------------------------
+# An orchestrator runs each child notebook through run_stage, which skips the notebook when
+# its inputs are unchanged since its last successful run. The stage key hashes
+#   the pipeline config and the source files of its stage (path, latest folder and ETag)
+#   the workspace version of the notebook and of the functions folder it %runs
+# and is recorded under <stage_memo_path> once the notebook succeeds. A stage with an
+# unknown input (missing file, workspace API not reachable) always runs, as does every
+# stage when force_refresh is set. A notebook whose output depends on the run date as well
+# (a month or Date column stamped from datetime.now) has "memo": false in its config entry
+# and always runs.
+STAGE_MEMO_VERSION = "1"
+stage_memo_path = "proc/stage_memo/"
+workspace_versions = {}
+
+def pipeline_source_files(config_JSON, stage='project'):
+  # [(path, file)] of the <..>_path / <..>_file pairs of a config stage, sinks left out.
+  # source_file_daily pairs with source_path_daily, or source_path when there is none.
+  section = config_JSON['pipeline'].get(stage) or {}
+  if not isinstance(section, dict):
+    return []
+  source_files = []
+  for key, file in section.items():
+    if 'file' not in key or 'sink' in key or not isinstance(file, str):
+      continue
+    path_key = key.replace('file', 'path', 1)
+    if path_key not in section:
+      path_key = key[:key.index('file')] + 'path'
+    if path_key in section:
+      source_files.append((section[path_key], file))
+  return source_files
+
+def pipeline_stage_inputs(CONNECTION_STRING, file_system, file_path_config, file_name_config, stage='project'):
+  # version strings of a config and the source files of its stage, None when a file is missing
+  config_JSON = load_pipeline_config(CONNECTION_STRING, file_system, file_path_config, file_name_config)
+  inputs = [file_path_config + file_name_config, datalake_file_etag(CONNECTION_STRING, file_system, file_path_config, file_name_config)]
+  for source_path, source_file in pipeline_source_files(config_JSON, stage):
+    latestFolder = datalake_latestFolder(CONNECTION_STRING, file_system, source_path)
+    if latestFolder is None or not datalake_file_exists(CONNECTION_STRING, file_system, source_path + latestFolder, source_file):
+      print("Stage input " + source_path + source_file + " not found, the stage will not be skipped")
+      return None
+    inputs += [source_path + latestFolder + source_file, datalake_file_etag(CONNECTION_STRING, file_system, source_path + latestFolder, source_file)]
+  return inputs
+
+def workspace_api(endpoint, params):
+  import requests
+  context = get_dbutils().notebook.entry_point.getDbutils().notebook().getContext()
+  response = requests.get(context.apiUrl().get() + "/api/2.0/workspace/" + endpoint,
+                          headers={"Authorization": "Bearer " + context.apiToken().get()}, params=params, timeout=30)
+  response.raise_for_status()
+  return response.json()
+
+def workspace_version(path):
+  # object id and modification time of a workspace notebook, or of every notebook in a folder,
+  # None when the workspace API is not reachable from this notebook
+  if path not in workspace_versions:
+    try:
+      status = workspace_api("get-status", {'path': path})
+      if status.get('object_type') == 'DIRECTORY':
+        objects = workspace_api("list", {'path': path}).get('objects', [])
+      else:
+        objects = [status]
+      if any('modified_at' not in item for item in objects):
+        raise ValueError("No modification time for " + path)
+      workspace_versions[path] = "|".join(sorted(item['path'] + ":" + str(item.get('object_id')) + ":" + str(item['modified_at']) for item in objects))
+    except Exception as e:
+      print("Workspace version of " + path + " unknown: " + str(e))
+      workspace_versions[path] = None
+  return workspace_versions[path]
+
+def stage_key(notebook_path, stage_inputs):
+  if stage_inputs is None:
+    return None
+  functions_path = notebook_path.split('/au-azure-databricks-cicd/')[0] + '/au-azure-databricks-cicd/functions'
+  versions = [workspace_version(notebook_path), workspace_version(functions_path)]
+  if None in versions:
+    return None
+  return hashlib.sha1("|".join([STAGE_MEMO_VERSION, notebook_path] + versions + list(stage_inputs)).encode("utf-8")).hexdigest()
+
+def stage_memo_file(notebook_path):
+  return notebook_path.strip('/').replace('/', '__') + '.json'
+
+def stage_is_current(CONNECTION_STRING, file_system, notebook_path, key):
+  memo_file = stage_memo_file(notebook_path)
+  if key is None or not datalake_file_exists(CONNECTION_STRING, file_system, stage_memo_path, memo_file):
+    return False
+  memo = json.loads(datalake_download(CONNECTION_STRING, file_system, stage_memo_path, memo_file))
+  return memo.get('key') == key
+
+def record_stage(CONNECTION_STRING, file_system, notebook_path, key):
+  memo = {'key': key, 'notebook': notebook_path, 'run_id': telemetry_run_id(), 'completed_at': datetime.now().isoformat()}
+  file_contents = io.BytesIO(json.dumps(memo).encode("utf-8"))
+  file_contents.seek(0, io.SEEK_END)
+  datalake_upload(file_contents, CONNECTION_STRING, file_system, stage_memo_path, stage_memo_file(notebook_path))
+
+def run_stage(CONNECTION_STRING, file_system, notebook_path, timeout_seconds, stage_inputs, force_refresh=False, arguments=None, memo=True):
+  key = stage_key(notebook_path, stage_inputs) if memo else None
+  if not force_refresh and stage_is_current(CONNECTION_STRING, file_system, notebook_path, key):
+    print("Skipping " + notebook_path + ", its inputs are unchanged since the last run")
+    return None
+  arguments = dict(arguments or {}, telemetry_run_id=telemetry_run_id())
+  exit_value = get_dbutils().notebook.run(notebook_path, timeout_seconds, arguments)
+  if key is not None:
+    record_stage(CONNECTION_STRING, file_system, notebook_path, key)
+  return exit_value
+
+# COMMAND ----------
+
+# Landed file cache functions
+# -------------------------------------------------------------------------
+# read_landed_sheet replaces datalake_download + pd.read_excel for landed xlsx, xlsm and csv
+# files. The first read of a file converts every sheet and stores it under
+#   <landed_cache_path><content hash>/<read options>/
+# as parquet (see landed_frame_parquet). The pandas version is part of the key, as parsing
+# can differ between versions. Later reads of the same content (validation then
+# ingestion, the raw and highlights notebooks, a rerun day) load the stored sheet and never
+# open the workbook. The content hash is found from the file's ETag through a small index,
+# so an unchanged file is not downloaded again either.
+LANDED_CACHE_VERSION = "2"
+landed_cache_path = "proc/landed_cache/"
+landed_manifests = {}
+
+def landed_path_key(file_system, source_path, source_file):
+  return hashlib.sha1((file_system + "|" + source_path + source_file).encode("utf-8")).hexdigest()
+
+def landed_file_hash(CONNECTION_STRING, file_system, source_path, source_file, data=None):
+  # (content hash, file bytes or None when the hash came from the index); a caller that has
+  # already downloaded the file passes its bytes, which are hashed and indexed
+  etag = datalake_file_etag(CONNECTION_STRING, file_system, source_path, source_file)
+  index_file = landed_path_key(file_system, source_path, source_file) + ".json"
+  if data is None and datalake_file_exists(CONNECTION_STRING, file_system, landed_cache_path + "index/", index_file):
+    index = json.loads(datalake_download(CONNECTION_STRING, file_system, landed_cache_path + "index/", index_file))
+    if index['etag'] == etag:
+      return index['hash'], None
+  if data is None:
+    data = datalake_download(CONNECTION_STRING, file_system, source_path, source_file)
+  content_hash = hashlib.sha256(data).hexdigest()
+  index = {'source': source_path + source_file, 'etag': etag, 'hash': content_hash}
+  file_contents = io.BytesIO(json.dumps(index).encode("utf-8"))
+  file_contents.seek(0, io.SEEK_END)
+  datalake_upload(file_contents, CONNECTION_STRING, file_system, landed_cache_path + "index/", index_file)
+  return content_hash, data
+
+def landed_label(col):
+  # a column label as JSON: strings as they are, other labels tagged with their type
+  if isinstance(col, str):
+    return col
+  if isinstance(col, (bool, np.bool_)):
+    return ['bool', bool(col)]
+  if isinstance(col, (int, np.integer)):
+    return ['int', int(col)]
+  if isinstance(col, (float, np.floating)):
+    return ['float', float(col)]
+  if isinstance(col, (pd.Timestamp, datetime)):
+    return ['datetime', pd.Timestamp(col).isoformat()]
+  return str(col)
+
+def landed_column_label(label):
+  if isinstance(label, str):
+    return label
+  kind, value = label
+  return pd.Timestamp(value) if kind == 'datetime' else {'bool': bool, 'int': int, 'float': float}[kind](value)
+
+def landed_frame_parquet(df):
+  # parquet of a parsed sheet or frame. Object columns parquet cannot store as they are (mixed
+  # types, e.g. numbers and notes in one Excel column) are stored as strings, nulls kept, and
+  # the original column labels are kept in the schema metadata so non-string headers come back
+  import pyarrow as pa
+  import pyarrow.parquet as pq
+  df_stored = df.copy(deep=False)
+  df_stored.columns = [str(position) for position in range(len(df.columns))]
+  for col in df_stored.columns:
+    if df_stored[col].dtype == object:
+      values = df_stored[col]
+      types = set(type(value) for value in values.dropna())
+      try:
+        if len(types) > 1:
+          raise TypeError("mixed types")
+        pa.array(values, from_pandas=True)
+      except (TypeError, ValueError, pa.ArrowException):
+        df_stored[col] = values.astype(str).where(values.notna(), None)
+  table = pa.Table.from_pandas(df_stored)
+  labels = json.dumps([landed_label(col) for col in df.columns])
+  table = table.replace_schema_metadata(dict(table.schema.metadata or {}, landed_columns=labels))
+  file_contents = io.BytesIO()
+  pq.write_table(table, file_contents)
+  return file_contents
+
+def read_landed_parquet(source):
+  # a frame written by landed_frame_parquet, source is a local path or the file's bytes
+  import pyarrow.parquet as pq
+  table = pq.read_table(source if isinstance(source, str) else io.BytesIO(source), memory_map=isinstance(source, str))
+  df = table.to_pandas()
+  labels = (table.schema.metadata or {}).get(b'landed_columns')
+  if labels is not None:
+    df.columns = [landed_column_label(label) for label in json.loads(labels)]
+  return df
+
+def landed_sheet_title(sheet_names, sheet):
+  return sheet_names[sheet] if isinstance(sheet, int) else sheet
+
+def landed_sheets_cached(manifest, sheet_name):
+  if manifest is None:
+    return False
+  if sheet_name is None:
+    return len(manifest['files']) == len(manifest['sheet_names'])
+  requested = sheet_name if isinstance(sheet_name, list) else [sheet_name]
+  return all(landed_sheet_title(manifest['sheet_names'], sheet) in manifest['files'] for sheet in requested)
+
+def convert_landed_file(data, source_file, cache_path, manifest, sheet_name, read_options, CONNECTION_STRING, file_system):
+  with telemetry_section('convert_landed_file', source_file) as record:
+    if source_file.lower().endswith('.csv'):
+      all_sheets = [os.path.splitext(source_file)[0]]
+      sheets = {all_sheets[0]: pd.read_csv(io.BytesIO(data), **read_options)}
+    else:
+      workbook = pd.ExcelFile(io.BytesIO(data), engine="openpyxl")
+      all_sheets = workbook.sheet_names
+      requested = all_sheets if sheet_name is None else sheet_name if isinstance(sheet_name, list) else [sheet_name]
+      requested = [landed_sheet_title(all_sheets, sheet) for sheet in requested]
+      for sheet in requested:
+        if sheet not in all_sheets:
+          raise ValueError("Worksheet named '" + str(sheet) + "' not found in " + source_file)
+      try:
+        # every sheet at once, so any other sheet read later is already converted
+        sheets = workbook.parse(sheet_name=None, **read_options)
+      except Exception:
+        # options that only fit some sheets (header rows, names) convert the sheets asked for
+        sheets = {sheet: workbook.parse(sheet_name=sheet, **read_options) for sheet in requested}
+    manifest = manifest or {'source_file': source_file, 'read_options': json.dumps(read_options, default=str), 'sheet_names': all_sheets, 'files': {}}
+    for sheet, df in sheets.items():
+      file_contents = landed_frame_parquet(df)
+      sheet_file = str(all_sheets.index(sheet)) + ".parquet"
+      datalake_upload(file_contents, CONNECTION_STRING, file_system, cache_path, sheet_file)
+      manifest['files'][sheet] = sheet_file
+    record['rows'] = sum(len(df) for df in sheets.values())
+  # the manifest is written last, so a conversion that fails part way is never read
+  file_contents = io.BytesIO(json.dumps(manifest).encode("utf-8"))
+  file_contents.seek(0, io.SEEK_END)
+  datalake_upload(file_contents, CONNECTION_STRING, file_system, cache_path, "manifest.json")
+  return manifest
+
+def read_landed_sheet(CONNECTION_STRING, file_system, source_path, source_file, sheet_name=0, **read_options):
+  # pd.read_excel(..., sheet_name=sheet_name, **read_options) of a landed file, served from the
+  # conversion cache: a dataframe for one sheet, a dict of them for a list of sheets or None
+  content_hash, data = landed_file_hash(CONNECTION_STRING, file_system, source_path, source_file)
+  options_key = hashlib.sha1((LANDED_CACHE_VERSION + "|" + pd.__version__ + "|" + json.dumps(read_options, sort_keys=True, default=str)).encode("utf-8")).hexdigest()[:12]
+  cache_path = landed_cache_path + content_hash + "/" + options_key + "/"
+  manifest = landed_manifests.get(cache_path)
+  if manifest is None and datalake_file_exists(CONNECTION_STRING, file_system, cache_path, "manifest.json"):
+    manifest = json.loads(datalake_download(CONNECTION_STRING, file_system, cache_path, "manifest.json"))
+  if not landed_sheets_cached(manifest, sheet_name):
+    if data is None:
+      data = datalake_download(CONNECTION_STRING, file_system, source_path, source_file)
+    manifest = convert_landed_file(data, source_file, cache_path, manifest, sheet_name, read_options, CONNECTION_STRING, file_system)
+  landed_manifests[cache_path] = manifest
+
+  def read_sheet(sheet):
+    sheet_file = manifest['files'][landed_sheet_title(manifest['sheet_names'], sheet)]
+    return read_landed_parquet(datalake_download(CONNECTION_STRING, file_system, cache_path, sheet_file))
+  if sheet_name is None:
+    return {sheet: read_sheet(sheet) for sheet in manifest['sheet_names']}
+  if isinstance(sheet_name, list):
+    return {sheet: read_sheet(sheet) for sheet in sheet_name}
+  return read_sheet(sheet_name)
+
+# COMMAND ----------
+
+# Validated frame functions
+# -------------------------------------------------------------------------
+# A validation notebook hands the frame its tests ran on to the ingestion notebook of the
+# same landed file, so the snapshot is downloaded and parsed once per run. Once the tests
+# have passed the validator calls
+#   hand_off_validated_frame(new_dataframe, new_dataset, CONNECTION_STRING, file_system, source_path, source_file)
+# and ingestion calls read_validated_frame, which returns None when there is no frame for
+# the file's current content (validation did not run, or the file has changed since) so
+# the notebook parses the file itself. Frames are stored as
+#   <validated_frames_path><path key>/<content hash>.parquet
+# with the content hash of the landed file cache, looked up from the file's ETag.
+validated_frames_path = "proc/validated_frames/"
+
+def hand_off_validated_frame(df, data, CONNECTION_STRING, file_system, source_path, source_file):
+  content_hash, _ = landed_file_hash(CONNECTION_STRING, file_system, source_path, source_file, data)
+  frame_path = validated_frames_path + landed_path_key(file_system, source_path, source_file) + "/"
+  datalake_upload(landed_frame_parquet(df), CONNECTION_STRING, file_system, frame_path, content_hash + ".parquet")
+  return content_hash
+
+def read_validated_frame(CONNECTION_STRING, file_system, source_path, source_file):
+  content_hash, _ = landed_file_hash(CONNECTION_STRING, file_system, source_path, source_file)
+  frame_path = validated_frames_path + landed_path_key(file_system, source_path, source_file) + "/"
+  if not datalake_file_exists(CONNECTION_STRING, file_system, frame_path, content_hash + ".parquet"):
+    return None
+  with datalake_local_file(CONNECTION_STRING, file_system, frame_path, content_hash + ".parquet") as local_path:
+    return read_landed_parquet(local_path)
 
 # COMMAND ----------
 
 # Ingestion and analytical functions
 # -------------------------------------------------------------------------
 def ons_geoportal_file_download(search_url, url_start, string_filter):
+  import requests
+  from urllib import request as urlreq
+  from urllib.request import urlopen
+  from bs4 import BeautifulSoup
   url_2 = '/0/query?where=1%3D1&outFields=*&outSR=4326&f=json'
   page = requests.get(search_url)
   response = urlreq.urlopen(search_url)
@@ -147,13 +839,15 @@ def ons_geoportal_file_download(search_url, url_start, string_filter):
 
 def datalake_listContents(CONNECTION_STRING, file_system, source_path):
   try:
-    service_client = DataLakeServiceClient.from_connection_string(CONNECTION_STRING)
-    file_system_client = service_client.get_file_system_client(file_system=file_system)
-    folder_path = file_system_client.get_paths(path=source_path)
-    file_list = []
-    for path in folder_path:
-      file_list.append(path.name.replace(source_path.strip("/"), "").lstrip("/").rsplit("/", 1)[0])
-    return file_list
+    with telemetry_section('datalake_listContents', source_path) as record:
+      service_client = datalake_service_client(CONNECTION_STRING)
+      file_system_client = service_client.get_file_system_client(file_system=file_system)
+      folder_path = file_system_client.get_paths(path=source_path)
+      file_list = []
+      for path in folder_path:
+        file_list.append(path.name.replace(source_path.strip("/"), "").lstrip("/").rsplit("/", 1)[0])
+      record['rows'] = len(file_list)
+      return file_list
   except Exception as e:
     print(e)
     
@@ -217,6 +911,234 @@ def contains_digits(input_string):
 
 # COMMAND ----------
 
+# Dataframe accumulation functions
+# -------------------------------------------------------------------------
+# DataFrame.append copies the whole frame on every call (and was removed in pandas 2),
+# so loops should collect their chunks in a list and concatenate once at the end.
+def unify_dtypes(frames):
+  common_dtypes = {}
+  for frame in frames:
+    for col, dtype in frame.dtypes.items():
+      common_dtypes.setdefault(col, set()).add(dtype)
+  cast_dtypes = {}
+  for col, dtypes in common_dtypes.items():
+    if len(dtypes) == 1:
+      continue
+    if all(isinstance(dtype, np.dtype) and dtype.kind in 'iuf' for dtype in dtypes):
+      cast_dtypes[col] = np.result_type(*dtypes)
+    else:
+      cast_dtypes[col] = object
+  if not cast_dtypes:
+    return frames
+  return [frame.astype({col: dtype for col, dtype in cast_dtypes.items() if col in frame.columns}) for frame in frames]
+
+def concat_dataframes(frames, ignore_index=False):
+  frames = [frame for frame in frames if frame is not None]
+  non_empty_frames = [frame for frame in frames if not frame.empty]
+  if not non_empty_frames:
+    # keep the column headers of any empty template frames
+    return pd.DataFrame(columns=pd.Index([col for frame in frames for col in frame.columns]).unique())
+  return pd.concat(unify_dtypes(non_empty_frames), ignore_index=ignore_index, sort=False)
+
+class DataFrameAccumulator:
+  def __init__(self):
+    self.chunks = []
+
+  def add(self, frame):
+    self.chunks.append(frame)
+    return self
+
+  def __len__(self):
+    return len(self.chunks)
+
+  def collect(self, ignore_index=False):
+    return concat_dataframes(self.chunks, ignore_index=ignore_index)
+
+# COMMAND ----------
+
+# Keyed upsert functions
+# -------------------------------------------------------------------------
+# Merge a new snapshot into a historical dataframe on key_cols: rows whose key is already
+# in the history get their update_cols overwritten (late restatements), new keys are appended.
+# Keys are matched with one index lookup, so the cost grows with the new rows, not new x history.
+def upsert_dataframe(df_history, df_new, key_cols, update_cols=None):
+  if isinstance(key_cols, str):
+    key_cols = [key_cols]
+  if update_cols is None:
+    update_cols = [col for col in df_new.columns if col not in key_cols]
+  # the latest restatement of a key wins
+  df_new = df_new.drop_duplicates(key_cols, keep='last').reset_index(drop=True)
+  df_history = df_history.reset_index(drop=True)
+  if df_history.empty:
+    return concat_dataframes([df_history, df_new], ignore_index=True)
+  new_keys = pd.MultiIndex.from_frame(df_new[key_cols])
+  history_keys = pd.MultiIndex.from_frame(df_history[key_cols])
+  positions = new_keys.get_indexer(history_keys)
+  matched = positions >= 0
+  if matched.any():
+    df_history = df_history.copy()
+    for col in update_cols:
+      df_history.loc[matched, col] = df_new[col].to_numpy()[positions[matched]]
+  df_insert = df_new[~new_keys.isin(history_keys)]
+  return concat_dataframes([df_history, df_insert], ignore_index=True)
+
+# COMMAND ----------
+
+# Row fingerprint functions
+# -------------------------------------------------------------------------
+# A stable 64-bit hash of the key columns of each row (values compared as strings), kept
+# in a set so checking whether a snapshot is already in a historical file is a set lookup.
+# Rows with a missing key value never match, like an element-wise == comparison.
+# The index is saved next to the historical file as <file>_fingerprints.parquet, with the
+# ETag of the historical file it was built for.
+def row_fingerprints(df, key_cols):
+  keys = df[key_cols].astype('string')
+  complete = keys.notna().all(axis=1).to_numpy()
+  hashes = pd.util.hash_pandas_object(keys.fillna('').astype(object), index=False).to_numpy()
+  return hashes, complete
+
+class RowFingerprintIndex:
+  def __init__(self, key_cols, fingerprints=()):
+    self.key_cols = list(key_cols)
+    self.fingerprints = set(fingerprints)
+
+  @classmethod
+  def from_dataframe(cls, df, key_cols):
+    return cls(key_cols).add(df)
+
+  def add(self, df):
+    hashes, complete = row_fingerprints(df, self.key_cols)
+    self.fingerprints.update(hashes[complete].tolist())
+    return self
+
+  def contains(self, df):
+    hashes, complete = row_fingerprints(df, self.key_cols)
+    return np.array([h in self.fingerprints for h in hashes.tolist()], dtype=bool) & complete
+
+  def __len__(self):
+    return len(self.fingerprints)
+
+  def to_dataframe(self, history_etag):
+    df = pd.DataFrame({'fingerprint': np.array(sorted(self.fingerprints), dtype='uint64')})
+    df['key_cols'] = '|'.join(self.key_cols)
+    df['history_etag'] = history_etag
+    return df
+
+def fingerprint_file_name(file_name):
+  return file_name.rsplit('.', 1)[0] + '_fingerprints.parquet'
+
+def load_fingerprint_index(CONNECTION_STRING, file_system, source_path, source_file, df_history, key_cols):
+  # reuse the saved index when it was built on the same key columns for this exact history
+  # file (same ETag), otherwise (first run, an older index, or the history was rewritten
+  # since) hash the history once
+  index_file = fingerprint_file_name(source_file)
+  if datalake_file_exists(CONNECTION_STRING, file_system, source_path, index_file):
+    file = datalake_download(CONNECTION_STRING, file_system, source_path, index_file)
+    df_index = pd.read_parquet(io.BytesIO(file), engine="pyarrow")
+    history_etag = datalake_file_etag(CONNECTION_STRING, file_system, source_path, source_file)
+    if not df_index.empty and 'history_etag' in df_index.columns and df_index['key_cols'].iloc[0] == '|'.join(key_cols) and df_index['history_etag'].iloc[0] == history_etag:
+      return RowFingerprintIndex(key_cols, df_index['fingerprint'].tolist())
+  return RowFingerprintIndex.from_dataframe(df_history, key_cols)
+
+def upload_fingerprint_index(fingerprint_index, CONNECTION_STRING, file_system, sink_path, sink_file):
+  # call after uploading the historical file sink_file, the index records its ETag
+  history_etag = datalake_file_etag(CONNECTION_STRING, file_system, sink_path, sink_file)
+  file_contents = io.BytesIO()
+  fingerprint_index.to_dataframe(history_etag).to_parquet(file_contents, engine="pyarrow")
+  datalake_upload(file_contents, CONNECTION_STRING, file_system, sink_path, fingerprint_file_name(sink_file))
+
+# COMMAND ----------
+
+# Typed historical parquet functions
+# -------------------------------------------------------------------------
+# Historical files used to be written with astype(str), so every count was stored as text
+# and re-parsed by each analytics notebook. The schema (config 'raw' -> 'appended_schema')
+# maps columns to 'date' (parquet date32), 'int' (int64, nullable) or 'float'; any other
+# column is stored as a string, which parquet dictionary encodes. 'nan'/'None' strings
+# left by astype(str) are turned back into nulls, so the same call migrates old files.
+def enforce_schema(df, schema):
+  df = df.copy()
+  for col in df.columns:
+    col_type = schema.get(col, 'string')
+    if col_type == 'date':
+      df[col] = pd.to_datetime(df[col].replace(['nan', 'None', 'NaT'], None)).dt.date
+    elif col_type == 'int':
+      values = pd.to_numeric(df[col], errors='coerce')
+      df[col] = values.astype('Int64') if values.isna().any() else values.astype('int64')
+    elif col_type == 'float':
+      df[col] = pd.to_numeric(df[col], errors='coerce').astype('float64')
+    else:
+      values = df[col].astype('string').replace(['nan', 'None', '<NA>'], pd.NA)
+      df[col] = values.astype(object).where(values.notna(), None)
+  return df
+
+# COMMAND ----------
+
+# Snapshot folder functions
+# -------------------------------------------------------------------------
+# Process one file per dated snapshot folder (e.g. the latest folder of each month). Downloads
+# run concurrently, and when a cache_path is given each folder's result is stored as
+# <cache_path><folder>/<cache_file> and read back on later runs instead of being recomputed.
+# Put anything the result depends on besides the folder (reference file version, code
+# version) in cache_path. Results are concatenated once, in the order of folders.
+def datalake_download_folders(CONNECTION_STRING, file_system, source_path, folders, source_file, max_workers=8):
+  with ThreadPoolExecutor(max_workers=max_workers) as executor:
+    files = executor.map(lambda folder: datalake_download(CONNECTION_STRING, file_system, source_path+folder+'/', source_file), folders)
+    return dict(zip(folders, files))
+
+def process_snapshot_folders(CONNECTION_STRING, file_system, source_path, source_file, folders, process_snapshot, cache_path=None, cache_file="snapshot.parquet", max_workers=8):
+  def read_cached(folder):
+    if not datalake_file_exists(CONNECTION_STRING, file_system, cache_path+folder+'/', cache_file):
+      return None
+    file = datalake_download(CONNECTION_STRING, file_system, cache_path+folder+'/', cache_file)
+    return pd.read_parquet(io.BytesIO(file), engine="pyarrow")
+
+  results = {}
+  if cache_path is not None:
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+      results = {folder: df for folder, df in zip(folders, executor.map(read_cached, folders)) if df is not None}
+  new_folders = [folder for folder in folders if folder not in results]
+  print("Snapshot folders read from cache: " + str(len(results)) + ", processed: " + str(len(new_folders)))
+
+  files = datalake_download_folders(CONNECTION_STRING, file_system, source_path, new_folders, source_file, max_workers)
+  for folder in new_folders:
+    results[folder] = process_snapshot(files[folder], folder)
+    if cache_path is not None:
+      file_contents = io.BytesIO()
+      results[folder].to_parquet(file_contents, engine="pyarrow")
+      datalake_upload(file_contents, CONNECTION_STRING, file_system, cache_path+folder+'/', cache_file)
+  return concat_dataframes([results[folder] for folder in folders], ignore_index=True)
+
+# COMMAND ----------
+
+# Categorical transform functions
+# -------------------------------------------------------------------------
+# String clean-ups of label columns (providers, services, ...) run once per distinct value
+# on the categories and are mapped back through the codes, so their cost does not grow
+# with the number of rows. The result is a categorical with sorted categories; group by
+# it with observed=True.
+def transform_categories(values, func):
+  values = pd.Series(values)
+  if not isinstance(values.dtype, pd.CategoricalDtype):
+    values = values.astype('category')
+  categories = pd.Series(values.cat.categories)
+  new_categories = pd.Series(func(categories), index=categories.index)
+  # distinct categories can map to the same value, so the categories are rebuilt
+  new_values = pd.Index(new_categories.dropna().unique()).sort_values()
+  # code -1 (missing value) picks the appended -1
+  new_codes = np.append(new_values.get_indexer(new_categories), -1)
+  codes = new_codes[values.cat.codes.to_numpy()]
+  return pd.Series(pd.Categorical.from_codes(codes, categories=new_values), index=values.index, name=values.name)
+
+def replace_categories(values, pat, repl, regex=True):
+  return transform_categories(values, lambda categories: categories.str.replace(pat, repl, regex=regex))
+
+def camel_case_to_sentence(values):
+  # "manageYourReferral" -> "Manage your referral"
+  return transform_categories(values, lambda categories: categories.map(lambda x: re.sub(r"(\w)([A-Z])", r"\1 \2", x).capitalize()))
+
+# COMMAND ----------
+
 # Validation Helper Function
 #-----------------------------------------
 def test_result(great_expectation_result, test_info):
@@ -0,0 +1,124 @@
+# Databricks notebook source
+#!/usr/bin python3
+
+# -------------------------------------------------------------------------
+# Copyright (c) 2021 NHS England and NHS Improvement. All rights reserved.
+# Licensed under the MIT License. See license.txt in the project root for
+# license information.
+# -------------------------------------------------------------------------
+
+"""
+FILE:           dbrks_pomi_functions.py
+DESCRIPTION:
+                Functions shared by the Patient Online (POMI) analytics notebooks
+USAGE:
+                %run after dbrks_helper_functions
+CONTRIBUTORS:   Craig Shenton, Mattia Ficarelli, Kabir Khan
+CONTACT:        data@nhsx.nhs.uk
+CREATED:        19 Oct. 2026
+VERSION:        0.0.1
+"""
+
+# COMMAND ----------
+
+# Imports
+# -------------------------------------------------------------------------
+import io
+import hashlib
+
+# COMMAND ----------
+
+# POMI cube
+# -------------------------------------------------------------------------
+# The POMI table is long format, one row per practice, supplier, period and Field. It is
+# pivoted once into a wide cube, one row per (Report_Period_End, Practice_Code,
+# System_Supplier) and one column per Field, so every metric notebook reads the columns it
+# needs instead of filtering the long table. A Field reported twice for the same key is
+# not summed: the second report is a row of its own with Field_Row 1. Reported_Fields lists
+# the Fields a row has (a Field with a null Value is reported, a Field with no row is not),
+# pomi_select_practices keeps the rows the long table had for the selected Field.
+# National metrics read the period totals table (Report_Period_End, Field, Value), the
+# same sums the notebooks used to compute with groupby(["Report_Period_End", "Field"]).
+# Both tables are materialised once per source file version under
+# <cube_sink_path>/<version key>/ (or when POMI_CUBE_VERSION is bumped).
+POMI_CUBE_VERSION = "2"
+
+pomi_key_columns = ['Report_Period_End', 'Practice_Code', 'System_Supplier']
+
+def pomi_build_cube(df):
+  df = df[pomi_key_columns + ['Field', 'Value']].copy()
+  df['Report_Period_End'] = df['Report_Period_End'].astype("datetime64[ns]")
+  df['Field_Row'] = df.groupby(pomi_key_columns + ['Field'], dropna=False).cumcount()
+  row_keys = pomi_key_columns + ['Field_Row']
+  df_cube = df.set_index(row_keys + ['Field'])['Value'].unstack('Field')
+  # unstack turns integer fields into floats, cast back the fields reported on every row
+  for field in df_cube.columns:
+    if not df_cube[field].isna().any():
+      df_cube[field] = df_cube[field].astype(df['Value'].dtype)
+  df_cube.columns.name = None
+  reported = df.sort_values('Field').groupby(row_keys, dropna=False)['Field'].agg("|".join)
+  df_cube['Reported_Fields'] = reported.reindex(df_cube.index).astype('category')
+  return df_cube.reset_index()
+
+def pomi_build_period_totals(df):
+  df_totals = df.groupby(['Report_Period_End', 'Field'])['Value'].sum().reset_index()
+  df_totals['Report_Period_End'] = df_totals['Report_Period_End'].astype("datetime64[ns]")
+  return df_totals.sort_values(['Report_Period_End', 'Field']).reset_index(drop=True)
+
+def pomi_cube_version_key(CONNECTION_STRING, file_system, source_path, source_file):
+  latestFolder = datalake_latestFolder(CONNECTION_STRING, file_system, source_path)
+  versions = [POMI_CUBE_VERSION,
+              source_path + latestFolder + source_file,
+              datalake_file_etag(CONNECTION_STRING, file_system, source_path + latestFolder, source_file)]
+  version_key = hashlib.sha1("|".join(versions).encode("utf-8")).hexdigest()[:16]
+  return version_key, latestFolder
+
+def pomi_load_tables(CONNECTION_STRING, file_system, config_JSON, tables=('cube', 'totals'), force_rebuild=False):
+  source_path = config_JSON['pipeline']['project']['source_path']
+  source_file = config_JSON['pipeline']['project']['source_file']
+  cube_path = config_JSON['pipeline']['project']['cube_sink_path']
+  table_files = {'cube': config_JSON['pipeline']['project']['cube_sink_file'],
+                 'totals': config_JSON['pipeline']['project']['totals_sink_file']}
+
+  version_key, latestFolder = pomi_cube_version_key(CONNECTION_STRING, file_system, source_path, source_file)
+  cube_version_path = cube_path + version_key + '/'
+  if not force_rebuild and all(datalake_file_exists(CONNECTION_STRING, file_system, cube_version_path, table_files[table]) for table in tables):
+    print("Reading POMI cube " + cube_version_path)
+    results = {}
+    for table in tables:
+      results[table] = datalake_read_parquet(CONNECTION_STRING, file_system, cube_version_path, table_files[table])
+    return results
+
+  print("Building POMI cube " + cube_version_path)
+  df = datalake_read_parquet(CONNECTION_STRING, file_system, source_path + latestFolder, source_file)
+  results = {'cube': pomi_build_cube(df), 'totals': pomi_build_period_totals(df)}
+  for table, df_table in results.items():
+    file_contents = io.BytesIO()
+    df_table.to_parquet(file_contents, engine="pyarrow")
+    datalake_upload(file_contents, CONNECTION_STRING, file_system, cube_version_path, table_files[table])
+  return {table: results[table] for table in tables}
+
+def pomi_load_cube(CONNECTION_STRING, file_system, config_JSON, force_rebuild=False):
+  return pomi_load_tables(CONNECTION_STRING, file_system, config_JSON, ('cube',), force_rebuild)['cube']
+
+def pomi_load_period_totals(CONNECTION_STRING, file_system, config_JSON, force_rebuild=False):
+  return pomi_load_tables(CONNECTION_STRING, file_system, config_JSON, ('totals',), force_rebuild)['totals']
+
+def pomi_select_totals(df_totals, field):
+  # period totals of one Field, sorted by period
+  df_field = df_totals[df_totals['Field'] == field]
+  return df_field[['Report_Period_End', 'Value']].sort_values('Report_Period_End').reset_index(drop=True)
+
+def pomi_select_field(df_cube, field):
+  # practice rows reporting the Field, as the long table has them
+  reported_fields = df_cube['Reported_Fields'].astype('category')
+  reports_field = reported_fields.map(lambda value: field in value.split("|")).astype(bool)
+  return df_cube.loc[reports_field, ['Report_Period_End', 'Practice_Code', field]]
+
+def pomi_select_practices(df_cube, fields):
+  # practice rows reporting the first Field, left joined to the rows of the other Fields
+  # on period and practice, sorted by period
+  df_field = pomi_select_field(df_cube, fields[0])
+  for field in fields[1:]:
+    df_field = df_field.merge(pomi_select_field(df_cube, field), on=['Report_Period_End', 'Practice_Code'], how='left')
+  return df_field.sort_values('Report_Period_End', kind='stable').reset_index(drop=True)
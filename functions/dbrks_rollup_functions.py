@@ -0,0 +1,145 @@
+# Databricks notebook source
+#!/usr/bin python3
+
+# -------------------------------------------------------------------------
+# Copyright (c) 2021 NHS England and NHS Improvement. All rights reserved.
+# Licensed under the MIT License. See license.txt in the project root for
+# license information.
+# -------------------------------------------------------------------------
+
+"""
+FILE:           dbrks_rollup_functions.py
+DESCRIPTION:
+                Day, week and month rollups of daily datasets (NHS App, ToC messages), built
+                once per source file version and read by the metric notebooks
+USAGE:
+                %run after dbrks_helper_functions and dbrks_date_functions
+CONTRIBUTORS:   Data Engineering Team
+CONTACT:        data@nhsx.nhs.uk
+CREATED:        19 Oct. 2026
+VERSION:        0.0.1
+"""
+
+# COMMAND ----------
+
+# Imports
+# -------------------------------------------------------------------------
+import io
+import json
+import hashlib
+
+# COMMAND ----------
+
+# Time rollup functions
+# -------------------------------------------------------------------------
+# A rollup sums the value columns of a dataset per key (practice, provider, ...) and period,
+# for each grain: 'day', 'week' (ISO weeks, Monday to Sunday) and 'month'. Weeks and months
+# are summed from the days, so the source is only grouped once. Each grain is a dataframe with
+#   Period_Start  first day of the period
+#   Period_End    last day of the period, or the latest date in the data for the current period
+#                 (the month date the NHS App notebooks used to patch to max_date)
+#   Is_Partial    the period runs past the latest date in the data
+#   key and value columns, and Cumulative_<col> running totals per key for cumulative_cols
+# With no value_cols the rows are counted into count_col. Missing key values are kept as
+# their own group, notebooks grouping on a subset of the keys drop them as before.
+# date_format is the format of a string date_col (config 'date_format'), a datetime
+# date_col needs none.
+ROLLUP_VERSION = "1"
+
+rollup_grains = ['day', 'week', 'month']
+
+def rollup_period_start(dates, grain):
+  if grain == 'day':
+    return dates.dt.normalize()
+  if grain == 'week':
+    return week_commencing(dates)
+  if grain == 'month':
+    return dates.dt.normalize() - pd.to_timedelta(dates.dt.day - 1, unit="D")
+  raise ValueError("Unknown rollup grain: " + str(grain))
+
+def rollup_period_end(period_start, grain):
+  if grain == 'day':
+    return period_start
+  if grain == 'week':
+    return period_start + pd.Timedelta(days=6)
+  if grain == 'month':
+    return month_end(period_start)
+  raise ValueError("Unknown rollup grain: " + str(grain))
+
+def build_time_rollup(df, date_col, key_cols, value_cols=None, count_col="Count", cumulative_cols=None, grains=rollup_grains, date_format=None):
+  df_day = df[key_cols].copy()
+  dates = parse_dates(df[date_col], date_format)
+  if dates.dt.tz is not None:
+    # keep the local wall clock date, as dt.strftime does
+    dates = dates.dt.tz_localize(None)
+  df_day['Period_Start'] = dates.dt.normalize()
+  if value_cols:
+    for col in value_cols:
+      df_day[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+  else:
+    value_cols = [count_col]
+    df_day[count_col] = 1
+  max_date = df_day['Period_Start'].max()
+  df_day = df_day.groupby(['Period_Start'] + key_cols, dropna=False)[value_cols].sum().reset_index()
+
+  rollups = {}
+  for grain in grains:
+    if grain == 'day':
+      df_grain = df_day.copy()
+    else:
+      df_grain = df_day.assign(Period_Start=rollup_period_start(df_day['Period_Start'], grain))
+      df_grain = df_grain.groupby(['Period_Start'] + key_cols, dropna=False)[value_cols].sum().reset_index()
+    period_end = rollup_period_end(df_grain['Period_Start'], grain)
+    df_grain.insert(1, 'Period_End', period_end.where(period_end <= max_date, max_date))
+    df_grain.insert(2, 'Is_Partial', period_end > max_date)
+    # rows are sorted by period, so a cumulative sum per key is the running total to date
+    for col in cumulative_cols or []:
+      df_grain['Cumulative_' + col] = df_grain.groupby(key_cols, dropna=False)[col].cumsum()
+    rollups[grain] = df_grain
+  return rollups
+
+def rollup_file_name(file_name, grain):
+  return file_name.rsplit('.', 1)[0] + '_' + grain + '.parquet'
+
+def rollup_version_key(CONNECTION_STRING, file_system, source_path, source_file, rollup_spec):
+  latestFolder = datalake_latestFolder(CONNECTION_STRING, file_system, source_path)
+  versions = [ROLLUP_VERSION,
+              source_path + latestFolder + source_file,
+              datalake_file_etag(CONNECTION_STRING, file_system, source_path + latestFolder, source_file),
+              json.dumps(rollup_spec, sort_keys=True)]
+  version_key = hashlib.sha1("|".join(versions).encode("utf-8")).hexdigest()[:16]
+  return version_key, latestFolder
+
+def load_time_rollup(CONNECTION_STRING, file_system, config_JSON, grains=None, force_rebuild=False):
+  # the rollup of the project source file described by config 'project' -> 'rollup',
+  # materialised under <sink_path>/<version key>/ and only rebuilt when the source file changes
+  source_path = config_JSON['pipeline']['project']['source_path']
+  source_file = config_JSON['pipeline']['project']['source_file']
+  rollup_spec = config_JSON['pipeline']['project']['rollup']
+  grains = grains or rollup_spec.get('grains', rollup_grains)
+
+  version_key, latestFolder = rollup_version_key(CONNECTION_STRING, file_system, source_path, source_file, rollup_spec)
+  rollup_path = rollup_spec['sink_path'] + version_key + '/'
+  rollup_files = {grain: rollup_file_name(rollup_spec['sink_file'], grain) for grain in grains}
+  if not force_rebuild and all(datalake_file_exists(CONNECTION_STRING, file_system, rollup_path, rollup_files[grain]) for grain in grains):
+    print("Reading time rollup " + rollup_path)
+    rollups = {}
+    for grain in grains:
+      rollups[grain] = datalake_read_parquet(CONNECTION_STRING, file_system, rollup_path, rollup_files[grain])
+    return rollups
+
+  print("Building time rollup " + rollup_path)
+  df = datalake_read_parquet(CONNECTION_STRING, file_system, source_path + latestFolder, source_file)
+  rollups = build_time_rollup(df,
+                              rollup_spec['date_col'],
+                              rollup_spec['key_cols'],
+                              rollup_spec.get('value_cols'),
+                              rollup_spec.get('count_col', "Count"),
+                              rollup_spec.get('cumulative_cols'),
+                              rollup_spec.get('grains', rollup_grains),
+                              rollup_spec.get('date_format'))
+  for grain, df_grain in rollups.items():
+    file_contents = io.BytesIO()
+    df_grain.to_parquet(file_contents, engine="pyarrow")
+    datalake_upload(file_contents, CONNECTION_STRING, file_system, rollup_path, rollup_file_name(rollup_spec['sink_file'], grain))
+  return {grain: rollups[grain] for grain in grains}
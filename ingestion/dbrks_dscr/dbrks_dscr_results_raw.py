@@ -64,8 +64,7 @@ CONNECTION_STRING = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CON
 file_path_config = "/config/pipelines/nhsx-au-analytics/"
 file_name_config = "config_dscr_dbrks.json"
 file_system_config = dbutils.secrets.get(scope="AzureDataLake", key="DATALAKE_CONTAINER_NAME")
-config_JSON = datalake_download(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
-config_JSON = json.loads(io.BytesIO(config_JSON).read())
+config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
 
 # COMMAND ----------
 
@@ -86,8 +85,11 @@ latestFolder = datalake_latestFolder(CONNECTION_STRING, file_system, new_source_
 file_name_list = datalake_listContents(CONNECTION_STRING, file_system, new_source_path+latestFolder)
 file_name_list = [file for file in file_name_list if '.csv' in file]
 for new_source_file in file_name_list:
-  new_dataset = datalake_download(CONNECTION_STRING, file_system, new_source_path+latestFolder, new_source_file)
-  new_dataframe = pd.read_csv(io.BytesIO(new_dataset), encoding = "ISO-8859-1")
+  # the frame handed over by the validation notebook, or the file itself when there is none
+  new_dataframe = read_validated_frame(CONNECTION_STRING, file_system, new_source_path+latestFolder, new_source_file)
+  if new_dataframe is None:
+    new_dataset = datalake_download(CONNECTION_STRING, file_system, new_source_path+latestFolder, new_source_file)
+    new_dataframe = pd.read_csv(io.BytesIO(new_dataset), encoding = "ISO-8859-1")
 
 
 # COMMAND ----------
@@ -116,7 +118,7 @@ today_run_date = new_df_dates['run_date'].values[0]
 
 # If run_date is in historical file then it means the date is not new and should not be appended
 if today_run_date not in historical_df_dates['run_date'].values:
-  historical_dataframe = historical_dataframe.append(new_dataframe)
+  historical_dataframe = concat_dataframes([historical_dataframe, new_dataframe])
   historical_dataframe = historical_dataframe.sort_values(by=['run_date'])
   historical_dataframe = historical_dataframe.reset_index(drop=True)
   historical_dataframe = historical_dataframe.astype(str)
@@ -64,8 +64,7 @@ CONNECTION_STRING = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CON
 file_path_config = "/config/pipelines/nhsx-au-analytics/"
 file_name_config = "config_dscr_ics_qtrly_report.json"
 file_system_config = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
-config_JSON = datalake_download(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
-config_JSON = json.loads(io.BytesIO(config_JSON).read())
+config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
 
 # COMMAND ----------
 
@@ -87,8 +86,7 @@ latestFolder = datalake_latestFolder(CONNECTION_STRING, file_system, new_source_
 file_name_list = datalake_listContents(CONNECTION_STRING, file_system, new_source_path+latestFolder)
 file_name_list = [file for file in file_name_list if '.xlsm' in file]
 for new_source_file in file_name_list:
-  new_dataset = datalake_download(CONNECTION_STRING, file_system, new_source_path+latestFolder, new_source_file)
-  new_dataframe = pd.read_excel(io.BytesIO(new_dataset), sheet_name = "Backsheet for Pipeline", header = 0, engine='openpyxl') 
+  new_dataframe = read_landed_sheet(CONNECTION_STRING, file_system, new_source_path+latestFolder, new_source_file, sheet_name = "Backsheet for Pipeline") 
   
 #convert new dataframe to string so it is in the same format as historical
 new_dataframe = new_dataframe.astype('string')
@@ -105,23 +103,9 @@ historical_dataframe = pd.read_parquet(io.BytesIO(historical_dataset), engine="p
 
 # COMMAND ----------
 
-# Getting ics_overview row from both dataframe to compare if data is exists
-
-ics_new_dataframe = new_dataframe[['ICS Overview - Year 1 2022/23 Reporting QTR:',
-       'ICS Overview  - ICS NAME:', 'ICS Overview - LOCAL AUTHORITY NAME:',
-       'ICS Overview - ICS SRO Approved prior to submission:',
-       'ICS Overview - APPROVED BY (Name):', 'ICS Overview - (Job Role):',
-       'ICS Overview - Submitted to DiSC By (Name): ',
-       'ICS Overview - (Job Role):.1',
-       'ICS Overview  - Date of Qtrly Report Submission:',
-       'ICS Overview  - DiSC Regional Lead Approved:',
-       'ICS Overview - Date Reviewed :',
-       'ICS Overview - QTRLY FUNDING ALLOCATION:',
-       'ICS Overview - QTRLY FUNDING  APPROVED: ',
-       'ICS Overview - ESCALATION REQUIRED:',
-       'ICS Overview - DATE ESCALATION MTG:']].iloc[0]
-
-ics_historical_dataframe = historical_dataframe[['ICS Overview - Year 1 2022/23 Reporting QTR:',
+# ICS overview columns identify a quarterly report, a report is already in the historical
+# dataframe when its ICS overview row is (compared by fingerprint, not a row by row scan)
+ics_overview_cols = ['ICS Overview - Year 1 2022/23 Reporting QTR:',
        'ICS Overview  - ICS NAME:', 'ICS Overview - LOCAL AUTHORITY NAME:',
        'ICS Overview - ICS SRO Approved prior to submission:',
        'ICS Overview - APPROVED BY (Name):', 'ICS Overview - (Job Role):',
@@ -133,22 +117,20 @@ ics_historical_dataframe = historical_dataframe[['ICS Overview - Year 1 2022/23
        'ICS Overview - QTRLY FUNDING ALLOCATION:',
        'ICS Overview - QTRLY FUNDING  APPROVED: ',
        'ICS Overview - ESCALATION REQUIRED:',
-       'ICS Overview - DATE ESCALATION MTG:']]
+       'ICS Overview - DATE ESCALATION MTG:']
 
-ics_historical_dataframe = ics_historical_dataframe.dropna()
+ics_fingerprints = load_fingerprint_index(CONNECTION_STRING, file_system, historical_source_path+latestFolder_historical, historical_source_file, historical_dataframe, ics_overview_cols)
 
 # COMMAND ----------
 
 #check if the data already exists in the historical dataframe by checking the ICS overview information 
-exists = False
-for i in range(ics_historical_dataframe.shape[0]):
-  if (ics_historical_dataframe.iloc[i] == ics_new_dataframe).all():
-    exists = True
+exists = ics_fingerprints.contains(new_dataframe.iloc[[0]])[0]
 if exists == True:
   print('data already exists')
 else:
   print('data does not already exist - appended new data to the historical dataframe')
-  historical_dataframe = historical_dataframe.append(new_dataframe)
+  historical_dataframe = concat_dataframes([historical_dataframe, new_dataframe])
+  ics_fingerprints.add(new_dataframe)
 
 # COMMAND ----------
 
@@ -163,3 +145,4 @@ current_date_path = datetime.now().strftime('%Y-%m-%d') + '/'
 file_contents = io.BytesIO()
 historical_dataframe.to_parquet(file_contents, engine="pyarrow")
 datalake_upload(file_contents, CONNECTION_STRING, file_system, sink_path+current_date_path, sink_file)
+upload_fingerprint_index(ics_fingerprints, CONNECTION_STRING, file_system, sink_path+current_date_path, sink_file)
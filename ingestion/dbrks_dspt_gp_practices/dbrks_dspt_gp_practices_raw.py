@@ -63,8 +63,7 @@ CONNECTION_STRING = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CON
 file_path_config = "/config/pipelines/nhsx-au-analytics/"
 file_name_config = "config_dspt_gp_practices_historical_dbrks.json"
 file_system_config = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
-config_JSON = datalake_download(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
-config_JSON = json.loads(io.BytesIO(config_JSON).read())
+config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
 
 # COMMAND ----------
 
@@ -76,6 +75,7 @@ historical_source_path = config_JSON['pipeline']['raw']['appended_path']
 historical_source_file = config_JSON['pipeline']['raw']['appended_file']
 sink_path = config_JSON['pipeline']['raw']['appended_path']
 sink_file = config_JSON['pipeline']['raw']['appended_file']
+historical_schema = config_JSON['pipeline']['raw']['appended_schema']
 
 # COMMAND ----------
 
@@ -110,16 +110,16 @@ dspt_editions_in_new = df_processed["DSPT_Edition"].unique().tolist()[0]
 if dspt_editions_in_new in dspt_editions_in_historical:
   print('Data already exists in historical data')
 else:
-  historical_dataframe = historical_dataframe.append(df_processed)
+  historical_dataframe = concat_dataframes([historical_dataframe, df_processed])
   historical_dataframe = historical_dataframe.sort_values(by=['Snapshot_Date'])
   historical_dataframe = historical_dataframe.reset_index(drop=True)
-  historical_dataframe = historical_dataframe.astype(str)
 
 # COMMAND ----------
 
 #Upload hsitorical appended data to datalake
 # -----------------------------------------------------------------------
 current_date_path = datetime.now().strftime('%Y-%m-%d') + '/'
+historical_dataframe = enforce_schema(historical_dataframe, historical_schema)
 file_contents = io.BytesIO()
 historical_dataframe.to_parquet(file_contents, engine="pyarrow")
 datalake_upload(file_contents, CONNECTION_STRING, file_system, sink_path+current_date_path, sink_file)
@@ -63,8 +63,7 @@ CONNECTION_STRING = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CON
 file_path_config = "/config/pipelines/nhsx-au-analytics/"
 file_name_config = "config_dspt_socialcare_dbrks.json"
 file_system_config = dbutils.secrets.get(scope="AzureDataLake", key="DATALAKE_CONTAINER_NAME")
-config_JSON = datalake_download(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
-config_JSON = json.loads(io.BytesIO(config_JSON).read())
+config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
 
 # COMMAND ----------
 
@@ -85,9 +84,8 @@ latestFolder = datalake_latestFolder(CONNECTION_STRING, file_system, new_source_
 file_name_list = datalake_listContents(CONNECTION_STRING, file_system, new_source_path+latestFolder)
 file_name_list = [file for file in file_name_list if '.xlsx' in file]
 for new_source_file in file_name_list:
-  new_dataset = datalake_download(CONNECTION_STRING, file_system, new_source_path+latestFolder, new_source_file)
   header_list = ["Unnamed","CQC registered location - latest DSPT status", "Date of location publication", "Location CQC ID ", "Location start date", "Care home?", "Location name", "Location ODS code", "Location telephone number", "CQC registered manager","Location region","Region","Location local authority","Location ONSPD CCG","Location street address","Location address line 2", "Location city", "Location county", "Location postal code", "Brand ID", "Brand name", "Name of parent organisation", "CQC ID of parent organisation", "Larger organisation?", "Single Location", "Parent ODS code", "Latest DSPT status of parent", "Dormant (Y/N)"]
-  new_dataframe = pd.read_excel(io.BytesIO(new_dataset), sheet_name = 'Line By Line', header = 4, engine='openpyxl', names = header_list) #usecols = header_list
+  new_dataframe = read_landed_sheet(CONNECTION_STRING, file_system, new_source_path+latestFolder, new_source_file, sheet_name = 'Line By Line', header = 4, names = header_list) #usecols = header_list
   new_dataframe_1 = new_dataframe.loc[:, ~new_dataframe.columns.str.contains('^Unnamed')]
   new_dataframe_1['Date'] = latestFolder.replace('/','')
   new_dataframe_1['Date'] = pd.to_datetime(new_dataframe_1['Date']).dt.strftime('%Y-%m')
@@ -107,7 +105,7 @@ historical_dataframe['Date'] = pd.to_datetime(historical_dataframe['Date']).dt.s
 # -----------------------------------------------------------------------
 date_from_new_dataframe = new_dataframe_1['Date'].values.max()
 if date_from_new_dataframe != historical_dataframe['Date'].values.max():
-  historical_dataframe = historical_dataframe.append(new_dataframe_1)
+  historical_dataframe = concat_dataframes([historical_dataframe, new_dataframe_1])
   historical_dataframe = historical_dataframe.sort_values(by=['Date'])
   historical_dataframe = historical_dataframe.reset_index(drop=True)
   historical_dataframe = historical_dataframe.astype(str)
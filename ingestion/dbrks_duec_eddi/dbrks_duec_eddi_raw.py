@@ -62,8 +62,7 @@ CONNECTION_STRING = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CON
 file_path_config = "/config/pipelines/nhsx-au-analytics/"
 file_name_config = "config_duec_eddi_dbrks.json"
 file_system_config = dbutils.secrets.get(scope="AzureDataLake", key="DATALAKE_CONTAINER_NAME")
-config_JSON = datalake_download(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
-config_JSON = json.loads(io.BytesIO(config_JSON).read())
+config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
 
 # COMMAND ----------
 
@@ -82,12 +81,13 @@ sink_file = config_JSON['pipeline']['raw']['appended_file']
 # -------------------------
 latestFolder = datalake_latestFolder(CONNECTION_STRING, file_system, new_source_path)
 eddi_file_name_list = datalake_listContents(CONNECTION_STRING, file_system, new_source_path+latestFolder)
-allnew_dataframe = pd.DataFrame()
+allnew_dataframe = DataFrameAccumulator()
 for new_source_file in eddi_file_name_list:
   new_dataset = datalake_download(CONNECTION_STRING, file_system, new_source_path+latestFolder, new_source_file)
   new_dataframe = pd.read_csv(io.BytesIO(new_dataset))
   new_dataframe['Date and time of extract dd-MM-yyyy HH:mm:ss'] = pd.to_datetime(new_dataframe['Date and time of extract dd-MM-yyyy HH:mm:ss'], format='%d-%m-%Y %H:%M:%S')
-  allnew_dataframe = allnew_dataframe.append(new_dataframe).reset_index(drop=True)
+  allnew_dataframe.add(new_dataframe)
+allnew_dataframe = allnew_dataframe.collect(ignore_index=True)
 
 # COMMAND ----------
 
@@ -104,7 +104,7 @@ dates_in_historical = list(historical_dataframe['Date and time of extract dd-MM-
 if date_from_new_dataframe in dates_in_historical:
   print("data already exists")
 else:
-  historical_dataframe = historical_dataframe.append(allnew_dataframe)
+  historical_dataframe = concat_dataframes([historical_dataframe, allnew_dataframe])
   historical_dataframe = historical_dataframe.sort_values(by=['Date and time of extract dd-MM-yyyy HH:mm:ss'])
   historical_dataframe = historical_dataframe.reset_index(drop=True)
 
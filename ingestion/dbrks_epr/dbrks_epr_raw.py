@@ -63,8 +63,7 @@ CONNECTION_STRING = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CON
 file_path_config = "/config/pipelines/nhsx-au-analytics/"
 file_name_config = "config_epr_dbrks.json"
 file_system_config = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
-config_JSON = datalake_download(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
-config_JSON = json.loads(io.BytesIO(config_JSON).read())
+config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
 
 # COMMAND ----------
 
@@ -85,8 +84,7 @@ latestFolder = datalake_latestFolder(CONNECTION_STRING, file_system, new_source_
 file_name_list = datalake_listContents(CONNECTION_STRING, file_system, new_source_path+latestFolder)
 file_name_list = [file for file in file_name_list if '.xlsx' in file]
 for new_source_file in file_name_list:
-  new_dataset = datalake_download(CONNECTION_STRING, file_system, new_source_path+latestFolder, new_source_file)
-  new_dataframe = pd.read_excel(io.BytesIO(new_dataset),  engine  = 'openpyxl') 
+  new_dataframe = read_landed_sheet(CONNECTION_STRING, file_system, new_source_path+latestFolder, new_source_file) 
   #new_dataframe['Date'] = pd.to_datetime(new_dataframe['BiWeekly_Date']).dt.strftime('%Y-%m-%d')
 
 
@@ -106,7 +104,7 @@ historical_dataframe = pd.read_parquet(io.BytesIO(historical_dataset), engine="p
 date_from_new_dataframe = new_dataframe["BiWeekly_Date"].values.max()
 historical_dataframe['BiWeekly_Date'] = pd.to_datetime(historical_dataframe['BiWeekly_Date'])
 if date_from_new_dataframe != historical_dataframe['BiWeekly_Date'].values.max():
-  historical_dataframe = historical_dataframe.append(new_dataframe)
+  historical_dataframe = concat_dataframes([historical_dataframe, new_dataframe])
   historical_dataframe = historical_dataframe.sort_values(by=['BiWeekly_Date'])
   historical_dataframe = historical_dataframe.reset_index(drop=True)
   historical_dataframe = historical_dataframe.astype(str)
@@ -65,8 +65,7 @@ CONNECTION_STRING = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CON
 file_path_config = "/config/pipelines/nhsx-au-analytics/"
 file_name_config = "config_gp_eps_dbrks.json"
 file_system_config = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
-config_JSON = datalake_download(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
-config_JSON = json.loads(io.BytesIO(config_JSON).read())
+config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
 
 # COMMAND ----------
 
@@ -125,13 +124,16 @@ datalake_upload(file_contents, CONNECTION_STRING, file_system, new_source_path+c
 latestFolder = datalake_latestFolder(CONNECTION_STRING, file_system, historical_source_path)
 historical_dataset = datalake_download(CONNECTION_STRING, file_system, historical_source_path+latestFolder, historical_source_file)
 historical_dataframe = pd.read_parquet(io.BytesIO(historical_dataset), engine="pyarrow")
+date_fingerprints = load_fingerprint_index(CONNECTION_STRING, file_system, historical_source_path+latestFolder, historical_source_file, historical_dataframe, ['Date'])
 
 # Append new data to historical data
 # -----------------------------------------------------------------------
-if eps_df_snapshot['Date'].max() not in historical_dataframe.values:
-  historical_dataframe = historical_dataframe.append(eps_df_snapshot)
+# every row of the snapshot carries the same Date
+if not date_fingerprints.contains(eps_df_snapshot).any():
+  historical_dataframe = concat_dataframes([historical_dataframe, eps_df_snapshot])
   historical_dataframe = historical_dataframe.reset_index(drop=True)
   historical_dataframe.index.name = "Unique ID"
+  date_fingerprints.add(eps_df_snapshot)
 else:
   print("data already exists")
 
@@ -141,3 +143,4 @@ else:
 file_contents = io.BytesIO()
 historical_dataframe.to_parquet(file_contents, engine="pyarrow")
 datalake_upload(file_contents, CONNECTION_STRING, file_system, sink_path+current_date_path, sink_file)
+upload_fingerprint_index(date_fingerprints, CONNECTION_STRING, file_system, sink_path+current_date_path, sink_file)
@@ -60,8 +60,7 @@ CONNECTION_STRING = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CON
 file_path_config = "/config/pipelines/nhsx-au-analytics/"
 file_name_config = "config_gp_it_standards_dbrks.json"
 file_system_config = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
-config_JSON = datalake_download(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
-config_JSON = json.loads(io.BytesIO(config_JSON).read())
+config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
 
 # COMMAND ----------
 
@@ -109,7 +108,7 @@ years_in_new = df_processed["Date"].unique().tolist()[0]
 if years_in_new in years_in_historical:
   print('Data already exists in historical data')
 else:
-  historical_dataframe = historical_dataframe.append(df_processed)
+  historical_dataframe = concat_dataframes([historical_dataframe, df_processed])
   historical_dataframe = historical_dataframe.sort_values(by=['Date'])
   historical_dataframe = historical_dataframe.reset_index(drop=True)
   historical_dataframe = historical_dataframe.astype(str)
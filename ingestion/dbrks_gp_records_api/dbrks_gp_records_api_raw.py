@@ -64,8 +64,7 @@ CONNECTION_STRING = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CON
 file_path_config = "/config/pipelines/nhsx-au-analytics/"
 file_name_config = "config_gp_records_api_dbrks.json"
 file_system_config = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
-config_JSON = datalake_download(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
-config_JSON = json.loads(io.BytesIO(config_JSON).read())
+config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
 
 # COMMAND ----------
 
@@ -126,7 +125,7 @@ historical_dataframe['Date of extract'] = pd.to_datetime(historical_dataframe['D
 # Append new data to historical data
 # -----------------------------------------------------------------------
 if date not in historical_dataframe["Date of extract"].values:
-  historical_dataframe = historical_dataframe.append(df_new)
+  historical_dataframe = concat_dataframes([historical_dataframe, df_new])
   historical_dataframe = historical_dataframe.reset_index(drop=True)
   historical_dataframe.index.name = "Unique ID"
 else:
@@ -60,8 +60,7 @@ CONNECTION_STRING = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CON
 file_path_config = "/config/pipelines/nhsx-au-analytics/"
 file_name_config = "config_gp_patient_survey_dbrks.json"
 file_system_config = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
-config_JSON = datalake_download(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
-config_JSON = json.loads(io.BytesIO(config_JSON).read())
+config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
 
 # COMMAND ----------
 
@@ -124,7 +123,7 @@ historical_dataframe = pd.read_parquet(io.BytesIO(historical_dataset), engine="p
 # Append new data to historical data
 # -------------------------------------------------------------------------
 if date not in historical_dataframe["Date"].values:
-  historical_dataframe = historical_dataframe.append(new_dataframe)
+  historical_dataframe = concat_dataframes([historical_dataframe, new_dataframe])
   historical_dataframe = historical_dataframe.reset_index(drop=True)
   historical_dataframe.index.name = "Unique ID"
 else:
@@ -64,8 +64,7 @@ CONNECTION_STRING = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CON
 file_path_config = "/config/pipelines/nhsx-au-analytics/"
 file_name_config = "config_home_care_user_service.json"
 file_system_config = dbutils.secrets.get(scope="AzureDataLake", key="DATALAKE_CONTAINER_NAME")
-config_JSON = datalake_download(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
-config_JSON = json.loads(io.BytesIO(config_JSON).read())
+config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
 
 # COMMAND ----------
 
@@ -88,12 +87,10 @@ dom_list = [file for file in file_name_list if 'Home Care' in file]
 res_list = [file for file in file_name_list if 'Care Home' in file]
 
 for dom_source_file in dom_list:
-  new_dataset = datalake_download(CONNECTION_STRING, file_system, new_source_path+latestFolder, dom_source_file)
-  df_dom = pd.read_excel(io.BytesIO(new_dataset), engine='openpyxl')
+  df_dom = read_landed_sheet(CONNECTION_STRING, file_system, new_source_path+latestFolder, dom_source_file)
 
 for res_source_file in res_list:
-  care_home_dataset = datalake_download(CONNECTION_STRING, file_system, new_source_path+latestFolder, res_source_file)
-  df_res = pd.read_excel(io.BytesIO(care_home_dataset), sheet_name='CH residents', engine='openpyxl')
+  df_res = read_landed_sheet(CONNECTION_STRING, file_system, new_source_path+latestFolder, res_source_file, sheet_name = 'CH residents')
 
 # COMMAND ----------
 
@@ -179,7 +176,7 @@ check = all(item in dates_in_historical for item in dates_in_new)
 if check:
   print('Data already exists in historical data')
 else:
-  historical_dataframe = historical_dataframe.append(df_hcsu)
+  historical_dataframe = concat_dataframes([historical_dataframe, df_hcsu])
   historical_dataframe = historical_dataframe.sort_values(by=['Date'])
   historical_dataframe = historical_dataframe.reset_index(drop=True)
 
@@ -63,8 +63,7 @@ CONNECTION_STRING = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CON
 file_path_config = "/config/pipelines/nhsx-au-analytics/"
 file_name_config = "config_national_digital_channels_highlights_dbrks.json"
 file_system_config = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
-config_JSON = datalake_download(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
-config_JSON = json.loads(io.BytesIO(config_JSON).read())
+config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
 
 # COMMAND ----------
 
@@ -84,8 +83,7 @@ latestFolder = datalake_latestFolder(CONNECTION_STRING, file_system, new_source_
 file_name_list = datalake_listContents(CONNECTION_STRING, file_system, new_source_path+latestFolder)
 source_file  = [file for file in file_name_list if '.xlsx' in file][0]
 
-new_dataset = datalake_download(CONNECTION_STRING, file_system, new_source_path+latestFolder, source_file)
-new_data = pd.read_excel(io.BytesIO(new_dataset), sheet_name = ['Highlights'], engine='openpyxl')
+new_data = read_landed_sheet(CONNECTION_STRING, file_system, new_source_path+latestFolder, source_file, sheet_name = ['Highlights'])
 
 new_data_df = new_data['Highlights']
 
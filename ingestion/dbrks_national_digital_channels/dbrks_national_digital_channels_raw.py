@@ -63,8 +63,7 @@ CONNECTION_STRING = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CON
 file_path_config = "/config/pipelines/nhsx-au-analytics/"
 file_name_config = "config_national_digital_channels_dbrks.json"
 file_system_config = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
-config_JSON = datalake_download(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
-config_JSON = json.loads(io.BytesIO(config_JSON).read())
+config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
 
 # COMMAND ----------
 
@@ -86,17 +85,16 @@ appended_forecasts_file = config_JSON['pipeline']['raw']['appended_file_forecast
 latestFolder = datalake_latestFolder(CONNECTION_STRING, file_system, new_source_path)
 file_name_list = datalake_listContents(CONNECTION_STRING, file_system, new_source_path+latestFolder)
 source_file  = [file for file in file_name_list if '.xlsx' in file][0]
-new_dataset = datalake_download(CONNECTION_STRING, file_system, new_source_path+latestFolder, source_file)
 
 # COMMAND ----------
 
 # Pull daily dataset
 # ----------------------------------------
-new_data = pd.read_excel(io.BytesIO(new_dataset), sheet_name = ['NHS App data file', 'vaccinations', 'EPS'], engine='openpyxl')
+new_data = read_landed_sheet(CONNECTION_STRING, file_system, new_source_path+latestFolder, source_file, sheet_name = ['NHS App data file', 'vaccinations', 'EPS'])
 new_data_df = pd.DataFrame()
 for sheet_name, df in new_data.items():
   if new_data_df.empty:
-    new_data_df = new_data_df.append(df)
+    new_data_df = df.copy()
   else:
     new_data_df = new_data_df.merge(df, how='outer', on = 'Daily')
 daily_raw_df = new_data_df.copy()  
@@ -112,11 +110,11 @@ datalake_upload(file_contents, CONNECTION_STRING, file_system, appended_path+cur
 
 # Pull monthly dataset
 # ----------------------------------------
-new_data_month = pd.read_excel(io.BytesIO(new_dataset), sheet_name = ['jumpoffs', 'NHS App Dash', 'NHS UK Site Sections', 'Appts in Primary Care', 'NHS Login report', 'NHS.UK report'], engine='openpyxl')
+new_data_month = read_landed_sheet(CONNECTION_STRING, file_system, new_source_path+latestFolder, source_file, sheet_name = ['jumpoffs', 'NHS App Dash', 'NHS UK Site Sections', 'Appts in Primary Care', 'NHS Login report', 'NHS.UK report'])
 new_data_df_month = pd.DataFrame()
 for sheet_name, df in new_data_month.items():
   if new_data_df_month.empty:
-    new_data_df_month = new_data_df_month.append(df)
+    new_data_df_month = df.copy()
   else:
     new_data_df_month = new_data_df_month.merge(df, how='outer', on = 'Monthly')
 monthly_raw_df = new_data_df_month.copy()  
@@ -132,11 +130,11 @@ datalake_upload(file_contents, CONNECTION_STRING, file_system, appended_path+cur
 
 # Pull forecasts dataset
 # ----------------------------------------
-new_data_forecasts = pd.read_excel(io.BytesIO(new_dataset), sheet_name = ['Forecasts'], engine='openpyxl')
+new_data_forecasts = read_landed_sheet(CONNECTION_STRING, file_system, new_source_path+latestFolder, source_file, sheet_name = ['Forecasts'])
 new_data_df_forecasts = pd.DataFrame()
 for sheet_name, df in new_data_forecasts.items():
   if new_data_df_forecasts.empty:
-    new_data_df_forecasts = new_data_df_forecasts.append(df)
+    new_data_df_forecasts = df.copy()
   else:
     new_data_df_forecasts = new_data_df_forecasts.merge(df, how='outer', on = 'Monthly')
 forecasts_raw_df = new_data_df_forecasts.copy()  
@@ -152,7 +150,7 @@ datalake_upload(file_contents, CONNECTION_STRING, file_system, appended_path+cur
 
 #Pull messages dataset
 # ----------------------------------------
-new_data_messages = pd.read_excel(io.BytesIO(new_dataset), sheet_name = 'Messaging & Notifications', engine='openpyxl')
+new_data_messages = read_landed_sheet(CONNECTION_STRING, file_system, new_source_path+latestFolder, source_file, sheet_name = 'Messaging & Notifications')
 new_data_messages['Date'] = pd.to_datetime(new_data_messages['Date'])
 new_data_messages_df = new_data_messages.copy()
 
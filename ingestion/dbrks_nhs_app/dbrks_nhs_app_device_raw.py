@@ -55,13 +55,16 @@ CONNECTION_STRING = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CON
 
 # COMMAND ----------
 
+# MAGIC %run /Shared/databricks/au-azure-databricks-cicd/functions/dbrks_date_functions
+
+# COMMAND ----------
+
 # Load JSON config from Azure datalake
 # -------------------------------------------------------------------------
 file_path_config = "/config/pipelines/nhsx-au-analytics/"
 file_name_config = "config_nhs_app_device_dbrks.json"
 file_system_config = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
-config_JSON = datalake_download(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
-config_JSON = json.loads(io.BytesIO(config_JSON).read())
+config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
 
 # COMMAND ----------
 
@@ -73,6 +76,7 @@ historical_source_path = config_JSON['pipeline']['raw']['appended_path']
 historical_source_file = config_JSON['pipeline']['raw']['appended_file']
 sink_path = config_JSON['pipeline']['raw']['appended_path']
 sink_file = config_JSON['pipeline']['raw']['appended_file']
+historical_schema = config_JSON['pipeline']['raw']['appended_schema']
 
 # COMMAND ----------
 
@@ -84,15 +88,14 @@ file_name_list = [file for file in file_name_list if 'WeeklyDownloads' in file]
 for new_source_file in file_name_list:
   new_dataset = datalake_download(CONNECTION_STRING, file_system, new_source_path+latestFolder, new_source_file)
   new_dataframe = pd.read_csv(io.BytesIO(new_dataset))
-  new_dataframe['Date'] = pd.to_datetime(new_dataframe['Date']).dt.strftime("%Y-%m-%d")
+  new_dataframe['Date'] = normalise_date_strings(new_dataframe['Date'])
 
 # COMMAND ----------
 
 #Pull historical dataset
 latestFolder = datalake_latestFolder(CONNECTION_STRING, file_system, historical_source_path)
-historical_dataset = datalake_download(CONNECTION_STRING, file_system, historical_source_path+latestFolder, historical_source_file)
-historical_dataframe = pd.read_parquet(io.BytesIO(historical_dataset), engine="pyarrow")
-historical_dataframe['Date'] = pd.to_datetime(historical_dataframe['Date']).dt.strftime("%Y-%m-%d")
+historical_dataframe = datalake_read_parquet(CONNECTION_STRING, file_system, historical_source_path+latestFolder, historical_source_file)
+historical_dataframe['Date'] = normalise_date_strings(historical_dataframe['Date'])
 
 # Append new data to historical data
 # -----------------------------------------------------------------------
@@ -101,15 +104,15 @@ dates_in_new = new_dataframe["Date"].unique().tolist()[0]
 if dates_in_new in dates_in_historical:
   print('Data already exists in historical data')
 else:
-  historical_dataframe = historical_dataframe.append(new_dataframe)
+  historical_dataframe = concat_dataframes([historical_dataframe, new_dataframe])
   historical_dataframe = historical_dataframe.sort_values(by=['Date'])
   historical_dataframe = historical_dataframe.reset_index(drop=True)
-  historical_dataframe = historical_dataframe.astype(str)
 
 # COMMAND ----------
 
 # Upload processed data to datalake
 current_date_path = datetime.now().strftime('%Y-%m-%d') + '/'
+historical_dataframe = enforce_schema(historical_dataframe, historical_schema)
 file_contents = io.BytesIO()
 historical_dataframe.to_parquet(file_contents, engine="pyarrow")
 datalake_upload(file_contents, CONNECTION_STRING, file_system, sink_path+current_date_path, sink_file)
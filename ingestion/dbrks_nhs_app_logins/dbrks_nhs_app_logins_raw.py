@@ -57,13 +57,16 @@ CONNECTION_STRING = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CON
 
 # COMMAND ----------
 
+# MAGIC %run /Shared/databricks/au-azure-databricks-cicd/functions/dbrks_date_functions
+
+# COMMAND ----------
+
 # Load JSON config from Azure datalake
 # -------------------------------------------------------------------------
 file_path_config = "/config/pipelines/nhsx-au-analytics/"
 file_name_config = "config_nhs_app_logins_dbrks.json"
 file_system_config = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
-config_JSON = datalake_download(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
-config_JSON = json.loads(io.BytesIO(config_JSON).read())
+config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
 
 # COMMAND ----------
 
@@ -92,7 +95,7 @@ for new_source_file in nhs_login_file_name_list:
 # Process new snapshot into required format
 # -------------------------
 
-new_dataframe['week_commencing'] = pd.to_datetime(new_dataframe['week_commencing']).dt.strftime('%Y-%m-%d')
+new_dataframe['week_commencing'] = normalise_date_strings(new_dataframe['week_commencing'])
 
 #pivot data and clean up
 new_dataframe = pd.pivot_table(new_dataframe, index = 'week_commencing', columns='metric_title')
@@ -120,15 +123,8 @@ historical_dataframe = pd.read_parquet(io.BytesIO(historical_dataset), engine="p
 
 # Combine new data with historic data
 # -----------------------------------
-new_dates = list(new_dataframe['_time'])
-historical_dates = list(historical_dataframe['_time'])
-for date in new_dates:
-  if date in historical_dates:
-    historical_dataframe.loc[historical_dataframe["_time"] == date, "Accounts"] = new_dataframe.loc[new_dataframe["_time"] == date, 'Accounts'].tolist()[0]
-    historical_dataframe.loc[historical_dataframe["_time"] == date, "Total Logins"] = new_dataframe.loc[new_dataframe["_time"] == date, 'Total Logins'].tolist()[0]
-  else:
-    historical_dataframe = historical_dataframe.append(new_dataframe[new_dataframe['_time'] == date])
-    historical_dataframe = historical_dataframe.reset_index(drop = True)
+# weeks already in the history are restated with the new figures, new weeks are appended
+historical_dataframe = upsert_dataframe(historical_dataframe, new_dataframe, '_time', ['Accounts', 'Total Logins'])
 
 # COMMAND ----------
 
@@ -59,17 +59,17 @@ CONNECTION_STRING = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CON
 file_path_config = "/config/pipelines/reference_tables/"
 file_name_config = "config_ons_population_api.json"
 file_system_config = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
-config_JSON = datalake_download(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
-config_JSON = json.loads(io.BytesIO(config_JSON).read())
+config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
 
 # COMMAND ----------
 
 # Read parameters from JSON config
 # -------------------------------------------------------------------------
 file_system = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
-new_source_path = config_JSON['pipeline']['raw']['databricks'][0]['code_maping_sink_path']
-sink_path = config_JSON['pipeline']['raw']['databricks'][0]['code_maping_sink_path']
-sink_file = config_JSON['pipeline']['raw']['databricks'][0]['code_maping_sink_file']
+metric_config = pipeline_metrics(config_JSON, 'raw')['ons_population_api']
+new_source_path = metric_config['code_maping_sink_path']
+sink_path = metric_config['code_maping_sink_path']
+sink_file = metric_config['code_maping_sink_file']
 
 # COMMAND ----------
 
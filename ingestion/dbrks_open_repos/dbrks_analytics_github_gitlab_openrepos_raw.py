@@ -65,8 +65,7 @@ CONNECTION_STRING = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CON
 file_path_config = "/config/pipelines/nhsx-au-analytics/"
 file_name_config = "config_openrepos_dbrks.json"
 file_system_config = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
-config_JSON = datalake_download(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
-config_JSON = json.loads(io.BytesIO(config_JSON).read())
+config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
 
 # COMMAND ----------
 
@@ -94,7 +93,7 @@ github_orgs = [
         "nhsengland",
         "nice-digital",
     ]
-df_github = pd.DataFrame()
+df_github = DataFrameAccumulator()
 for org in github_orgs:
   data = [1]
   page = 1
@@ -109,8 +108,9 @@ for org in github_orgs:
     response = urllib.request.urlopen(url)
     data = json.loads(response.read())
     flat_data = pd.json_normalize(data)
-    df_github = df_github.append(flat_data)
+    df_github.add(flat_data)
     page = page + 1
+df_github = df_github.collect()
 df_github["open_repos"] = 1
 df_github = df_github[
         [
@@ -127,7 +127,7 @@ df_github = df_github[
         }
     )
 gitlab_groups = [2955125]
-df_gitlab = pd.DataFrame()
+df_gitlab = DataFrameAccumulator()
 for group in gitlab_groups:
   data = [1]
   page = 1
@@ -142,9 +142,10 @@ for group in gitlab_groups:
     response = urllib.request.urlopen(url)
     data = json.loads(response.read())
     flat_data = pd.json_normalize(data)
-    df_gitlab = df_gitlab.append(flat_data)
+    df_gitlab.add(flat_data)
     page = page + 1
     time.sleep(0.2)
+df_gitlab = df_gitlab.collect()
 df_gitlab["org"] = df_gitlab["namespace.full_path"].apply(lambda x: x.split("/")[0])
 df_gitlab["link"] = "https://gitlab.com/" + df_gitlab["org"]
 df_gitlab["open_repos"] = 1
@@ -63,8 +63,7 @@ CONNECTION_STRING = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CON
 file_path_config = "/config/pipelines/reference_tables/"
 file_name_config = "config_shapefiles.json"
 file_system_config = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
-config_JSON = datalake_download(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
-config_JSON = json.loads(io.BytesIO(config_JSON).read())
+config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
 
 # COMMAND ----------
 
@@ -73,13 +72,14 @@ config_JSON = json.loads(io.BytesIO(config_JSON).read())
 file_system = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
 ods_source_path = config_JSON['pipeline']['raw']["source_path"]
 ods_source_file = config_JSON['pipeline']['raw']["source_file"]
-shapefile_sink_path = config_JSON['pipeline']['raw']['databricks'][0]["shapefile_sink_path"]
-shapefile_sink_file = config_JSON['pipeline']['raw']['databricks'][0]["shapefile_sink_file"]
-code_maping_sink_path = config_JSON['pipeline']['raw']['databricks'][0]["code_maping_sink_path"]
-code_maping_sink_file = config_JSON['pipeline']['raw']['databricks'][0]["code_maping_sink_file"]
-markdown_sink_path = config_JSON['pipeline']['raw']['databricks'][0]["markdown_sink_path"]
-markdown_sink_file = config_JSON['pipeline']['raw']['databricks'][0]["markdown_sink_file"]
-table_name = config_JSON['pipeline']["staging"][0]['sink_table']
+metric_config = pipeline_metrics(config_JSON, 'raw')['shapefile_ccg_boundaries_snapshot']
+shapefile_sink_path = metric_config["shapefile_sink_path"]
+shapefile_sink_file = metric_config["shapefile_sink_file"]
+code_maping_sink_path = metric_config["code_maping_sink_path"]
+code_maping_sink_file = metric_config["code_maping_sink_file"]
+markdown_sink_path = metric_config["markdown_sink_path"]
+markdown_sink_file = metric_config["markdown_sink_file"]
+table_name = metric_config['sink_table']
 
 # COMMAND ----------
 
@@ -57,13 +57,16 @@ CONNECTION_STRING = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CON
 
 # COMMAND ----------
 
+# MAGIC %run /Shared/databricks/au-azure-databricks-cicd/functions/dbrks_date_functions
+
+# COMMAND ----------
+
 # Load JSON config from Azure datalake
 # -------------------------------------------------------------------------
 file_path_config = "/config/pipelines/reference_tables/"
 file_name_config = "config_registered_gp_practices.json"
 file_system_config = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
-config_JSON = datalake_download(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
-config_JSON = json.loads(io.BytesIO(config_JSON).read())
+config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
 
 # COMMAND ----------
 
@@ -91,18 +94,10 @@ for new_source_file in gp_registered_file_name_list:
 # Data Processing for new snapshot 
 # --------------------------------
 
-#Function to generate Finanical year from a datetime column
-#----------------------------------------------------------
-def fy(entry):
-  if entry['EXTRACT_DATE'].month > 3:
-    return str(entry['EXTRACT_DATE'].year)+"/"+str(entry['EXTRACT_DATE'].year+1)
-  else:
-    return str(entry['EXTRACT_DATE'].year-1)+"/"+str(entry['EXTRACT_DATE'].year)
-
 #Data processing
 #----------------------------------------------------------
-new_dataframe['EXTRACT_DATE'] = pd.to_datetime(new_dataframe['EXTRACT_DATE']) 
-new_dataframe['FY'] = new_dataframe.apply(fy,axis=1) #----- Apply FY function to dataframe
+new_dataframe['EXTRACT_DATE'] = parse_dates(new_dataframe['EXTRACT_DATE'])
+new_dataframe['FY'] = financial_year(new_dataframe['EXTRACT_DATE']) #----- Financial year of the extract date, e.g. 2022/2023
 col_keep = ['PRACTICE_CODE','PRACTICE_NAME','EXTRACT_DATE','FY']
 new_dataframe = new_dataframe[col_keep]
 new_dataframe = new_dataframe.reset_index(drop = True)
@@ -122,7 +117,7 @@ fy_edition_in_new = new_dataframe["FY"].unique().tolist()[0]
 if fy_edition_in_new in fy_editions_in_historical:
   print('New data already exists in historical data')
 else:
-  historical_dataframe = historical_dataframe.append(new_dataframe)
+  historical_dataframe = concat_dataframes([historical_dataframe, new_dataframe])
   historical_dataframe = historical_dataframe.sort_values(by=['FY'])
   historical_dataframe = historical_dataframe.reset_index(drop=True)
 
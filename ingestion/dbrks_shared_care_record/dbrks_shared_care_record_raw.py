@@ -62,8 +62,7 @@ CONNECTION_STRING = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CON
 file_path_config = "/config/pipelines/nhsx-au-analytics/"
 file_name_config = "config_shared_care_record_dbrks.json"
 file_system_config = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
-config_JSON = datalake_download(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
-config_JSON = json.loads(io.BytesIO(config_JSON).read())
+config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
 
 # COMMAND ----------
 
@@ -79,22 +78,23 @@ historical_source_path = config_JSON['pipeline']['raw']['sink_path']
 # Read org parameters from JSON config, store in dictionaries
 # -------------------------------------------------------------------------
 
+metrics = pipeline_metrics(config_JSON, 'proc')
 table_name_dict = {
-'icb': config_JSON['pipeline']['staging'][0]['sink_table'],
-'trust': config_JSON['pipeline']['staging'][1]['sink_table'],
-'pcn': config_JSON['pipeline']['staging'][2]['sink_table'],
-'la': config_JSON['pipeline']['staging'][3]['sink_table'],
-'community': config_JSON['pipeline']['staging'][4]['sink_table'],
-'other': config_JSON['pipeline']['staging'][5]['sink_table']
+'icb': metrics['shcr_partners_icb_data_month_count']['sink_table'],
+'trust': metrics['shcr_partners_trust_data_month_count']['sink_table'],
+'pcn': metrics['shcr_partners_pcn_data_month_count']['sink_table'],
+'la': metrics['shcr_partners_la_data_month_count']['sink_table'],
+'community': metrics['shcr_partners_community_data_month_count']['sink_table'],
+'other': metrics['shcr_partners_other_data_month_count']['sink_table']
 }
 
 file_name_dict = {
-'icb': config_JSON['pipeline']['proc'][0]['sink_file'],
-'trust': config_JSON['pipeline']['proc'][1]['sink_file'],
-'pcn': config_JSON['pipeline']['proc'][2]['sink_file'],
-'la': config_JSON['pipeline']['proc'][3]['sink_file'],
-'community': config_JSON['pipeline']['proc'][4]['sink_file'],
-'other': config_JSON['pipeline']['proc'][5]['sink_file'],
+'icb': metrics['shcr_partners_icb_data_month_count']['sink_file'],
+'trust': metrics['shcr_partners_trust_data_month_count']['sink_file'],
+'pcn': metrics['shcr_partners_pcn_data_month_count']['sink_file'],
+'la': metrics['shcr_partners_la_data_month_count']['sink_file'],
+'community': metrics['shcr_partners_community_data_month_count']['sink_file'],
+'other': metrics['shcr_partners_other_data_month_count']['sink_file'],
 }
 
 # COMMAND ----------
@@ -143,8 +143,8 @@ org_dict = {
 'other':'Other partners'
 }
 
-#create a dictionary where keys are the  names of the organsiations and the values are blank dataframes that will be popualted later
-df_dict = {i:pd.DataFrame() for i in org_dict}
+#create a dictionary where keys are the  names of the organsiations and the values are accumulators that collect each sheet, concatenated once all files are read
+df_dict = {i:DataFrameAccumulator() for i in org_dict}
 
 #loop through each submitted file in the landing area. For each file go through the sheets and add append the relevant data to dataframes in df_dict
 for filename in directory:
@@ -200,7 +200,7 @@ for filename in directory:
         xls_file[key]["Care Providers"] = pd.to_numeric(xls_file[key]["Care Providers"], errors='coerce').fillna(0).astype(int)
 
         # append results to ICB dataframe in df_dict
-        df_dict['icb'] = df_dict['icb'].append(xls_file[key], ignore_index=True)
+        df_dict['icb'].add(xls_file[key])
 
 
     #### OTHER ORG CALCULATIONS Orgs other than ICB are all the same so can be processed by looping through the dictionary ####
@@ -239,7 +239,10 @@ for filename in directory:
        
           
         # append results to relevant dataframe in df_dict
-        df_dict[i] = df_dict[i].append(xls_file[key].iloc[:, 0:9], ignore_index=True)
+        df_dict[i].add(xls_file[key].iloc[:, 0:9])
+
+#concatenate the collected sheets for each organisation in one pass
+df_dict = {i:df_dict[i].collect(ignore_index=True) for i in df_dict}
 
 #Remove any non-required columns from  dataframes
 for i in list(df_dict.keys()):
@@ -432,7 +435,7 @@ for i in df_dict.keys():
   if dates_in_new in dates_in_historic:
     print(f'{i} Data already exists in historical data')
   else:
-    historic_df_dict[i] = historic_df_dict[i].append(df_dict[i])
+    historic_df_dict[i] = concat_dataframes([historic_df_dict[i], df_dict[i]])
     #historic_df_dict[i] = historic_df_dict[i].sort_values(by=['For Month'])
     historic_df_dict[i] = historic_df_dict[i].reset_index(drop=True)
     historic_df_dict[i] = historic_df_dict[i].astype(str)
@@ -99,7 +99,7 @@ historical_dataframe = pd.read_parquet(io.BytesIO(historical_dataset), engine="p
 # -----------------------------------------------------------------------
 date_from_new_dataframe = pd.to_datetime(new_dataframe['_time']).values.max()
 if date_from_new_dataframe != pd.to_datetime(historical_dataframe['_time']).values.max():
-  historical_dataframe = historical_dataframe.append(new_dataframe)
+  historical_dataframe = concat_dataframes([historical_dataframe, new_dataframe])
   historical_dataframe['_time'] = pd.to_datetime(historical_dataframe['_time'])
   historical_dataframe = historical_dataframe.sort_values(by=['_time'])
   historical_dataframe = historical_dataframe.reset_index(drop=True)
@@ -62,8 +62,7 @@ CONNECTION_STRING = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CON
 file_path_config = "/config/pipelines/nhsx-au-analytics/"
 file_name_config = "config_toc_messages_dbrks.json"
 file_system_config = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
-config_JSON = datalake_download(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
-config_JSON = json.loads(io.BytesIO(config_JSON).read())
+config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
 
 # COMMAND ----------
 
@@ -99,7 +98,7 @@ historical_dataframe = pd.read_parquet(io.BytesIO(historical_dataset), engine="p
 # -----------------------------------------------------------------------
 date_from_new_dataframe = pd.to_datetime(new_dataframe['_time']).values.max()
 if date_from_new_dataframe != pd.to_datetime(historical_dataframe['_time']).values.max():
-  historical_dataframe = historical_dataframe.append(new_dataframe)
+  historical_dataframe = concat_dataframes([historical_dataframe, new_dataframe])
   historical_dataframe['_time'] = pd.to_datetime(historical_dataframe['_time'])
   historical_dataframe = historical_dataframe.sort_values(by=['_time'])
   historical_dataframe = historical_dataframe.reset_index(drop=True)
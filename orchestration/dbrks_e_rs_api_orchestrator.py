@@ -57,8 +57,7 @@ CONNECTION_STRING = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CON
 file_path_config = "/config/pipelines/nhsx-au-analytics/"
 file_name_config = "config_esr_api.json"
 file_system_config = dbutils.secrets.get(scope="AzureDataLake", key="DATALAKE_CONTAINER_NAME")
-config_JSON = datalake_download(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
-config_JSON = json.loads(io.BytesIO(config_JSON).read())
+config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
 
 # COMMAND ----------
 
@@ -66,12 +65,23 @@ config_JSON = json.loads(io.BytesIO(config_JSON).read())
 #---------------------------------
 path_start = dbutils.secrets.get(scope='DatabricksNotebookPath', key="DATABRICKS_PATH")
 
+#Inputs of the metric notebooks, a notebook is skipped when they and the notebook are unchanged
+#since its last successful run, set force_refresh to "true" to run every notebook
+#---------------------------------
+dbutils.widgets.text("force_refresh", "false")
+force_refresh = dbutils.widgets.get("force_refresh") == "true"
+stage_inputs = pipeline_stage_inputs(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
+
 #Squentially run metric notebooks
 #---------------------------------
-for index, item in enumerate(config_JSON['pipeline']['project']['databricks']): # get index of objects in JSON array
-    try:
-        notebook = config_JSON['pipeline']['project']['databricks'][index]['databricks_notebook']
-        dbutils.notebook.run(path_start+notebook, 8000) # is 120 sec long enough for timeout?
-    except Exception as e:
-        print(e)
-        raise Exception()
+try:
+    for index, item in enumerate(config_JSON['pipeline']['project']['databricks']): # get index of objects in JSON array
+        try:
+            notebook = config_JSON['pipeline']['project']['databricks'][index]['databricks_notebook']
+            run_stage(CONNECTION_STRING, file_system_config, path_start+notebook, 8000, stage_inputs, force_refresh, memo=item.get('memo', True)) # is 120 sec long enough for timeout?
+        except Exception as e:
+            print(e)
+            raise Exception()
+finally:
+    # Write the I/O telemetry of this run, failed runs included
+    flush_telemetry(CONNECTION_STRING, file_system_config)
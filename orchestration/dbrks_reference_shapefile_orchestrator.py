@@ -63,8 +63,7 @@ CONNECTION_STRING = dbutils.secrets.get(scope="AzureDataLake", key="DATALAKE_CON
 file_path_config = "/config/pipelines/reference_tables/"
 file_name_config = "config_shapefiles.json"
 file_system_config = dbutils.secrets.get(scope="AzureDataLake", key="DATALAKE_CONTAINER_NAME")
-config_JSON = datalake_download(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
-config_JSON = json.loads(io.BytesIO(config_JSON).read())
+config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
 
 # COMMAND ----------
 
@@ -74,10 +73,14 @@ path_start = dbutils.secrets.get(scope='DatabricksNotebookPath', key="DATABRICKS
 
 #Squentially run metric notebooks
 #----------------------------------
-for index, item in enumerate(config_JSON['pipeline']['raw']['databricks']): # get index of objects in JSON array
-  try:
-    notebook = config_JSON['pipeline']['raw']['databricks'][index]['databricks_notebook']
-    dbutils.notebook.run(path_start+notebook, 8000) # is 120 sec long enough for timeout?
-  except Exception as e:
-    print(e)
-    raise Exception()
+try:
+  for index, item in enumerate(config_JSON['pipeline']['raw']['databricks']): # get index of objects in JSON array
+    try:
+      notebook = config_JSON['pipeline']['raw']['databricks'][index]['databricks_notebook']
+      dbutils.notebook.run(path_start+notebook, 8000, {'telemetry_run_id': telemetry_run_id()}) # is 120 sec long enough for timeout?
+    except Exception as e:
+      print(e)
+      raise Exception()
+finally:
+  # Write the I/O telemetry of this run, failed runs included
+  flush_telemetry(CONNECTION_STRING, file_system_config)
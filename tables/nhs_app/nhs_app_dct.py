@@ -37,6 +37,14 @@ import pandas as pd
 
 # COMMAND ----------
 
+# MAGIC %run /Shared/databricks/au-azure-databricks-cicd/functions/dbrks_date_functions
+
+# COMMAND ----------
+
+# MAGIC %run /Shared/databricks/au-azure-databricks-cicd/functions/dbrks_delta_functions
+
+# COMMAND ----------
+
 ##Getconfiguration
 print("Start reading configuration file")
 print("--------------------------------")
@@ -48,8 +56,7 @@ base_path = "proc/projects/nhsx_slt_analytics/national_digital_channels/nhs_app/
 CONNECTION_STRING = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONNECTION_STRING")
 file_system = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
 file_system_config = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
-config_JSON = datalake_download(CONNECTION_STRING, file_system_config, config_file_path, config_file_name,)
-config_JSON = json.loads(io.BytesIO(config_JSON).read())
+config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, config_file_path, config_file_name)
 print("Finish reading configuration file")
 
 #Get latest folder
@@ -64,55 +71,26 @@ print("Finish getting latest folder")
 
 # COMMAND ----------
 
-#Create pandas dataframe for the tables
-
-# nhs_app_uptake_gp_registered_population_day_prop 
-day_prop_data_dir = config_JSON['pipeline']['project']['databricks'][5]['sink_path']
-day_prop_file_name = config_JSON['pipeline']['project']['databricks'][5]['sink_file']
-
-print("Loaction and file name for nhs_app_uptake_gp_registered_population_day_prop")
-print(day_prop_data_dir)
-print(day_prop_file_name)
-print("--------------------------------")
-
-prop_data = datalake_download(CONNECTION_STRING, file_system, day_prop_data_dir+latestFolder, day_prop_file_name)
-df_day_prop = pd.read_csv(io.BytesIO(prop_data))
-
-
-#nhs_app_uptake_registrations_day_count
-day_count_data_dir = config_JSON['pipeline']['project']['databricks'][2]['sink_path']
-day_count_file_name = config_JSON['pipeline']['project']['databricks'][2]['sink_file']
-
-print("Loaction and file name for nhs_app_uptake_registrations_day_count")
-print(day_count_data_dir)
-print(day_count_file_name)
-print("--------------------------------")
-
-count_data = datalake_download(CONNECTION_STRING, file_system, day_count_data_dir+latestFolder, day_count_file_name)
-df_day_count = pd.read_csv(io.BytesIO(count_data))
-
-
-#nhs_app_uptake_p9_registrations_day_count
-reg_p9_day_count_data_dir = config_JSON['pipeline']['project']['databricks'][4]['sink_path']
-reg_p9_day_count_file_name = config_JSON['pipeline']['project']['databricks'][4]['sink_file']
-
-print("Loaction and file name for nhs_app_uptake_p9_registrations_day_count")
-print(reg_p9_day_count_data_dir)
-print(reg_p9_day_count_file_name)
-print("--------------------------------")
-
-reg_p9_day_count_data = datalake_download(CONNECTION_STRING, file_system, reg_p9_day_count_data_dir+latestFolder, reg_p9_day_count_file_name)
-df_reg_p9_day_count = pd.read_csv(io.BytesIO(reg_p9_day_count_data))
-
-# COMMAND ----------
+#Read the metric outputs the tables are built from: the columns they need from the Delta copy
+#of an output when the config has one (see dbrks_delta_functions), otherwise its csv
+def read_metric_output(metric, columns):
+  item = pipeline_metrics(config_JSON)[metric]
+  print("Location of " + item['metric'])
+  if 'delta' in item:
+    print(item['delta']['sink_path'])
+    print("--------------------------------")
+    return read_delta_table(CONNECTION_STRING, file_system, item['delta'], columns)
+  print(item['sink_path']+latestFolder+item['sink_file'])
+  print("--------------------------------")
+  data = datalake_download(CONNECTION_STRING, file_system, item['sink_path']+latestFolder, item['sink_file'])
+  return spark.createDataFrame(pd.read_csv(io.BytesIO(data), usecols=columns))
 
-#Create spark dataframe
 print("Creating Spark dataframes")
 print("--------------------------------")
 
-day_prop_df = spark.createDataFrame(df_day_prop)
-day_count_df = spark.createDataFrame(df_day_count)
-reg_p9_day_count_df = spark.createDataFrame(df_reg_p9_day_count)
+day_prop_df = read_metric_output('nhs_app_uptake_gp_registered_population_day_prop', ["Date", "Practice code", "Number of GP registered patients"])
+day_count_df = read_metric_output('nhs_app_uptake_registrations_day_count', ["Date", "Practice code", "Number of NHS app registrations"])
+reg_p9_day_count_df = read_metric_output('nhs_app_uptake_p9_registrations_day_count', ["Date", "Practice code", "Number of P9 NHS app registrations"])
 
 print("Finish creating dataframe")
 
@@ -16,7 +16,7 @@ USAGE:
 CONTRIBUTORS:   Abdu Nuhu
 CONTACT:        nhsx.data@england.nhs.uk
 CREATED:        07 Nov. 2022
-VERSION:        0.0.1
+VERSION:        0.0.2
 """
 
 # COMMAND ----------
@@ -58,18 +58,21 @@ CONNECTION_STRING = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CON
 file_path_config = dbutils.widgets.get("adf_file_path")
 file_name_config = dbutils.widgets.get("adf_file_name")
 log_table = dbutils.widgets.get("adf_log_table")
+# "true" counts every table with a full read instead of the partition metadata
+dbutils.widgets.text("adf_exact_count", "false")
+exact_count = dbutils.widgets.get("adf_exact_count") == "true"
 
 print('------------ Configuration -------------------')
 
 print(file_path_config)
 print(file_name_config)
 print(log_table)
+print(exact_count)
 
 print('-----------------------------------------------')
 
 file_system_config = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
-config_JSON = datalake_download(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
-config_JSON = json.loads(io.BytesIO(config_JSON).read())
+config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
 
 # COMMAND ----------
 
@@ -89,21 +92,22 @@ print('-----------------------------------------------------')
 # -------------------------------------------------------------------------
 today = pd.to_datetime('now').strftime("%Y-%m-%d %H:%M:%S")
 date = datetime.strptime(today, '%Y-%m-%d %H:%M:%S')
-staging_tbl = ''
-
-for entry in staging:
-  for key in entry:
-    if key == 'sink_table':
-      print('----------- Table to count --------------')
-      print(entry[key])
-      print('------------------------------------------')
-      staging_tbl = entry[key]
-      spark_df = read_sql_server_table(staging_tbl)
-      row_count = spark_df.count()
-      in_row = {'load_date':[date], 'tbl_name':[staging_tbl], 'aggregation':'Count', 'aggregate_value':[row_count]}
-      print('----------- Record to write in table --------------')
-      print(in_row)
-      print('----------------------------------------------------')
-      df = pd.DataFrame(in_row)
-      write_to_sql(df, log_table, "append")
-        
+staging_tbls = [entry['sink_table'] for entry in staging if 'sink_table' in entry]
+
+# row counts of all staging tables from SQL Server partition metadata in one query
+row_counts = {} if exact_count else sql_server_row_counts(staging_tbls)
+
+for staging_tbl in staging_tbls:
+  if staging_tbl not in row_counts:
+    # exact count by reading the table
+    print('----------- Table to count --------------')
+    print(staging_tbl)
+    print('------------------------------------------')
+    spark_df = read_sql_server_table(staging_tbl)
+    row_counts[staging_tbl] = spark_df.count()
+
+df = pd.DataFrame({'load_date': date, 'tbl_name': staging_tbls, 'aggregation': 'Count', 'aggregate_value': [row_counts[staging_tbl] for staging_tbl in staging_tbls]})
+print('----------- Records to write in table --------------')
+print(df)
+print('----------------------------------------------------')
+write_to_sql(df, log_table, "append")
@@ -66,8 +66,7 @@ log_table = "dbo.pre_load_log"
 agg_log_table = 'dbo.pre_load_agg_log'
 
 file_system_config = dbutils.secrets.get(scope="AzureDataLake", key="DATALAKE_CONTAINER_NAME")
-config_JSON = datalake_download(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
-config_JSON = json.loads(io.BytesIO(config_JSON).read())
+config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
 
 # COMMAND ----------
 
@@ -208,3 +207,9 @@ location_adult_socialcare_df = pd.DataFrame(location_adult_socialcare_agg_row)
 print("############# Log the follow to dbo.pre_load_agg_log table ######################################")
 display(location_adult_socialcare_df)
 write_to_sql(location_adult_socialcare_df, agg_log_table, "append")
+
+# COMMAND ----------
+
+# Hand the validated file to ingestion
+#___________________________________________________________
+hand_off_validated_frame(new_dataframe, new_dataset, CONNECTION_STRING, file_system, new_source_path+latestFolder, new_source_file)
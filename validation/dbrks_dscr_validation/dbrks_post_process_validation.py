@@ -61,16 +61,14 @@ file_name_config = "config_dscr_dbrks.json"
 log_table = "dbo.post_load_log"
 
 file_system_config = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
-config_JSON = datalake_download(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
-config_JSON = json.loads(io.BytesIO(config_JSON).read())
+config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
 
 # COMMAND ----------
 
 # Load Home Care Service User config file
 # -------------------------------------------------------------------------
 hcsu_file_name_config = "config_home_care_user_service.json"
-hcsu_config_JSON = datalake_download(CONNECTION_STRING, file_system_config, file_path_config, hcsu_file_name_config)
-hcsu_config_JSON = json.loads(io.BytesIO(hcsu_config_JSON).read())
+hcsu_config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, file_path_config, hcsu_file_name_config)
 
 # COMMAND ----------
 
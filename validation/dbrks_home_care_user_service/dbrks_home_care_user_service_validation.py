@@ -62,8 +62,7 @@ file_name_config = "config_home_care_user_service.json"
 log_table = "dbo.pre_load_log"
 
 file_system_config = dbutils.secrets.get(scope="AzureDataLake", key="DATALAKE_CONTAINER_NAME")
-config_JSON = datalake_download(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
-config_JSON = json.loads(io.BytesIO(config_JSON).read())
+config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
 
 # COMMAND ----------
 
@@ -80,8 +79,7 @@ latestFolder = datalake_latestFolder(CONNECTION_STRING, file_system, new_source_
 file_name_list = datalake_listContents(CONNECTION_STRING, file_system, new_source_path+ latestFolder)
 file_name_list = [file for file in file_name_list if 'Home Care' in file]
 for new_source_file in file_name_list:
-  new_dataset = datalake_download(CONNECTION_STRING, file_system, new_source_path+latestFolder, new_source_file)
-  df_dom = pd.read_excel(io.BytesIO(new_dataset), header = 0, engine='openpyxl')
+  df_dom = read_landed_sheet(CONNECTION_STRING, file_system, new_source_path+latestFolder, new_source_file)
 
 # COMMAND ----------
 
@@ -89,8 +87,7 @@ for new_source_file in file_name_list:
 file_name_list = datalake_listContents(CONNECTION_STRING, file_system, new_source_path+ latestFolder)
 care_home_list = [file for file in file_name_list if 'Care Home' in file]
 for care_home_file in care_home_list:
-  care_home_dataset = datalake_download(CONNECTION_STRING, file_system, new_source_path+latestFolder, care_home_file)
-  df_res = pd.read_excel(io.BytesIO(care_home_dataset), sheet_name = 'CH residents', header = 0, engine='openpyxl')
+  df_res = read_landed_sheet(CONNECTION_STRING, file_system, new_source_path+latestFolder, care_home_file, sheet_name = 'CH residents')
 
 # COMMAND ----------
 
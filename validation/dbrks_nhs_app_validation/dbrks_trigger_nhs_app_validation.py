@@ -63,8 +63,7 @@ log_table = "dbo.pre_load_log"
 agg_log_table = 'dbo.pre_load_agg_log'
 
 file_system_config = dbutils.secrets.get(scope="AzureDataLake", key="DATALAKE_CONTAINER_NAME")
-config_JSON = datalake_download(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
-config_JSON = json.loads(io.BytesIO(config_JSON).read())
+config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
 
 # COMMAND ----------
 
@@ -82,11 +81,10 @@ file_name_list = datalake_listContents(CONNECTION_STRING, file_system, new_sourc
 file_name_list = [file for file in file_name_list if 'nhs_app_table_snapshot' in file]
 for new_source_file in file_name_list:
   new_dataset = datalake_download(CONNECTION_STRING, file_system, new_source_path+latestFolder, new_source_file)
-  ##added code to ensure columns are read as int64 type. Loads dataframe, grabs column names and uses them to create a dictionary specifying datatype, then reloads the dataframe with correct datatypes
-  new_dataframe = pd.read_csv(io.BytesIO(new_dataset))
-  column_types = list(new_dataframe.columns[2:len(new_dataframe)])
-  column_types = {k:'float' for k in column_types}
-  new_dataframe = pd.read_csv(io.BytesIO(new_dataset), dtype = column_types)
+  # the file is parsed once: ingestion is handed parsed_dataframe, the tests run on its count columns as floats
+  parsed_dataframe = pd.read_csv(io.BytesIO(new_dataset))
+  column_types = {k:'float' for k in parsed_dataframe.columns[2:]}
+  new_dataframe = parsed_dataframe.astype(column_types)
   new_dataframe['Date'] = pd.to_datetime(new_dataframe['Date']).dt.strftime("%Y-%m-%d")
 
 # COMMAND ----------
@@ -113,10 +111,11 @@ df_sum_of_current_cols_daily
 # COMMAND ----------
 
 #load in the sums of each column for the previous dataset and store this in a dataframe
-df_sum_prev = pd.DataFrame(columns=['load_date', 'file_name', 'aggregation', 'aggregate_value', 'comment'])
+df_sum_prev = DataFrameAccumulator().add(pd.DataFrame(columns=['load_date', 'file_name', 'aggregation', 'aggregate_value', 'comment']))
 for column in new_dataframe.columns[2:len(new_dataframe.columns)]:
   prev_agg_row = get_last_agg(agg_log_table, 'app_table_snapshot', "sum", "sum of {} column".format(column))
-  df_sum_prev = df_sum_prev.append(prev_agg_row)
+  df_sum_prev.add(prev_agg_row)
+df_sum_prev = df_sum_prev.collect()
 
 
 # COMMAND ----------
@@ -300,7 +299,7 @@ write_to_sql(df, log_table, "append")
 # Write the sum of each column to the aggregate log tables
 #__________________________________________________________
 
-df_all_agg = pd.DataFrame(columns=['load_date', 'file_name', 'aggregation', 'aggregate_value', 'comment'])
+df_all_agg = DataFrameAccumulator().add(pd.DataFrame(columns=['load_date', 'file_name', 'aggregation', 'aggregate_value', 'comment']))
 #loop through each column and calculate the total
 
 for column in new_dataframe.columns[2:len(new_dataframe.columns)]:
@@ -311,7 +310,8 @@ for column in new_dataframe.columns[2:len(new_dataframe.columns)]:
   agg_row = {"load_date": [date], "file_name":[full_path], "aggregation":["sum"], "aggregate_value":[sum_value], "comment":["sum of {} column".format(column)]}
   agg_log_tbl = "dbo.pre_load_agg_log"
   df_agg = pd.DataFrame(agg_row)  
-  df_all_agg = df_all_agg.append(df_agg)
+  df_all_agg.add(df_agg)
+df_all_agg = df_all_agg.collect()
   
 #write the total to the aggregate log table with the latest time stamp
 write_to_sql(df_all_agg, agg_log_tbl, "append")
@@ -328,3 +328,9 @@ count_row = {"load_date": [date], "file_name": [full_path], "aggregation": ["cou
 agg_log_tbl = "dbo.pre_load_agg_log"
 df_count = pd.DataFrame(count_row)  
 write_to_sql(df_count, agg_log_tbl, "append")
+
+# COMMAND ----------
+
+# Hand the validated snapshot to ingestion
+#___________________________________________________________
+hand_off_validated_frame(parsed_dataframe, new_dataset, CONNECTION_STRING, file_system, new_source_path+latestFolder, new_source_file)
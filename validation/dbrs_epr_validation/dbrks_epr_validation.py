@@ -59,8 +59,7 @@ CONNECTION_STRING = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CON
 file_path_config = "/config/pipelines/nhsx-au-analytics/"
 file_name_config = "config_epr_dbrks.json"
 file_system_config = dbutils.secrets.get(scope='AzureDataLake', key="DATALAKE_CONTAINER_NAME")
-config_JSON = datalake_download(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
-config_JSON = json.loads(io.BytesIO(config_JSON).read())
+config_JSON = load_pipeline_config(CONNECTION_STRING, file_system_config, file_path_config, file_name_config)
 log_table = "dbo.pre_load_log"
 
 # COMMAND ----------
@@ -79,8 +78,7 @@ latestFolder = datalake_latestFolder(CONNECTION_STRING, file_system, source_path
 file_name_list = datalake_listContents(CONNECTION_STRING, file_system, source_path+latestFolder)
 file_name_list = [file for file in file_name_list if '.xlsx' in file]
 for new_source_file in file_name_list:
-  new_dataset = datalake_download(CONNECTION_STRING, file_system, source_path+latestFolder, new_source_file)
-  df = pd.read_excel(io.BytesIO(new_dataset),  engine  = 'openpyxl') 
+  df = read_landed_sheet(CONNECTION_STRING, file_system, source_path+latestFolder, new_source_file) 
   #new_dataframe['Date'] = pd.to_datetime(new_dataframe['BiWeekly_Date']).dt.strftime('%Y-%m-%d')
 
 # COMMAND ----------